@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Client
+from .models import Client, ClientHealthRecord
+from .search import search_clients
 
 
 class ClientInline(admin.StackedInline):
@@ -16,6 +17,31 @@ class CustomUserAdmin(UserAdmin):
     list_filter = ("is_staff", "is_superuser", "is_active")
 
 
+class ClientHealthRecordInline(admin.StackedInline):
+    model = ClientHealthRecord
+    can_delete = False
+    verbose_name_plural = "Health Record"
+
+
+@admin.register(Client)
+class ClientAdmin(admin.ModelAdmin):
+    """Client list stays on the narrow row; health details load on the edit page"""
+
+    inlines = (ClientHealthRecordInline,)
+    list_display = ("first_name", "last_name", "email", "phone", "created_at")
+    search_fields = ("first_name", "last_name", "email", "phone")
+    raw_id_fields = ("user",)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Use the trigram search backend instead of ILIKE over every field.
+        Without a column to sort by, the change list keeps its ranking.
+        """
+        if not search_term:
+            return queryset, False
+        return search_clients(search_term, limit=None, queryset=queryset), False
+
+
 # Unregister the default User admin and register our custom one
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
@@ -0,0 +1,63 @@
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .tokens import InvalidToken, read_access_token
+
+
+class TokenUser:
+    """
+    User built from access token claims.
+    The id, username and staff flag come from the token; any other
+    attribute loads the real User row on first access.
+    """
+
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, payload):
+        self.pk = self.id = payload["uid"]
+        self.username = payload["usr"]
+        self.is_staff = payload["stf"]
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.pk)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def get_username(self):
+        return self.username
+
+    def __str__(self):
+        return self.username
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate API requests with "Authorization: Bearer <access token>".
+    Verifying the token is an HMAC check, so unlike BasicAuthentication no
+    password hash or database query runs per request.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid bearer header")
+        try:
+            payload = read_access_token(auth[1].decode())
+        except (InvalidToken, UnicodeError) as exc:
+            raise exceptions.AuthenticationFailed(str(exc)) from exc
+        return TokenUser(payload), payload
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -0,0 +1,63 @@
+"""
+Per-request resolution of the logged-in user's client profile.
+
+The client id is remembered in the session, and the Client row is
+cached by id, so the common case costs no query. Saving or deleting a
+client drops its cache entry.
+"""
+
+from backend.cache import namespace
+
+from .models import Client
+
+SESSION_KEY = "_client_id"
+CLIENT_CACHE_TIMEOUT = 60 * 60
+
+accounts_cache = namespace("accounts")
+
+
+def client_cache_key(client_id):
+    return f"client:{client_id}"
+
+
+def get_client_id(request):
+    """Return the id of the request user's client profile, or None"""
+    if not request.user.is_authenticated:
+        return None
+    client_id = request.session.get(SESSION_KEY)
+    if client_id is None:
+        client_id = (
+            Client.objects.filter(user_id=request.user.pk)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if client_id is not None:
+            request.session[SESSION_KEY] = client_id
+    return client_id
+
+
+def get_client(request):
+    """Return the request user's Client, or None when they have no profile"""
+    client_id = get_client_id(request)
+    if client_id is None:
+        return None
+    key = client_cache_key(client_id)
+    client = accounts_cache.get(key)
+    if client is None:
+        client = Client.objects.filter(pk=client_id).first()
+        if client is not None:
+            accounts_cache.set(key, client, CLIENT_CACHE_TIMEOUT)
+    if client is None or client.user_id != request.user.pk:
+        request.session.pop(SESSION_KEY, None)
+        return None
+    return client
+
+
+def remember_client(request, client):
+    """Store a just-created or just-loaded client for later requests"""
+    request.session[SESSION_KEY] = client.pk
+    accounts_cache.set(client_cache_key(client.pk), client, CLIENT_CACHE_TIMEOUT)
+
+
+def forget_client(client_id):
+    accounts_cache.delete(client_cache_key(client_id))
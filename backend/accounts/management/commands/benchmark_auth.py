@@ -0,0 +1,74 @@
+import base64
+import time
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from accounts.authentication import SignedTokenAuthentication
+from accounts.tokens import issue_access_token
+
+
+class WhoAmI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({"id": request.user.pk})
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare API requests per second under BasicAuthentication and "
+        "signed bearer tokens, in process with a throwaway user"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+
+    def _measure(self, view, header, count):
+        factory = APIRequestFactory()
+        for _ in range(5):
+            view(factory.get("/", HTTP_AUTHORIZATION=header))
+        started = time.perf_counter()
+        for _ in range(count):
+            response = view(factory.get("/", HTTP_AUTHORIZATION=header))
+            if response.status_code != 200:
+                raise RuntimeError(f"Request failed with {response.status_code}")
+        return count / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        password = uuid4().hex
+        with transaction.atomic():
+            user = User.objects.create_user(
+                f"bench-{uuid4().hex[:8]}", password=password
+            )
+            credentials = base64.b64encode(f"{user.username}:{password}".encode())
+            schemes = [
+                (
+                    "BasicAuthentication",
+                    WhoAmI.as_view(authentication_classes=[BasicAuthentication]),
+                    f"Basic {credentials.decode()}",
+                ),
+                (
+                    "SignedTokenAuthentication",
+                    WhoAmI.as_view(authentication_classes=[SignedTokenAuthentication]),
+                    f"Bearer {issue_access_token(user)}",
+                ),
+            ]
+            results = {}
+            for label, view, header in schemes:
+                results[label] = self._measure(view, header, count)
+                self.stdout.write(f"{label:<28} {results[label]:>10.1f} req/s")
+            transaction.set_rollback(True)
+
+        speedup = results["SignedTokenAuthentication"] / results["BasicAuthentication"]
+        self.stdout.write(
+            self.style.SUCCESS(f"Bearer tokens are {speedup:.1f}x faster")
+        )
@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .clients import get_client
+
+
+class ClientMiddleware:
+    """
+    Attach the logged-in user's client profile as request.client.
+    It is resolved lazily, at most once per request, and is falsy for
+    anonymous users and users without a profile.
+    Must come after AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.client = SimpleLazyObject(lambda: get_client(request))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Async views never touch request.client, so nothing blocks here
+        request.client = SimpleLazyObject(lambda: get_client(request))
+        return await self.get_response(request)
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="client",
+            name="newsletter_opt_in",
+            field=models.BooleanField(
+                default=False,
+                help_text="Whether the client wants new articles by email",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                condition=models.Q(("newsletter_opt_in", True)),
+                fields=["id"],
+                name="client_newsletter_idx",
+            ),
+        ),
+    ]
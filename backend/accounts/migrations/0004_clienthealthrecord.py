@@ -0,0 +1,104 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+HEALTH_FIELDS = ("medical_conditions", "allergies", "current_medications")
+
+
+def copy_health_details(apps, schema_editor):
+    """Move non-empty medical details from Client into health records"""
+    Client = apps.get_model("accounts", "Client")
+    ClientHealthRecord = apps.get_model("accounts", "ClientHealthRecord")
+    clients = (
+        Client.objects.exclude(
+            medical_conditions="", allergies="", current_medications=""
+        )
+        .values_list("pk", *HEALTH_FIELDS)
+        .iterator(chunk_size=1000)
+    )
+    batch = []
+    for pk, *details in clients:
+        batch.append(
+            ClientHealthRecord(client_id=pk, **dict(zip(HEALTH_FIELDS, details)))
+        )
+        if len(batch) == 1000:
+            ClientHealthRecord.objects.bulk_create(batch)
+            batch = []
+    ClientHealthRecord.objects.bulk_create(batch)
+
+
+def restore_health_details(apps, schema_editor):
+    Client = apps.get_model("accounts", "Client")
+    ClientHealthRecord = apps.get_model("accounts", "ClientHealthRecord")
+    for record in ClientHealthRecord.objects.iterator(chunk_size=1000):
+        Client.objects.filter(pk=record.client_id).update(
+            **{field: getattr(record, field) for field in HEALTH_FIELDS}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_refreshtoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientHealthRecord",
+            fields=[
+                (
+                    "client",
+                    models.OneToOneField(
+                        help_text="The client these details belong to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="health_record",
+                        serialize=False,
+                        to="accounts.client",
+                    ),
+                ),
+                (
+                    "medical_conditions",
+                    models.TextField(
+                        blank=True,
+                        help_text="Any relevant medical conditions or health concerns",
+                    ),
+                ),
+                (
+                    "allergies",
+                    models.TextField(
+                        blank=True,
+                        help_text="Any allergies to herbs, medicines, or other substances",
+                    ),
+                ),
+                (
+                    "current_medications",
+                    models.TextField(
+                        blank=True,
+                        help_text="Current medications, supplements, or herbal remedies being taken",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="When the health details were last changed",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(copy_health_details, restore_health_details),
+        migrations.RemoveField(
+            model_name="client",
+            name="allergies",
+        ),
+        migrations.RemoveField(
+            model_name="client",
+            name="current_medications",
+        ),
+        migrations.RemoveField(
+            model_name="client",
+            name="medical_conditions",
+        ),
+    ]
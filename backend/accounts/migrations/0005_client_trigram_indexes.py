@@ -0,0 +1,45 @@
+from django.contrib.postgres import operations
+from django.db import migrations
+
+TRIGRAM_FIELDS = ("first_name", "last_name", "email", "phone")
+
+
+class TrigramExtension(operations.TrigramExtension):
+    """Django's, except that it also reverses on backends without extensions"""
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    GIN trigram indexes on UPPER(column), matching the icontains lookup.
+    They only exist on PostgreSQL; other backends skip them.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS client_{field}_trgm "
+            f"ON accounts_client USING gin ((UPPER({field}::text)) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS client_{field}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_clienthealthrecord"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
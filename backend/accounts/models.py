@@ -2,11 +2,18 @@ from django.db import models
 from django.contrib.auth.models import User
 
 
+class ClientQuerySet(models.QuerySet):
+    def with_health_record(self):
+        """Join the medical details, for the consultation view only"""
+        return self.select_related("health_record")
+
+
 class Client(models.Model):
     """
     Stores client/patient information.
     Each client needs a user account for online access.
-    Includes contact info and important medical information.
+    Includes contact info; medical information lives in ClientHealthRecord
+    so bookings, the admin and emails only load this narrow row.
     """
 
     user = models.OneToOneField(
@@ -23,6 +30,49 @@ class Client(models.Model):
     date_of_birth = models.DateField(
         help_text="Client's date of birth for health records"
     )
+    newsletter_opt_in = models.BooleanField(
+        default=False, help_text="Whether the client wants new articles by email"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, help_text="When the client record was created"
+    )
+
+    objects = ClientQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Newsletter recipients are streamed in id order
+            models.Index(
+                fields=["id"],
+                condition=models.Q(newsletter_opt_in=True),
+                name="client_newsletter_idx",
+            ),
+        ]
+
+    def get_health_record(self):
+        """Return the client's health record, creating an empty one if needed"""
+        record, created = ClientHealthRecord.objects.get_or_create(client=self)
+        return record
+
+    def __str__(self):
+        """Returns the client's full name"""
+        return f"{self.first_name} {self.last_name}"
+
+
+class ClientHealthRecord(models.Model):
+    """
+    Medical information for a client.
+    Kept out of the Client row because only the herbalist's consultation
+    view and new booking notifications need it.
+    """
+
+    client = models.OneToOneField(
+        Client,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="health_record",
+        help_text="The client these details belong to",
+    )
     medical_conditions = models.TextField(
         blank=True, help_text="Any relevant medical conditions or health concerns"
     )
@@ -33,10 +83,37 @@ class Client(models.Model):
         blank=True,
         help_text="Current medications, supplements, or herbal remedies being taken",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="When the health details were last changed"
+    )
+
+    def __str__(self):
+        return f"Health record for {self.client}"
+
+
+class RefreshToken(models.Model):
+    """
+    Long-lived API refresh token.
+    Only a SHA-256 digest of the token is stored; the raw value is shown
+    to the client once. Each refresh rotates the token.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="refresh_tokens",
+        help_text="Account the token was issued to",
+    )
+    token_hash = models.CharField(
+        max_length=64, unique=True, help_text="SHA-256 hex digest of the token"
+    )
     created_at = models.DateTimeField(
-        auto_now_add=True, help_text="When the client record was created"
+        auto_now_add=True, help_text="When the token was issued"
+    )
+    expires_at = models.DateTimeField(help_text="When the token stops being accepted")
+    revoked_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the token was rotated or revoked"
     )
 
     def __str__(self):
-        """Returns the client's full name"""
-        return f"{self.first_name} {self.last_name}"
+        return f"Refresh token for {self.user} ({self.created_at:%Y-%m-%d})"
@@ -0,0 +1,23 @@
+"""
+Row-based read serializer for client listings, giving the output of
+ClientSerializer without building model instances.
+"""
+
+from backend.read_serializers import ReadSerializer
+
+from .models import Client
+
+
+class ClientReadSerializer(ReadSerializer):
+    model = Client
+    fields = (
+        "id",
+        "user",
+        "first_name",
+        "last_name",
+        "email",
+        "phone",
+        "date_of_birth",
+        "newsletter_opt_in",
+        "created_at",
+    )
@@ -0,0 +1,60 @@
+"""
+Typo-tolerant client search.
+
+On PostgreSQL, name, email and phone carry pg_trgm GIN indexes on
+UPPER(column), the same expression Django's icontains lookup produces,
+so both substring matches and fuzzy word matches (%>) are index scans.
+Results are ranked by trigram word similarity. Other databases fall back
+to plain case-insensitive substring matching.
+"""
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from .models import Client
+
+SEARCH_FIELDS = ("first_name", "last_name", "email", "phone")
+
+# Only the first few words of a query are used
+MAX_WORDS = 4
+
+
+def _word_filter(word, fuzzy):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__icontains": word})
+        if fuzzy:
+            condition |= Q(**{f"{field}_upper__trigram_word_similar": word.upper()})
+    return condition
+
+
+def search_clients(term, limit=10, queryset=None):
+    """
+    Return up to `limit` clients matching every word of `term`, or all
+    of them when `limit` is None, best matches first.
+    """
+    words = term.split()[:MAX_WORDS]
+    clients = Client.objects.all() if queryset is None else queryset
+    if not words:
+        return clients.none()
+
+    fuzzy = connections[clients.db].vendor == "postgresql"
+    if fuzzy:
+        clients = clients.alias(
+            **{f"{field}_upper": Upper(field) for field in SEARCH_FIELDS}
+        )
+    for word in words:
+        clients = clients.filter(_word_filter(word, fuzzy))
+    if fuzzy:
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models.functions import Greatest
+
+        clients = clients.annotate(
+            rank=Greatest(
+                *[TrigramWordSimilarity(" ".join(words), f) for f in SEARCH_FIELDS]
+            )
+        ).order_by("-rank", "last_name", "first_name")
+    else:
+        clients = clients.order_by("last_name", "first_name")
+    return clients if limit is None else clients[:limit]
@@ -0,0 +1,16 @@
+"""
+REST framework serializer for client profiles. Listings use
+ClientReadSerializer, which shares these fields and gives the same
+output.
+"""
+
+from rest_framework import serializers
+
+from .models import Client
+from .read_serializers import ClientReadSerializer
+
+
+class ClientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Client
+        fields = ClientReadSerializer.fields
@@ -0,0 +1,25 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .clients import SESSION_KEY, forget_client
+from .models import Client
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def client_changed(sender, instance, **kwargs):
+    """Drop the cached profile so the next request reloads it"""
+    forget_client(instance.pk)
+
+
+@receiver(user_logged_in)
+def remember_client_id(sender, request, user, **kwargs):
+    """Resolve the client id once at login instead of on later requests"""
+    if request is None or not hasattr(request, "session"):
+        return
+    client_id = (
+        Client.objects.filter(user_id=user.pk).values_list("pk", flat=True).first()
+    )
+    if client_id is not None:
+        request.session[SESSION_KEY] = client_id
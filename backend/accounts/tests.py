@@ -1,3 +1,346 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend import cache
+
+from .clients import SESSION_KEY
+from .middleware import ClientMiddleware
+from .models import Client, RefreshToken
+from .read_serializers import ClientReadSerializer
+from .serializers import ClientSerializer
+from .tokens import (
+    ACCESS_TOKEN_LIFETIME,
+    InvalidToken,
+    issue_access_token,
+    issue_refresh_token,
+    read_access_token,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
+
+
+class AccessTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="secret", is_staff=True)
+
+    def test_payload_round_trips(self):
+        payload = read_access_token(issue_access_token(self.user))
+        self.assertEqual(payload, {"uid": self.user.pk, "usr": "ana", "stf": True})
+
+    def test_reading_does_not_query(self):
+        token = issue_access_token(self.user)
+        with self.assertNumQueries(0):
+            read_access_token(token)
+
+    def test_expired_token_is_rejected(self):
+        token = issue_access_token(self.user)
+        later = timezone.now() + ACCESS_TOKEN_LIFETIME + timedelta(seconds=1)
+        with mock.patch(
+            "django.core.signing.time.time", return_value=later.timestamp()
+        ):
+            with self.assertRaisesMessage(InvalidToken, "expired"):
+                read_access_token(token)
+
+    def test_tampered_token_is_rejected(self):
+        token = issue_access_token(self.user)
+        with self.assertRaises(InvalidToken):
+            read_access_token(token[:-1] + ("A" if token[-1] != "A" else "B"))
+
+
+class RefreshTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="secret")
+
+    def test_only_a_digest_is_stored(self):
+        token = issue_refresh_token(self.user)
+        stored = RefreshToken.objects.get(user=self.user)
+        self.assertNotEqual(stored.token_hash, token)
+        self.assertEqual(len(stored.token_hash), 64)
+
+    def test_rotation_revokes_the_old_token(self):
+        token = issue_refresh_token(self.user)
+        pair = rotate_refresh_token(token)
+        self.assertEqual(read_access_token(pair["access"])["uid"], self.user.pk)
+        self.assertNotEqual(pair["refresh"], token)
+        self.assertEqual(
+            RefreshToken.objects.filter(revoked_at__isnull=True).count(), 1
+        )
+
+    def test_reused_token_is_rejected(self):
+        token = issue_refresh_token(self.user)
+        rotate_refresh_token(token)
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(token)
+
+    def test_expired_token_is_rejected(self):
+        token = issue_refresh_token(self.user)
+        RefreshToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(token)
+
+    def test_revoked_token_is_rejected(self):
+        token = issue_refresh_token(self.user)
+        self.assertEqual(revoke_refresh_token(token), 1)
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(token)
+
+    def test_inactive_user_cannot_refresh(self):
+        token = issue_refresh_token(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(token)
+
+
+class TokenAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="secret")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_obtain_refresh_and_reuse(self):
+        response = self.client.post(
+            "/api/auth/token/", {"username": "ana", "password": "secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        refresh = response.data["refresh"]
+
+        response = self.client.post("/api/auth/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+
+        response = self.client.post("/api/auth/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_wrong_password(self):
+        response = self.client.post(
+            "/api/auth/token/", {"username": "ana", "password": "wrong"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_revoke(self):
+        refresh = issue_refresh_token(self.user)
+        response = self.client.post("/api/auth/token/revoke/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 204)
+        response = self.client.post("/api/auth/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ClientMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="secret")
+        cls.profile = Client.objects.create(
+            user=cls.user,
+            first_name="Ana",
+            last_name="Berg",
+            email="ana@example.com",
+            phone="555",
+            date_of_birth=date(1980, 2, 3),
+        )
+
+    def setUp(self):
+        cache.local.clear()
+        self.addCleanup(cache.local.clear)
+        self.session = import_module(settings.SESSION_ENGINE).SessionStore()
+
+    def request(self, user=None, read=True):
+        """Run a request through the middleware; return the client it saw"""
+        request = RequestFactory().get("/")
+        request.user = user or self.user
+        request.session = self.session
+        seen = {}
+
+        def view(request):
+            if read:
+                # Resolved on first use, once per request
+                bool(request.client)
+                bool(request.client)
+                seen["client"] = request.client
+            return HttpResponse()
+
+        ClientMiddleware(view)(request)
+        return seen.get("client")
+
+    def test_resolved_only_when_read(self):
+        with self.assertNumQueries(0):
+            self.request(read=False)
+
+    def test_client_is_cached_between_requests(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.request(), self.profile)
+        self.assertEqual(self.session[SESSION_KEY], self.profile.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.request().first_name, "Ana")
+
+    def test_missing_profiles_are_falsy(self):
+        self.assertFalse(self.request(user=AnonymousUser()))
+        self.assertFalse(self.request(user=User.objects.create_user("ines")))
+
+    def test_saving_a_client_drops_the_cached_copy(self):
+        self.request()
+        self.profile.first_name = "Anna"
+        self.profile.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.request().first_name, "Anna")
+
+    def test_deleting_a_client_forgets_it(self):
+        self.request()
+        self.profile.delete()
+        self.assertFalse(self.request())
+        self.assertNotIn(SESSION_KEY, self.session)
+
+    def test_login_remembers_the_client_id(self):
+        self.client.login(username="ana", password="secret")
+        self.assertEqual(self.client.session[SESSION_KEY], self.profile.pk)
+
+
+class ClientReadSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number, name in enumerate(["ana", "ines"]):
+            Client.objects.create(
+                user=User.objects.create_user(name),
+                first_name=name.title(),
+                last_name="Berg",
+                email=f"{name}@example.com",
+                phone="555",
+                date_of_birth=date(1980 + number, 2, 3),
+                newsletter_opt_in=bool(number),
+            )
+
+    def assertSameOutput(self):
+        clients = Client.objects.order_by("pk")
+        expected = json.loads(json.dumps(ClientSerializer(clients, many=True).data))
+        self.assertEqual(ClientReadSerializer().many(clients), expected)
+
+    def test_matches_model_serializer(self):
+        self.assertSameOutput()
+
+    @override_settings(TIME_ZONE="America/Vancouver")
+    def test_matches_model_serializer_outside_utc(self):
+        self.assertSameOutput()
+
+
+class ClientAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("lois")
+        users = User.objects.bulk_create(
+            [User(username=f"lind{number}") for number in range(205)]
+            + [User(username="ana")]
+        )
+        Client.objects.bulk_create(
+            Client(
+                user=user,
+                first_name=user.username.title(),
+                last_name="Berg" if user.username == "ana" else "Lind",
+                email=f"{user.username}@example.com",
+                phone="555",
+                date_of_birth=date(1980, 2, 3),
+            )
+            for user in users
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def search(self, term):
+        response = self.client.get("/admin/accounts/client/", {"q": term})
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"]
+
+    def test_every_match_is_paged(self):
+        changelist = self.search("lind")
+        self.assertEqual(changelist.result_count, 205)
+        self.assertEqual(len(changelist.result_list), changelist.list_per_page)
+        last_page = self.client.get("/admin/accounts/client/", {"q": "lind", "p": 3})
+        self.assertEqual(len(last_page.context["cl"].result_list), 5)
+
+    def test_every_word_must_match(self):
+        self.assertEqual(
+            [client.email for client in self.search("ANA berg").result_list],
+            ["ana@example.com"],
+        )
+        self.assertEqual(self.search("ana lind").result_count, 0)
+        self.assertEqual(self.search("").result_count, 206)
+
+
+class HealthRecordMigrationTests(TransactionTestCase):
+    """0004 moves medical details from Client into ClientHealthRecord"""
+
+    before = [("accounts", "0003_refreshtoken")]
+    after = [("accounts", "0004_clienthealthrecord")]
+
+    def setUp(self):
+        leaves = MigrationExecutor(connection).loader.graph.leaf_nodes()
+        self.addCleanup(self.migrate, leaves)
+        self.apps = self.migrate(self.before)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def create_client(self, name, **health):
+        user = self.apps.get_model("auth", "User").objects.create(username=name)
+        return self.apps.get_model("accounts", "Client").objects.create(
+            user_id=user.pk,
+            first_name=name,
+            last_name="Berg",
+            email=f"{name}@example.com",
+            phone="555",
+            date_of_birth=date(1980, 2, 3),
+            **health,
+        )
+
+    def test_health_details_are_carried_over(self):
+        details = {
+            "medical_conditions": "Asthma",
+            "allergies": "Ragweed, chamomile",
+            "current_medications": "Salbutamol\nVitamin D",
+        }
+        ana = self.create_client("ana", **details)
+        ines = self.create_client("ines", allergies="Birch pollen")
+        self.create_client("eva")
+
+        apps = self.migrate(self.after)
+        records = {
+            record.client_id: record
+            for record in apps.get_model("accounts", "ClientHealthRecord").objects.all()
+        }
+        self.assertEqual(set(records), {ana.pk, ines.pk})
+        for field, value in details.items():
+            self.assertEqual(getattr(records[ana.pk], field), value)
+        self.assertEqual(
+            (records[ines.pk].allergies, records[ines.pk].medical_conditions),
+            ("Birch pollen", ""),
+        )
+
+        # And back again when the migration is reversed
+        apps = self.migrate(self.before)
+        restored = apps.get_model("accounts", "Client").objects.get(pk=ana.pk)
+        for field, value in details.items():
+            self.assertEqual(getattr(restored, field), value)
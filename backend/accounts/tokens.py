@@ -0,0 +1,93 @@
+"""
+Signed access tokens and hashed refresh tokens for the API.
+
+Access tokens are HMAC-signed with SECRET_KEY and carry the user id,
+username and staff flag, so checking one costs a signature check and no
+database query. Refresh tokens are random, stored as SHA-256 digests and
+rotated on every use; the password is only hashed when logging in.
+"""
+
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .models import RefreshToken
+
+ACCESS_TOKEN_SALT = "accounts.tokens.access"
+ACCESS_TOKEN_LIFETIME = getattr(settings, "ACCESS_TOKEN_LIFETIME", timedelta(minutes=5))
+REFRESH_TOKEN_LIFETIME = getattr(settings, "REFRESH_TOKEN_LIFETIME", timedelta(days=14))
+
+
+class InvalidToken(Exception):
+    """Raised when a token is malformed, expired or revoked"""
+
+
+def issue_access_token(user):
+    payload = {"uid": user.pk, "usr": user.get_username(), "stf": user.is_staff}
+    return signing.dumps(payload, salt=ACCESS_TOKEN_SALT)
+
+
+def read_access_token(token):
+    """Return the payload of a valid access token without touching the DB"""
+    try:
+        return signing.loads(
+            token, salt=ACCESS_TOKEN_SALT, max_age=ACCESS_TOKEN_LIFETIME
+        )
+    except signing.SignatureExpired as exc:
+        raise InvalidToken("Access token has expired") from exc
+    except signing.BadSignature as exc:
+        raise InvalidToken("Invalid access token") from exc
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(user):
+    token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=_digest(token),
+        expires_at=timezone.now() + REFRESH_TOKEN_LIFETIME,
+    )
+    return token
+
+
+def issue_token_pair(user):
+    return {
+        "access": issue_access_token(user),
+        "refresh": issue_refresh_token(user),
+        "expires_in": int(ACCESS_TOKEN_LIFETIME.total_seconds()),
+    }
+
+
+def revoke_refresh_token(token):
+    """Revoke a refresh token; returns the number of tokens revoked"""
+    return RefreshToken.objects.filter(
+        token_hash=_digest(token), revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+
+
+def rotate_refresh_token(token):
+    """
+    Exchange a refresh token for a new token pair.
+    The old token is revoked with a conditional UPDATE, so a token can only
+    be redeemed once even under concurrent refreshes.
+    """
+    now = timezone.now()
+    refresh = (
+        RefreshToken.objects.select_related("user")
+        .filter(token_hash=_digest(token), revoked_at__isnull=True, expires_at__gt=now)
+        .first()
+    )
+    if refresh is None or not refresh.user.is_active:
+        raise InvalidToken("Invalid or expired refresh token")
+    if not RefreshToken.objects.filter(pk=refresh.pk, revoked_at__isnull=True).update(
+        revoked_at=now
+    ):
+        raise InvalidToken("Refresh token has already been used")
+    return issue_token_pair(refresh.user)
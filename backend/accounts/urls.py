@@ -0,0 +1,25 @@
+from django.urls import path
+
+from backend.lazy import lazy_api_view
+
+app_name = "accounts"
+
+# The views load REST framework on their first request, not at startup
+urlpatterns = [
+    path("token/", lazy_api_view("accounts.views.TokenObtainAPI"), name="token_obtain"),
+    path(
+        "token/refresh/",
+        lazy_api_view("accounts.views.TokenRefreshAPI"),
+        name="token_refresh",
+    ),
+    path(
+        "token/revoke/",
+        lazy_api_view("accounts.views.TokenRevokeAPI"),
+        name="token_revoke",
+    ),
+    path(
+        "clients/search/",
+        lazy_api_view("accounts.views.ClientSearchAPI"),
+        name="client_search",
+    ),
+]
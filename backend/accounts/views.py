@@ -1,3 +1,76 @@
-from django.shortcuts import render
+from django.contrib.auth import authenticate
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .search import search_clients
+from .tokens import (
+    InvalidToken,
+    issue_token_pair,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
+
+
+class TokenObtainAPI(APIView):
+    """Exchange a username and password for an access and refresh token"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        user = authenticate(
+            request,
+            username=request.data.get("username"),
+            password=request.data.get("password"),
+        )
+        if user is None:
+            return Response(
+                {"status": "error", "message": "Invalid username or password"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        return Response(issue_token_pair(user))
+
+
+class TokenRefreshAPI(APIView):
+    """Rotate a refresh token into a new token pair"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        try:
+            tokens = rotate_refresh_token(request.data.get("refresh", ""))
+        except InvalidToken as exc:
+            return Response(
+                {"status": "error", "message": str(exc)},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        return Response(tokens)
+
+
+class TokenRevokeAPI(APIView):
+    """Revoke a refresh token when the client logs out"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        revoke_refresh_token(request.data.get("refresh", ""))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ClientSearchAPI(APIView):
+    """Staff autocomplete for clients by name, email or phone"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        term = request.query_params.get("q", "").strip()
+        if len(term) < 2:
+            return Response({"results": []})
+        results = search_clients(term, limit=10).values(
+            "id", "first_name", "last_name", "email", "phone"
+        )
+        return Response({"results": list(results)})
@@ -0,0 +1,288 @@
+"""
+Two-tier project cache.
+
+Each process keeps a small LRU (L1) in front of the shared Django cache
+configured in CACHES (L2). Keys live in namespaces ("blog", "bookings",
+"accounts", ...) and carry the namespace's version number, so
+invalidate() drops a whole namespace by bumping one counter. L1 entries
+and the L1 copy of each version live at most L1_TIMEOUT seconds, which
+bounds how long another process can serve data that was replaced;
+changes made in this process are visible to it immediately.
+
+get_or_set() is single-flight: while a key is being recomputed, other
+threads of the process wait on a lock and other processes poll L2
+behind a short lock key, instead of all running the same query.
+Hit and miss counts per namespace are exported on /metrics.
+"""
+
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import close_old_connections
+
+L1_ENTRIES = getattr(settings, "TIERED_CACHE_L1_ENTRIES", 2048)
+L1_TIMEOUT = getattr(settings, "TIERED_CACHE_L1_TIMEOUT", 5)
+L2_ALIAS = getattr(settings, "TIERED_CACHE_ALIAS", "default")
+
+# How long a recomputation may hold its lock before others give up waiting
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU of pickled values with a per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires, data = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+        # Unpickle outside the lock; callers get their own copy to mutate
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CacheStats:
+    RESULTS = ("l1_hit", "l2_hit", "miss", "wait_hit", "compute")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def count(self, namespace, result):
+        with self.lock:
+            self.counts[namespace, result] += 1
+
+    def render(self):
+        """Render the counters in the Prometheus text exposition format"""
+        lines = [
+            "# HELP cache_requests_total Tiered cache lookups by namespace and result",
+            "# TYPE cache_requests_total counter",
+        ]
+        with self.lock:
+            for (namespace, result), count in sorted(self.counts.items()):
+                lines.append(
+                    f'cache_requests_total{{namespace="{namespace}",'
+                    f'result="{result}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+local = LRUCache(L1_ENTRIES)
+stats = CacheStats()
+
+# Stripes of per-process recomputation locks, picked by key hash
+_compute_locks = [threading.Lock() for _ in range(64)]
+
+
+def _l2():
+    return caches[L2_ALIAS]
+
+
+class Namespace:
+    """Versioned keyspace in the tiered cache"""
+
+    def __init__(self, name):
+        self.name = name
+        self.version_key = f"{name}:version"
+        self._version = None
+        self._version_checked = 0.0
+
+    def version(self):
+        """Current namespace version, re-read from L2 every L1_TIMEOUT"""
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > L1_TIMEOUT:
+            version = _l2().get(self.version_key)
+            if version is None:
+                _l2().add(self.version_key, 1, None)
+                version = _l2().get(self.version_key, 1)
+            self._version, self._version_checked = version, now
+        return self._version
+
+    def invalidate(self):
+        """Drop every key of the namespace by moving to a new version"""
+        try:
+            version = _l2().incr(self.version_key)
+        except ValueError:
+            version = (self._version or 1) + 1
+            _l2().set(self.version_key, version, None)
+        self._version, self._version_checked = version, time.monotonic()
+
+    def make_key(self, key):
+        return f"{self.name}:{self.version()}:{key}"
+
+    def get(self, key, default=None, shared=False):
+        """
+        Return the cached value of key, or default. shared=True skips L1
+        and reads what every process sees, for read-modify-write updates.
+        """
+        full_key = self.make_key(key)
+        value = _MISSING if shared else local.get(full_key)
+        if value is not _MISSING:
+            stats.count(self.name, "l1_hit")
+            return value
+        value = _l2().get(full_key, _MISSING)
+        if value is _MISSING:
+            stats.count(self.name, "miss")
+            return default
+        stats.count(self.name, "l2_hit")
+        local.set(full_key, value, L1_TIMEOUT)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        full_key = self.make_key(key)
+        _l2().set(full_key, value, timeout)
+        l1_timeout = L1_TIMEOUT if timeout in (None, DEFAULT_TIMEOUT) else timeout
+        local.set(full_key, value, min(L1_TIMEOUT, l1_timeout))
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        full_keys = [self.make_key(key) for key in keys]
+        for full_key in full_keys:
+            local.delete(full_key)
+        _l2().delete_many(full_keys)
+
+    @contextmanager
+    def lock(self, key, wait=LOCK_TIMEOUT):
+        """
+        Hold a lock named after key across processes, waiting up to wait
+        seconds for it. Yields whether it was acquired; a holder that dies
+        releases it after LOCK_TIMEOUT.
+        """
+        lock_key = f"{self.make_key(key)}:mutex"
+        deadline = time.monotonic() + wait
+        while not (acquired := _l2().add(lock_key, 1, LOCK_TIMEOUT)):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _l2().delete(lock_key)
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        Return the cached value, computing and storing it on a miss. Only
+        one caller per key recomputes at a time; the others wait for its
+        result. A None result is cached like any other value.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        full_key = self.make_key(key)
+        lock_key = f"{full_key}:lock"
+        with _compute_locks[hash(full_key) % len(_compute_locks)]:
+            # Another thread or process may have filled it meanwhile
+            value = local.get(full_key)
+            if value is _MISSING:
+                value = _l2().get(full_key, _MISSING)
+                if value is not _MISSING:
+                    local.set(full_key, value, L1_TIMEOUT)
+            if value is not _MISSING:
+                stats.count(self.name, "wait_hit")
+                return value
+
+            if _l2().add(lock_key, 1, LOCK_TIMEOUT):
+                try:
+                    return self._compute(key, compute, timeout)
+                finally:
+                    _l2().delete(lock_key)
+
+        # Another process is computing it. Wait without the stripe lock,
+        # which would stall unrelated keys of this process meanwhile
+        value = self._wait_for(full_key)
+        if value is not _MISSING:
+            return value
+        # The holder died or is too slow; compute it ourselves
+        return self._compute(key, compute, timeout)
+
+    def _compute(self, key, compute, timeout):
+        stats.count(self.name, "compute")
+        value = compute()
+        self.set(key, value, timeout)
+        return value
+
+    async def aget_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        get_or_set() for async code. An L1 hit is answered on the event
+        loop; anything touching L2 or the sync compute runs in a worker
+        thread rather than the shared thread sync views run in, since it
+        may wait for another process's computation.
+        """
+        if time.monotonic() - self._version_checked <= L1_TIMEOUT:
+            value = local.get(f"{self.name}:{self._version}:{key}")
+            if value is not _MISSING:
+                stats.count(self.name, "l1_hit")
+                return value
+        return await sync_to_async(self._get_or_set_in_thread, thread_sensitive=False)(
+            key, compute, timeout
+        )
+
+    def _get_or_set_in_thread(self, key, compute, timeout):
+        # The worker thread keeps its own database connection between calls
+        try:
+            return self.get_or_set(key, compute, timeout)
+        finally:
+            close_old_connections()
+
+    def _wait_for(self, full_key):
+        """Poll L2 while another process recomputes the key"""
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = _l2().get(full_key, _MISSING)
+            if value is not _MISSING:
+                stats.count(self.name, "wait_hit")
+                local.set(full_key, value, L1_TIMEOUT)
+                return value
+        return _MISSING
+
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+def namespace(name):
+    """Return the shared Namespace object for name"""
+    with _namespaces_lock:
+        if name not in _namespaces:
+            _namespaces[name] = Namespace(name)
+        return _namespaces[name]
@@ -0,0 +1,95 @@
+"""
+Conditional GET driven by cheap freshness probes.
+
+Django's ETag middleware hashes the rendered body, so an unchanged page
+still costs every query and the template render. Views decorated with
+conditional() instead name a probe: a function of the request (and the
+view arguments) returning (token, last_modified) from something cheap,
+such as an aggregate over an indexed column or a cache version. The
+probe runs first and a matching If-None-Match or If-Modified-Since is
+answered with 304 before the view itself runs.
+
+Tokens are hashed into the ETag, so they may contain ids. Responses that
+depend on who is asking must pass private=True, which adds
+Cache-Control: private and varies on the session cookie and bearer token.
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag,
+)
+from django.utils.http import http_date
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def _validators(probe_result):
+    token, last_modified = probe_result
+    etag = None
+    if token is not None:
+        etag = quote_etag(hashlib.md5(str(token).encode()).hexdigest())
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp
+
+
+def _finish(request, response, etag, timestamp, private):
+    if response.status_code in (200, 304):
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        if timestamp is not None:
+            response.headers.setdefault("Last-Modified", http_date(timestamp))
+    if private:
+        patch_cache_control(response, private=True)
+        patch_vary_headers(response, ("Cookie", "Authorization"))
+    return response
+
+
+def conditional(probe, private=False):
+    """
+    Decorate a view so probe(request, *args, **kwargs) decides whether a
+    GET can be answered with 304. The probe may raise Http404 to reject
+    bad arguments before any further work. Async views may use sync or
+    async probes; sync probes are run in a thread.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async_probe = probe if iscoroutinefunction(probe) else sync_to_async(probe)
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in SAFE_METHODS:
+                    return await view(request, *args, **kwargs)
+                etag, timestamp = _validators(
+                    await async_probe(request, *args, **kwargs)
+                )
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=timestamp
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, timestamp, private)
+
+        else:
+
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method not in SAFE_METHODS:
+                    return view(request, *args, **kwargs)
+                etag, timestamp = _validators(probe(request, *args, **kwargs))
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=timestamp
+                )
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return _finish(request, response, etag, timestamp, private)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,165 @@
+"""
+Primary/replica database routing with read-your-writes pinning.
+
+Reads made while serving a request go to a healthy replica listed in
+settings.DATABASE_REPLICAS and writes always go to "default". A request
+is pinned to the primary when it is not a safe method, and for
+PIN_SECONDS after any request that wrote, via a short-lived signed
+cookie, so a client always sees its own just-created booking even while
+replicas lag. Reads inside a transaction, and reads outside a request
+(workers, management commands), use the primary; a job that can
+tolerate lag opts in with replica_reads().
+
+To exercise routing locally, add a second alias pointing at the same
+database, e.g. DATABASES["replica1"] = {**DATABASES["default"],
+"TEST": {"MIRROR": "default"}}, and list it in DATABASE_REPLICAS.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+PRIMARY = "default"
+
+# How long a client reads from the primary after it wrote
+PIN_SECONDS = getattr(settings, "DATABASE_PIN_SECONDS", 5)
+PIN_COOKIE = "db_pin"
+PIN_COOKIE_SALT = "backend.db_routers.pin"
+
+# Seconds a replica health check result is trusted
+HEALTH_CHECK_INTERVAL = getattr(settings, "DATABASE_HEALTH_CHECK_INTERVAL", 10)
+
+# Apps whose reads must never lag behind their writes
+PRIMARY_ONLY_APPS = {"sessions"}
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Routing state of the current request: {"pinned": bool, "wrote": bool}
+_request_state = ContextVar("db_routing_state", default=None)
+
+# alias -> (healthy, checked_at), per process
+_replica_health = {}
+
+
+def replica_is_healthy(alias):
+    """Check a replica connection, caching the answer for a few seconds"""
+    healthy, checked_at = _replica_health.get(alias, (True, 0.0))
+    now = time.monotonic()
+    if now - checked_at < HEALTH_CHECK_INTERVAL:
+        return healthy
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        healthy = connection.is_usable()
+    except DatabaseError:
+        healthy = False
+    if not healthy:
+        connection.close()
+    _replica_health[alias] = (healthy, now)
+    return healthy
+
+
+def choose_replica():
+    """Return a healthy replica alias, or the primary if there is none"""
+    replicas = [
+        alias
+        for alias in getattr(settings, "DATABASE_REPLICAS", [])
+        if replica_is_healthy(alias)
+    ]
+    return random.choice(replicas) if replicas else PRIMARY
+
+
+@contextmanager
+def replica_reads():
+    """Let code running outside a request read from replicas"""
+    token = _request_state.set({"pinned": False, "wrote": False})
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to replicas unless the request is pinned to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        state = _request_state.get()
+        if state is None or state["pinned"]:
+            return PRIMARY
+        # A transaction must see its own writes and a consistent snapshot
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state["wrote"] = True
+            state["pinned"] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaPinningMiddleware:
+    """
+    Track whether a request wrote and pin the client to the primary
+    for a short window afterwards. Place it after SessionMiddleware so
+    session saves do not count as writes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        # The signature's timestamp bounds the pin, whatever the client sends
+        pin = request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_COOKIE_SALT, max_age=PIN_SECONDS
+        )
+        pinned = request.method not in SAFE_METHODS or pin is not None
+        return _request_state.set({"pinned": pinned, "wrote": False})
+
+    def _finish(self, token, response):
+        state = _request_state.get()
+        _request_state.reset(token)
+        if state["wrote"]:
+            response.set_signed_cookie(
+                PIN_COOKIE,
+                "1",
+                salt=PIN_COOKIE_SALT,
+                max_age=PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self._start(request)
+        return self._finish(token, self.get_response(request))
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        return self._finish(token, await self.get_response(request))
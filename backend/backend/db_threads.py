@@ -0,0 +1,44 @@
+"""
+Bounded thread pool for the database work of async views.
+
+Under ASGI, Django runs each request's sync code, async ORM calls
+included, on a thread of that request, and every such thread opens a
+database connection of its own. With many requests in flight a worker
+can exhaust the server's connection limit. Async views instead hand
+their queries to this pool: a worker holds at most DATABASE_WORKERS
+connections, reused across requests, and further requests wait on the
+event loop rather than in a thread each.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+
+DATABASE_WORKERS = getattr(settings, "ASYNC_DATABASE_WORKERS", 8)
+
+_executor = ThreadPoolExecutor(DATABASE_WORKERS, thread_name_prefix="database")
+
+
+def _run(function, args, kwargs):
+    try:
+        return function(*args, **kwargs)
+    finally:
+        # Same connection housekeeping as at the end of a request
+        close_old_connections()
+
+
+async def run_in_db_thread(function, *args, **kwargs):
+    """
+    Run a sync function that queries the database in the pool, in a copy
+    of the caller's context so replica routing and query instrumentation
+    still see the request
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, context.run, partial(_run, function, args, kwargs)
+    )
@@ -0,0 +1,251 @@
+"""
+Per-request latency and SQL instrumentation.
+
+Every request records its duration into an in-process histogram. A
+sampled fraction (METRICS_SAMPLE_RATE) also records every SQL query
+through a connection execute wrapper: query count, total SQL time and
+repeated statements, which usually mean an N+1 loop. Sampled requests get
+a Server-Timing header and a structured log line; the histograms are
+exposed in Prometheus text format on the staff-only /metrics endpoint,
+together with the tiered cache hit/miss counters.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = getattr(settings, "METRICS_SAMPLE_RATE", 0.1)
+
+# A statement repeated this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = getattr(settings, "METRICS_N_PLUS_ONE_THRESHOLD", 5)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Query collector of the current sampled request, None when not sampled
+_collector = ContextVar("sql_collector", default=None)
+
+
+class QueryCollector:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def duplicates(self):
+        return {
+            sql: count
+            for sql, count in self.statements.items()
+            if count >= N_PLUS_ONE_THRESHOLD
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper timing queries while a request is being sampled"""
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.duration += time.perf_counter() - started
+        collector.count += 1
+        collector.statements[sql] += 1
+
+
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Histograms and counters per route, for this process"""
+
+    METRICS = {
+        "http_request_duration_seconds": (
+            "Request latency by route",
+            DURATION_BUCKETS,
+        ),
+        "db_queries_per_request": (
+            "SQL queries per sampled request",
+            QUERY_COUNT_BUCKETS,
+        ),
+        "db_time_seconds": (
+            "SQL time per sampled request",
+            DURATION_BUCKETS,
+        ),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.n_plus_one = Counter()
+
+    def observe(self, metric, route, value):
+        with self.lock:
+            key = (metric, route)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.METRICS[metric][1])
+            histogram.observe(value)
+
+    def count_n_plus_one(self, route):
+        with self.lock:
+            self.n_plus_one[route] += 1
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for metric, (help_text, _) in self.METRICS.items():
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for (name, route), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    label = f'route="{route}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}'
+                        )
+                    lines += [
+                        f'{metric}_bucket{{{label},le="+Inf"}} {histogram.count}',
+                        f"{metric}_sum{{{label}}} {histogram.sum:.6f}",
+                        f"{metric}_count{{{label}}} {histogram.count}",
+                    ]
+            lines += [
+                "# HELP db_n_plus_one_total Sampled requests with repeated statements",
+                "# TYPE db_n_plus_one_total counter",
+            ]
+            for route, count in sorted(self.n_plus_one.items()):
+                lines.append(f'db_n_plus_one_total{{route="{route}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestInstrumentationMiddleware:
+    """Record latency for every request and SQL details for a sample"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+
+    def _start(self):
+        collector = QueryCollector() if random.random() < SAMPLE_RATE else None
+        return collector, _collector.set(collector), time.perf_counter()
+
+    def _finish(self, request, response, collector, token, started):
+        _collector.reset(token)
+        elapsed = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        registry.observe("http_request_duration_seconds", route, elapsed)
+        timings = [f"app;dur={elapsed * 1000:.1f}"]
+
+        if collector is not None:
+            duplicates = collector.duplicates()
+            registry.observe("db_queries_per_request", route, collector.count)
+            registry.observe("db_time_seconds", route, collector.duration)
+            timings.insert(
+                0,
+                f'db;dur={collector.duration * 1000:.1f};desc="{collector.count} queries"',
+            )
+            record = {
+                "method": request.method,
+                "route": route,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "queries": collector.count,
+                "sql_ms": round(collector.duration * 1000, 2),
+            }
+            if duplicates:
+                registry.count_n_plus_one(route)
+                record["repeated_queries"] = duplicates
+                logger.warning(json.dumps(record))
+            else:
+                logger.info(json.dumps(record))
+
+        response["Server-Timing"] = ", ".join(timings)
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        collector, token, started = self._start()
+        response = self.get_response(request)
+        return self._finish(request, response, collector, token, started)
+
+    async def __acall__(self, request):
+        collector, token, started = self._start()
+        response = await self.get_response(request)
+        return self._finish(request, response, collector, token, started)
+
+
+def _is_staff(request):
+    if request.user.is_staff:
+        return True
+    # Scrapers authenticate with a staff member's bearer token
+    from accounts.tokens import InvalidToken, read_access_token
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        return read_access_token(token)["stf"]
+    except InvalidToken:
+        return False
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, restricted to staff"""
+    if not _is_staff(request):
+        return HttpResponseForbidden()
+    from .cache import stats as cache_stats
+
+    return HttpResponse(
+        registry.render() + cache_stats.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
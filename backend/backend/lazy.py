@@ -0,0 +1,40 @@
+"""
+URLconf entries whose views are imported on their first request.
+
+Loading the URLconf imports every view module it names. Views built on
+REST framework pull in DRF's serializers, renderers and schema support,
+tens of milliseconds on each worker boot that a worker serving other
+pages never needs. lazy_view() defers that import to the first request
+routed to the view.
+"""
+
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path, csrf_exempt=False, **initkwargs):
+    """
+    Return a view that imports dotted_path on first use; class-based
+    views are built with as_view(**initkwargs). CsrfViewMiddleware reads
+    csrf_exempt before the view is loaded, so it is given here; DRF
+    views are exempt and do their own CSRF check.
+    """
+    loaded = []
+
+    def view(request, *args, **kwargs):
+        if not loaded:
+            target = import_string(dotted_path)
+            loaded.append(
+                target.as_view(**initkwargs) if isinstance(target, type) else target
+            )
+        return loaded[0](request, *args, **kwargs)
+
+    view.__name__ = dotted_path.rsplit(".", 1)[-1]
+    view.__qualname__ = view.__name__
+    view.__module__ = dotted_path.rsplit(".", 1)[0]
+    view.csrf_exempt = csrf_exempt
+    return view
+
+
+def lazy_api_view(dotted_path, **initkwargs):
+    """lazy_view() for a REST framework view"""
+    return lazy_view(dotted_path, csrf_exempt=True, **initkwargs)
@@ -0,0 +1,168 @@
+"""
+Publish/subscribe between code that changes data and the async views
+that stream the changes to browsers.
+
+LocalBroker hands each message to the subscribers of this process only,
+which is all a single ASGI process needs. RedisBroker sends messages
+through a Redis server and relays what it receives to the local
+subscribers of every process, for deployments with several. The
+PUBSUB_BACKEND setting picks the class, and PUBSUB_LOCATION is passed
+to it.
+
+publish() may be called from any thread. Each subscriber has a bounded
+queue on its own event loop. When a subscriber falls SUBSCRIBER_BUFFER
+messages behind, its backlog is replaced by OVERFLOW, telling it to
+resynchronise rather than stalling publishers or growing without limit.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+BACKEND = getattr(settings, "PUBSUB_BACKEND", "backend.pubsub.LocalBroker")
+LOCATION = getattr(settings, "PUBSUB_LOCATION", None)
+
+# Messages a subscriber may have waiting before it is sent OVERFLOW
+SUBSCRIBER_BUFFER = 100
+
+OVERFLOW = {"event": "overflow"}
+
+# Seconds RedisBroker waits before reconnecting to Redis
+RECONNECT_DELAY = 1
+
+
+class Subscription:
+    """Messages for one subscriber, read on the event loop it subscribed on"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(SUBSCRIBER_BUFFER)
+
+    def deliver(self, message):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self):
+        """Wait for the next message"""
+        return await self.queue.get()
+
+    def drain(self):
+        """Messages already waiting, without blocking"""
+        messages = []
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+
+class LocalBroker:
+    """Fans messages out to the subscribers of this process"""
+
+    def __init__(self, location=None):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        """Send message, a JSON-compatible dict, to channel's subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Its loop has closed; it is unsubscribed as it unwinds
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        """Receive the messages of channels while the block runs"""
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscribers[channel].discard(subscription)
+                    if not self._subscribers[channel]:
+                        del self._subscribers[channel]
+
+
+class RedisBroker(LocalBroker):
+    """
+    Publishes through Redis, at the URL given as PUBSUB_LOCATION, and
+    relays every message under PREFIX to the local subscribers from one
+    listener thread per process. Needs the redis package.
+    """
+
+    PREFIX = "pubsub:"
+
+    def __init__(self, location):
+        super().__init__()
+        # Optional dependency, only needed by this backend
+        import redis
+
+        self._redis = redis.Redis.from_url(location)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self._redis.publish(self.PREFIX + channel, json.dumps(message))
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        self._start_listener()
+        async with super().subscribe(channels) as subscription:
+            yield subscription
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="pubsub", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        import redis
+
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.PREFIX + "*")
+                for item in pubsub.listen():
+                    self._relay(item)
+            except redis.ConnectionError:
+                # Messages sent meanwhile are lost; subscribers resync on
+                # their next reconnect
+                logger.exception("Lost the pubsub connection, reconnecting")
+                time.sleep(RECONNECT_DELAY)
+
+    def _relay(self, item):
+        try:
+            channel = item["channel"].decode()[len(self.PREFIX) :]
+            super().publish(channel, json.loads(item["data"]))
+        except (ValueError, KeyError):
+            logger.warning("Ignoring malformed pubsub message %r", item)
+
+
+@cache
+def broker():
+    """The process's broker, built from PUBSUB_BACKEND on first use"""
+    return import_string(BACKEND)(LOCATION)
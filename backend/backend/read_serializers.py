@@ -0,0 +1,174 @@
+"""
+Read-only serialization straight from database rows.
+
+A DRF ModelSerializer builds a model instance for every row and runs
+each field through its descriptor and to_representation(), which for
+long listings costs more than the query. A ReadSerializer asks the
+queryset for .values_list() tuples instead and turns each into the dict
+the matching ModelSerializer would return. Its mapper is compiled once
+per class: the field names, and the converter of the few field types
+that are not already JSON values (dates, times, decimals, files), are
+resolved up front, so a row costs one zip and the conversions it needs.
+
+Output matches ModelSerializer with REST framework's default settings:
+ISO 8601 dates and times in the current time zone with "Z" for UTC,
+decimals as strings, related objects as primary keys and files as URLs.
+Many-to-many fields are not supported.
+
+Kept free of REST framework so that views using it do not load it.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+
+# Rows fetched from the database cursor, and rows sent per piece of a
+# streamed response
+STREAM_CHUNK_SIZE = 2000
+
+
+def _datetime(zone):
+    if zone is None:
+        return _isoformat
+
+    def convert(value):
+        value = value.astimezone(zone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _decimal(value):
+    return f"{value:f}"
+
+
+def _file_url(storage):
+    return lambda name: storage.url(name) if name else None
+
+
+def _converter(field, zone):
+    """
+    Function turning a stored value of field into its JSON value, if
+    needed; datetimes are shown in zone
+    """
+    if isinstance(field, models.DateTimeField):
+        return _datetime(zone)
+    if isinstance(field, (models.DateField, models.TimeField)):
+        return _isoformat
+    if isinstance(field, models.DecimalField):
+        return _decimal
+    if isinstance(field, models.FileField):
+        return _file_url(field.storage or default_storage)
+    return None
+
+
+def compile_mapper(names, converters):
+    """
+    Return a function turning a values_list() tuple into a dict keyed by
+    names, passing the values at the positions of converters through
+    them. None stays None, as in REST framework.
+    """
+    conversions = [
+        (position, name, convert)
+        for position, (name, convert) in enumerate(zip(names, converters))
+        if convert is not None
+    ]
+    if not conversions:
+        return lambda row: dict(zip(names, row))
+
+    def map_row(row):
+        item = dict(zip(names, row))
+        for position, name, convert in conversions:
+            value = row[position]
+            if value is not None:
+                item[name] = convert(value)
+        return item
+
+    return map_row
+
+
+class ReadSerializer:
+    """
+    Serializes querysets of model with the given fields, in output
+    order. Subclasses declare model and fields like a ModelSerializer's
+    Meta; pass request to get absolute file URLs, as with its context.
+    """
+
+    model = None
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.model_fields = [cls.model._meta.get_field(name) for name in cls.fields]
+        cls.file_fields = [
+            field.name
+            for field in cls.model_fields
+            if isinstance(field, models.FileField)
+        ]
+        # One mapper per time zone datetimes are shown in
+        cls.mappers = {}
+
+    @classmethod
+    def mapper(cls):
+        """
+        The row mapper for the current time zone, which is looked up
+        once per call rather than once per value
+        """
+        zone = timezone.get_current_timezone() if settings.USE_TZ else None
+        try:
+            return cls.mappers[zone]
+        except KeyError:
+            converters = [_converter(field, zone) for field in cls.model_fields]
+            return cls.mappers.setdefault(zone, compile_mapper(cls.fields, converters))
+
+    def __init__(self, request=None):
+        self.request = request
+
+    def rows(self, queryset, chunk_size=None):
+        """Yield the serialized rows of queryset"""
+        map_row = self.mapper()
+        values = queryset.values_list(*self.fields)
+        if chunk_size:
+            values = values.iterator(chunk_size=chunk_size)
+        if not (self.request and self.file_fields):
+            yield from map(map_row, values)
+            return
+        absolute = self.request.build_absolute_uri
+        for row in values:
+            item = map_row(row)
+            for name in self.file_fields:
+                if item[name] is not None:
+                    item[name] = absolute(item[name])
+            yield item
+
+    def many(self, queryset):
+        """Serialized rows of queryset, as a list"""
+        return list(self.rows(queryset))
+
+    def stream(self, queryset, key, envelope=None):
+        """
+        Yield the JSON of envelope with the serialized rows of queryset
+        under key, in pieces, so that a large page is never held in
+        memory whole. Joined, the pieces equal json.dumps() of the page.
+        """
+        head = json.dumps({**(envelope or {}), key: []})
+        # Drop the closing "]}" of the empty list
+        yield head[:-2].encode()
+        pieces, separator = [], ""
+        for item in self.rows(queryset, chunk_size=STREAM_CHUNK_SIZE):
+            pieces.append(json.dumps(item))
+            if len(pieces) == STREAM_CHUNK_SIZE:
+                yield (separator + ", ".join(pieces)).encode()
+                pieces, separator = [], ", "
+        if pieces:
+            yield (separator + ", ".join(pieces)).encode()
+        yield b"]}"
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,20 +44,25 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # Trigram search lookups
     "accounts.apps.AccountsConfig",  # Add accounts app
     "blog.apps.BlogConfig",
     "bookings.apps.BookingsConfig",
+    "newsletter.apps.NewsletterConfig",
     "rest_framework",  # Add REST framework support
     "corsheaders",  # Add CORS support
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "backend.instrumentation.RequestInstrumentationMiddleware",  # Latency and SQL
     "corsheaders.middleware.CorsMiddleware",  # Add CORS middleware
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "backend.db_routers.ReplicaPinningMiddleware",  # Read-your-writes pinning
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.middleware.ClientMiddleware",  # Adds request.client
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -92,9 +99,67 @@ DATABASES = {
         "PASSWORD": "",
         "HOST": "localhost",
         "PORT": "5432",
+        "CONN_MAX_AGE": 60,  # Keep connections open between requests
+        "CONN_HEALTH_CHECKS": True,  # ...and check them before reuse
     }
 }
 
+# Read replicas, e.g. DATABASE_REPLICA_HOSTS=replica1.internal,replica2.internal
+# Reads are routed to them by backend.db_routers; tests mirror them to default.
+for index, host in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICA_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["backend.db_routers.PrimaryReplicaRouter"]
+
+# Seconds a client keeps reading from the primary after it wrote
+DATABASE_PIN_SECONDS = 5
+
+
+# Shared (L2) cache behind the per-process LRU in backend.cache. Files
+# are enough locally; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# memcached in production, e.g. django.core.cache.backends.redis.RedisCache
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+    }
+}
+
+# Entries kept per process, and seconds they (and namespace versions) are
+# trusted before L2 is asked again
+TIERED_CACHE_L1_ENTRIES = 2048
+TIERED_CACHE_L1_TIMEOUT = 5
+
+
+# Saved TF-IDF index read by the related-posts worker
+RELATED_POSTS_INDEX_PATH = BASE_DIR / ".related" / "index.npz"
+
+
+# Request instrumentation: share of requests whose SQL is recorded, and how
+# often one statement may repeat in a request before it is flagged as N+1
+METRICS_SAMPLE_RATE = 0.1
+METRICS_N_PLUS_ONE_THRESHOLD = 5
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "backend.instrumentation": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -132,6 +197,17 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Uploaded files, such as blog images
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
+# Blog images uploaded in pieces wait here until complete; keep it on the
+# same file system as MEDIA_ROOT so that storing one is a rename
+BLOG_UPLOAD_TEMP_DIR = BASE_DIR / "uploads"
+
+# Largest blog image accepted, in bytes
+BLOG_IMAGE_MAX_BYTES = 50 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -142,6 +218,13 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"  # For developm
 DEFAULT_FROM_EMAIL = "noreply@loissherbs.com"
 HERBALIST_EMAIL = "your.email@example.com"  # Replace with actual email
 
+# Public address of the frontend, used for links in emails
+SITE_URL = "http://localhost:5173"
+
+# Newsletter fan-out: emails per SMTP batch and seconds to wait between batches
+NEWSLETTER_BATCH_SIZE = 100
+NEWSLETTER_BATCH_PAUSE = 1.0
+
 # For production, you'll want to use these settings instead:
 # EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # EMAIL_HOST = 'smtp.gmail.com'  # Or your email provider's SMTP server
@@ -165,6 +248,31 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        "accounts.authentication.SignedTokenAuthentication",
     ],
 }
+
+# API tokens: signed access tokens are checked without a database query,
+# refresh tokens are stored hashed and rotated on use
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=5)
+REFRESH_TOKEN_LIFETIME = timedelta(days=14)
+
+# Threads used by the async registration API to validate and hash passwords
+REGISTRATION_WORKERS = 4
+
+# Threads sending booking emails after the booking is committed
+NOTIFICATION_WORKERS = 2
+
+# Threads, and so database connections, per process serving the queries
+# of the async booking API
+ASYNC_DATABASE_WORKERS = 8
+
+# Live availability streams: "backend.pubsub.LocalBroker" serves one ASGI
+# process; with several, use "backend.pubsub.RedisBroker" and set
+# PUBSUB_LOCATION to the Redis URL
+PUBSUB_BACKEND = os.environ.get("PUBSUB_BACKEND", "backend.pubsub.LocalBroker")
+PUBSUB_LOCATION = os.environ.get("PUBSUB_LOCATION")
+
+# Summed import time, in ms, a worker may spend before serving its first
+# request; checked by the startup test and manage.py profile_startup
+STARTUP_IMPORT_BUDGET_MS = 400
@@ -0,0 +1,101 @@
+"""
+Sitemap index and shards for the public site.
+
+The index lists one shard per SHARD_SIZE range of blog post ids plus a
+services section. Each section is streamed straight from a chunked query
+and the rendered bytes are cached per section version, so a change to one
+post only regenerates the shard that contains it.
+"""
+
+from uuid import uuid4
+
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.html import escape
+
+from blog import sitemaps as blog_sitemaps
+from bookings import sitemaps as booking_sitemaps
+
+from .cache import namespace
+
+sitemap_cache = namespace("sitemap")
+
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def _version_key(section):
+    return f"version:{section}"
+
+
+def section_version(section):
+    """Return the current version token of a sitemap section"""
+    return sitemap_cache.get_or_set(_version_key(section), lambda: uuid4().hex, None)
+
+
+def invalidate_section(*sections):
+    """Drop the cached bodies of the given sections"""
+    sitemap_cache.delete_many([_version_key(section) for section in sections])
+
+
+def _lastmod(value):
+    return f"<lastmod>{value.isoformat()}</lastmod>" if value else ""
+
+
+def _cached_stream(request, section, chunks):
+    """
+    Stream XML chunks to the client, caching the full body once the
+    generator is exhausted. A cached body is returned as-is.
+    """
+    cache_key = f"body:{section}:{section_version(section)}:{request.get_host()}"
+    body = sitemap_cache.get(cache_key)
+    if body is not None:
+        return HttpResponse(body, content_type="application/xml")
+
+    def stream():
+        parts = []
+        for chunk in chunks:
+            chunk = chunk.encode()
+            parts.append(chunk)
+            yield chunk
+        sitemap_cache.set(cache_key, b"".join(parts), SITEMAP_CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(stream(), content_type="application/xml")
+
+
+def _urlset(request, entries):
+    yield f'{XML_HEADER}<urlset xmlns="{SITEMAP_NS}">\n'
+    for path, lastmod in entries:
+        loc = escape(request.build_absolute_uri(path))
+        yield f"<url><loc>{loc}</loc>{_lastmod(lastmod)}</url>\n"
+    yield "</urlset>\n"
+
+
+def _index(request):
+    yield f'{XML_HEADER}<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    loc = escape(request.build_absolute_uri("/sitemap-services.xml"))
+    yield f"<sitemap><loc>{loc}</loc></sitemap>\n"
+    for shard, lastmod in sorted(blog_sitemaps.get_shard_lastmods().items()):
+        loc = escape(request.build_absolute_uri(f"/sitemap-blog-{shard}.xml"))
+        yield f"<sitemap><loc>{loc}</loc>{_lastmod(lastmod)}</sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def sitemap_index(request):
+    """Sitemap index listing every shard with its lastmod"""
+    return _cached_stream(request, "index", _index(request))
+
+
+def blog_sitemap(request, shard):
+    """One shard of published blog posts"""
+    if shard not in blog_sitemaps.get_shard_lastmods():
+        raise Http404("No such sitemap shard")
+    entries = blog_sitemaps.shard_entries(shard)
+    return _cached_stream(request, f"blog-{shard}", _urlset(request, entries))
+
+
+def services_sitemap(request):
+    """Active services"""
+    entries = booking_sitemaps.service_entries()
+    return _cached_stream(request, "services", _urlset(request, entries))
@@ -0,0 +1,463 @@
+import asyncio
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.signing import get_cookie_signer
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from accounts.tokens import issue_access_token
+from bookings.management.commands.profile_startup import (
+    IMPORT_BUDGET_MS,
+    LAZY_MODULES,
+    import_ms,
+    profile_startup,
+    startup_imports,
+)
+
+from . import cache, db_routers, db_threads, instrumentation, pubsub
+from .cache import Namespace
+from .conditional import conditional
+from .db_routers import (
+    PIN_COOKIE,
+    PRIMARY,
+    PrimaryReplicaRouter,
+    ReplicaPinningMiddleware,
+    replica_reads,
+)
+from .instrumentation import MetricsRegistry, RequestInstrumentationMiddleware
+
+MODIFIED = datetime(2026, 3, 14, 9, 30, tzinfo=timezone.utc)
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class ConditionalTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.calls = []
+
+        def probe(request):
+            return "v1", MODIFIED
+
+        @conditional(probe)
+        def view(request):
+            self.calls.append(request.method)
+            return HttpResponse("body")
+
+        self.view = view
+
+    def etag(self):
+        return self.view(self.factory.get("/"))["ETag"]
+
+    def test_first_response_carries_validators(self):
+        response = self.view(self.factory.get("/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertEqual(response["Last-Modified"], "Sat, 14 Mar 2026 09:30:00 GMT")
+
+    def test_matching_etag_skips_the_view(self):
+        etag = self.etag()
+        self.calls.clear()
+        response = self.view(self.factory.get("/", HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.calls, [])
+
+    def test_stale_etag_runs_the_view(self):
+        response = self.view(self.factory.get("/", HTTP_IF_NONE_MATCH='"stale"'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, ["GET"])
+
+    def test_if_modified_since(self):
+        request = self.factory.get(
+            "/", HTTP_IF_MODIFIED_SINCE="Sat, 14 Mar 2026 09:30:00 GMT"
+        )
+        self.assertEqual(self.view(request).status_code, 304)
+        request = self.factory.get(
+            "/", HTTP_IF_MODIFIED_SINCE="Fri, 13 Mar 2026 09:30:00 GMT"
+        )
+        self.assertEqual(self.view(request).status_code, 200)
+
+    def test_unsafe_methods_skip_the_probe(self):
+        probe = mock.Mock(return_value=("v1", None))
+        view = conditional(probe)(lambda request: HttpResponse(status=201))
+        response = view(self.factory.post("/", HTTP_IF_NONE_MATCH=self.etag()))
+        self.assertEqual(response.status_code, 201)
+        probe.assert_not_called()
+
+    def test_private_responses_vary_on_credentials(self):
+        view = conditional(lambda request: ("v1", None), private=True)(
+            lambda request: HttpResponse("mine")
+        )
+        response = view(self.factory.get("/"))
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Authorization", response["Vary"])
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_async_view_with_sync_probe(self):
+        @conditional(lambda request: ("v1", None))
+        async def view(request):
+            self.calls.append(request.method)
+            return HttpResponse("body")
+
+        first = asyncio.run(view(self.factory.get("/")))
+        request = self.factory.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(asyncio.run(view(request)).status_code, 304)
+        self.assertEqual(self.calls, ["GET"])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+@mock.patch.object(db_routers, "replica_is_healthy", return_value=True)
+class RouterTests(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def atomic_block(self, active):
+        """TestCase runs each test in a transaction, which pins reads"""
+        return mock.patch.object(
+            transaction.get_connection(), "in_atomic_block", active
+        )
+
+    def route(self, request, model=User):
+        """Run a request through the middleware; return where a read went"""
+        seen = {}
+
+        def view(request):
+            seen["read"] = self.router.db_for_read(model)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return seen["read"], response
+
+    def test_outside_a_request_reads_use_the_primary(self, healthy):
+        self.assertEqual(self.router.db_for_read(User), PRIMARY)
+
+    def test_replica_reads_opt_in(self, healthy):
+        with replica_reads(), self.atomic_block(False):
+            self.assertEqual(self.router.db_for_read(User), "replica1")
+
+    def test_reads_in_a_transaction_use_the_primary(self, healthy):
+        with replica_reads(), self.atomic_block(True):
+            self.assertEqual(self.router.db_for_read(User), PRIMARY)
+
+    def test_primary_only_apps(self, healthy):
+        with replica_reads(), self.atomic_block(False):
+            self.assertEqual(self.router.db_for_read(Session), PRIMARY)
+
+    def test_unhealthy_replica_falls_back(self, healthy):
+        healthy.return_value = False
+        with replica_reads(), self.atomic_block(False):
+            self.assertEqual(self.router.db_for_read(User), PRIMARY)
+
+    def test_get_reads_from_a_replica(self, healthy):
+        with self.atomic_block(False):
+            read, response = self.route(self.factory.get("/"))
+        self.assertEqual(read, "replica1")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_unsafe_request_is_pinned(self, healthy):
+        with self.atomic_block(False):
+            read, response = self.route(self.factory.post("/"))
+        self.assertEqual(read, PRIMARY)
+
+    def test_write_sets_a_signed_pin_cookie(self, healthy):
+        def view(request):
+            self.router.db_for_write(User)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(self.factory.post("/"))
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertNotEqual(cookie.value, "1")
+        self.assertEqual(cookie["max-age"], db_routers.PIN_SECONDS)
+
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        with self.atomic_block(False):
+            read, _ = self.route(request)
+        self.assertEqual(read, PRIMARY)
+
+    def test_forged_pin_cookie_is_ignored(self, healthy):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        with self.atomic_block(False):
+            read, _ = self.route(request)
+        self.assertEqual(read, "replica1")
+
+    def test_expired_pin_cookie_is_ignored(self, healthy):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = get_cookie_signer(
+            salt=PIN_COOKIE + db_routers.PIN_COOKIE_SALT
+        ).sign("1")
+        later = time.time() + db_routers.PIN_SECONDS + 1
+        with mock.patch("django.core.signing.time.time", return_value=later):
+            with self.atomic_block(False):
+                read, _ = self.route(request)
+        self.assertEqual(read, "replica1")
+
+
+class StartupTests(SimpleTestCase):
+    """A worker boots without the modules only some requests need"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.imports = startup_imports(profile_startup())
+
+    def test_heavy_modules_load_lazily(self):
+        loaded = {module for module, _, _ in self.imports}
+        self.assertEqual([m for m in LAZY_MODULES if m in loaded], [])
+
+    def test_import_time_within_budget(self):
+        self.assertLess(import_ms(self.imports), IMPORT_BUDGET_MS)
+
+
+class LocalBrokerTests(SimpleTestCase):
+    async def test_messages_reach_subscribers_of_their_channel(self):
+        broker = pubsub.LocalBroker()
+        async with broker.subscribe(["a", "b"]) as subscription:
+            # Published from another thread, as signal handlers do
+            await asyncio.to_thread(broker.publish, "a", {"n": 1})
+            await asyncio.to_thread(broker.publish, "c", {"n": 2})
+            broker.publish("b", {"n": 3})
+            self.assertEqual(await subscription.get(), {"n": 1})
+            self.assertEqual(await subscription.get(), {"n": 3})
+            self.assertEqual(subscription.drain(), [])
+        self.assertEqual(dict(broker._subscribers), {})
+
+    async def test_slow_subscriber_gets_overflow(self):
+        broker = pubsub.LocalBroker()
+        with mock.patch.object(pubsub, "SUBSCRIBER_BUFFER", 2):
+            async with broker.subscribe(["a"]) as subscription:
+                for number in range(3):
+                    broker.publish("a", {"n": number})
+                await asyncio.sleep(0)
+                broker.publish("a", {"n": 3})
+                await asyncio.sleep(0)
+                self.assertEqual(subscription.drain(), [pubsub.OVERFLOW, {"n": 3}])
+
+
+class DatabaseThreadTests(SimpleTestCase):
+    async def test_saturated_pool_queues_without_deadlock(self):
+        running, peak = 0, 0
+        lock = threading.Lock()
+        request_id = contextvars.ContextVar("request_id")
+
+        def query(number):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return number, request_id.get()
+
+        async def request(number):
+            request_id.set(number)
+            return await db_threads.run_in_db_thread(query, number)
+
+        executor = ThreadPoolExecutor(2)
+        self.addCleanup(executor.shutdown)
+        with mock.patch.object(db_threads, "_executor", executor):
+            results = await asyncio.wait_for(
+                asyncio.gather(*(request(number) for number in range(10))), 5
+            )
+        # Each call ran in its caller's context, two at a time at most
+        self.assertEqual(results, [(number, number) for number in range(10)])
+        self.assertEqual(peak, 2)
+
+
+class InstrumentationTests(TestCase):
+    route = "sitemap-services.xml"
+
+    def setUp(self):
+        patcher = mock.patch.object(instrumentation, "registry", MetricsRegistry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sample(self, rate):
+        return mock.patch.object(instrumentation, "SAMPLE_RATE", rate)
+
+    def count(self, metric, route=None):
+        histogram = self.registry.histograms.get((metric, route or self.route))
+        return histogram.count if histogram else 0
+
+    def test_every_request_is_timed(self):
+        with self.sample(0):
+            response = self.client.get(f"/{self.route}")
+            self.client.get(f"/{self.route}")
+        self.assertRegex(response["Server-Timing"], r"^app;dur=\d+\.\d$")
+        self.assertEqual(self.count("http_request_duration_seconds"), 2)
+        self.assertEqual(self.count("db_queries_per_request"), 0)
+
+    def test_sampled_requests_record_their_sql(self):
+        with self.sample(1), self.assertLogs("backend.instrumentation", "INFO") as logs:
+            response = self.client.get(f"/{self.route}")
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=\d+\.\d;desc="\d+ queries", app;dur=\d+\.\d$',
+        )
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["route"], record["status"]), (self.route, 200))
+        self.assertEqual(self.count("db_queries_per_request"), 1)
+        self.assertEqual(self.count("db_time_seconds"), 1)
+
+    def test_repeated_statements_are_reported(self):
+        def view(request):
+            for _ in range(instrumentation.N_PLUS_ONE_THRESHOLD):
+                User.objects.filter(pk=1).exists()
+            return HttpResponse()
+
+        connection.ensure_connection()
+        middleware = RequestInstrumentationMiddleware(view)
+        with self.sample(1), self.assertLogs("backend.instrumentation") as logs:
+            middleware(RequestFactory().get("/"))
+        self.assertEqual(logs.records[0].levelname, "WARNING")
+        self.assertIn("repeated_queries", json.loads(logs.records[0].getMessage()))
+        self.assertEqual(self.registry.n_plus_one["unmatched"], 1)
+
+    def test_metrics_are_for_staff_only(self):
+        with self.sample(0):
+            self.client.get(f"/{self.route}")
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+            member = User.objects.create_user("ines")
+            token = issue_access_token(member)
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.assertEqual(response.status_code, 403)
+            self.client.force_login(member)
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+            staff = User.objects.create_user("lois", is_staff=True)
+            token = issue_access_token(staff)
+            self.client.logout()
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(
+                f'http_request_duration_seconds_count{{route="{self.route}"}} 1\n',
+                response.content.decode(),
+            )
+            self.client.force_login(staff)
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        cache.local.clear()
+        self.addCleanup(cache.local.clear)
+        self.namespace = Namespace("tests")
+        self.computed = []
+
+    def compute(self, value="fresh", pause=0):
+        def compute():
+            time.sleep(pause)
+            self.computed.append(value)
+            return value
+
+        return compute
+
+    def hold_fill(self, key):
+        """Take key's fill lock, as another process computing it would"""
+        lock_key = f"{self.namespace.make_key(key)}:lock"
+        caches["default"].add(lock_key, 1, cache.LOCK_TIMEOUT)
+
+    def same_stripe(self, key):
+        stripe = hash(self.namespace.make_key(key)) % len(cache._compute_locks)
+        return next(
+            other
+            for other in (f"key{number}" for number in range(10_000))
+            if hash(self.namespace.make_key(other)) % len(cache._compute_locks)
+            == stripe
+        )
+
+    def test_concurrent_fills_compute_once(self):
+        compute = self.compute(pause=0.1)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(
+                    lambda _: self.namespace.get_or_set("key", compute), range(8)
+                )
+            )
+        self.assertEqual(results, ["fresh"] * 8)
+        self.assertEqual(self.computed, ["fresh"])
+
+    def test_async_fills_compute_once(self):
+        compute = self.compute(pause=0.1)
+
+        async def fill():
+            return await asyncio.gather(
+                *[self.namespace.aget_or_set("key", compute) for _ in range(4)]
+            )
+
+        self.assertEqual(asyncio.run(fill()), ["fresh"] * 4)
+        self.assertEqual(asyncio.run(fill()), ["fresh"] * 4)
+        self.assertEqual(self.computed, ["fresh"])
+
+    def test_waits_for_another_processs_fill(self):
+        self.hold_fill("key")
+        full_key = self.namespace.make_key("key")
+        timer = threading.Timer(0.1, caches["default"].set, (full_key, "theirs"))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(self.namespace.get_or_set("key", self.compute()), "theirs")
+        self.assertEqual(self.computed, [])
+
+    def test_rechecks_l2_after_the_stripe_lock(self):
+        # Another process stores the value while this one waits its turn
+        stripe = cache._compute_locks[
+            hash(self.namespace.make_key("key")) % len(cache._compute_locks)
+        ]
+        with ThreadPoolExecutor(1) as executor:
+            with stripe:
+                future = executor.submit(
+                    self.namespace.get_or_set, "key", self.compute()
+                )
+                time.sleep(0.1)
+                caches["default"].set(self.namespace.make_key("key"), "theirs")
+            self.assertEqual(future.result(), "theirs")
+        self.assertEqual(self.computed, [])
+
+    @mock.patch.object(cache, "LOCK_TIMEOUT", 0.5)
+    @mock.patch.object(cache, "LOCK_POLL_INTERVAL", 0.01)
+    def test_dead_fill_holder_times_out(self):
+        self.hold_fill("key")
+        other = self.same_stripe("key")
+        with ThreadPoolExecutor(1) as executor:
+            started = time.monotonic()
+            waiting = executor.submit(self.namespace.get_or_set, "key", self.compute())
+            time.sleep(0.05)
+            # The waiter does not hold up other keys of its stripe
+            self.assertEqual(
+                self.namespace.get_or_set(other, self.compute("other")), "other"
+            )
+            self.assertLess(time.monotonic() - started, 0.4)
+            self.assertEqual(waiting.result(), "fresh")
+        self.assertGreaterEqual(time.monotonic() - started, 0.5)
+        self.assertEqual(self.computed, ["other", "fresh"])
+
+    def test_invalidate_hides_old_entries(self):
+        self.namespace.set("key", "old")
+        self.assertEqual(self.namespace.get("key"), "old")
+        self.namespace.invalidate()
+        self.assertIsNone(self.namespace.get("key"))
+        self.assertEqual(self.namespace.get_or_set("key", self.compute()), "fresh")
+
+        # Another process reads the new version from L2
+        cache.local.clear()
+        elsewhere = Namespace("tests")
+        self.namespace.invalidate()
+        self.assertIsNone(elsewhere.get("key"))
+        self.assertEqual(elsewhere.get_or_set("key", self.compute("new")), "new")
@@ -15,9 +15,28 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+
+from . import instrumentation, sitemaps
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-]
+    path("api/auth/", include("accounts.urls")),
+    path("blog/", include("blog.urls")),
+    path("", include("bookings.urls")),
+    path("metrics", instrumentation.metrics_view, name="metrics"),
+    path("sitemap.xml", sitemaps.sitemap_index, name="sitemap"),
+    path(
+        "sitemap-blog-<int:shard>.xml",
+        sitemaps.blog_sitemap,
+        name="sitemap_blog",
+    ),
+    path(
+        "sitemap-services.xml",
+        sitemaps.services_sitemap,
+        name="sitemap_services",
+    ),
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BlogPost
+from .models import BlogPost, ImageUpload
 
 
 @admin.register(BlogPost)
@@ -10,3 +10,14 @@ class BlogPostAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
     date_hierarchy = "created_date"
     ordering = ("-created_date",)
+
+
+@admin.register(ImageUpload)
+class ImageUploadAdmin(admin.ModelAdmin):
+    """Featured images being uploaded through blog/uploads/"""
+
+    list_display = ("filename", "post", "owner", "received", "size", "updated_at")
+    readonly_fields = [field.name for field in ImageUpload._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
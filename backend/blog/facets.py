@@ -0,0 +1,37 @@
+from backend.cache import namespace
+
+from .models import BlogFacetCount, BlogPost
+
+blog_cache = namespace("blog")
+
+FACETS_CACHE_KEY = "facets"
+
+
+def get_facet_counts():
+    """
+    Return published post counts per category and per archive month.
+    Read from the counter table on a cold cache, then served from cache
+    until a post is published, unpublished, edited or deleted.
+    """
+    return blog_cache.get_or_set(FACETS_CACHE_KEY, _count_facets, None)
+
+
+def _count_facets():
+    facets = {
+        "categories": {key: 0 for key, label in BlogPost.CATEGORIES},
+        "months": {},
+    }
+    counters = BlogFacetCount.objects.filter(count__gt=0).values_list(
+        "kind", "key", "count"
+    )
+    for kind, key, count in counters:
+        if kind == "category":
+            facets["categories"][key] = count
+        else:
+            facets["months"][key] = count
+    facets["months"] = dict(sorted(facets["months"].items(), reverse=True))
+    return facets
+
+
+def invalidate_facets():
+    blog_cache.delete(FACETS_CACHE_KEY)
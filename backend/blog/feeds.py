@@ -0,0 +1,161 @@
+from datetime import datetime, time, timezone as dt_timezone
+from uuid import uuid4
+
+from django.contrib.syndication.views import Feed
+from django.db.models import F, Max
+from django.db.models.functions import Substr
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from backend.cache import namespace
+from backend.conditional import conditional
+
+from .models import BlogPost
+
+blog_cache = namespace("blog")
+
+# Number of posts included in each feed
+FEED_ITEMS = 20
+
+# Characters of content loaded for each item description
+FEED_SUMMARY_LENGTH = 500
+
+# Rendered feeds are keyed by freshness version, so stale ones just expire
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+FRESHNESS_CACHE_KEY = "feed:freshness"
+
+CATEGORY_LABELS = dict(BlogPost.CATEGORIES)
+
+
+def get_feed_freshness():
+    """
+    Return the cached version and last modification time of published posts.
+    Only a cold cache touches the database; publishing or editing a post
+    replaces the entry through invalidate_feeds().
+    """
+    return blog_cache.get_or_set(FRESHNESS_CACHE_KEY, _load_freshness, None)
+
+
+def _load_freshness():
+    last_modified = BlogPost.objects.filter(status="published").aggregate(
+        last=Max("updated_at")
+    )["last"]
+    return {
+        "version": uuid4().hex,
+        "last_modified": last_modified or datetime(2000, 1, 1, tzinfo=dt_timezone.utc),
+    }
+
+
+def invalidate_feeds():
+    """Start a new feed version after a post is published, edited or removed"""
+    blog_cache.set(
+        FRESHNESS_CACHE_KEY,
+        {"version": uuid4().hex, "last_modified": timezone.now()},
+        None,
+    )
+
+
+class LatestPostsFeed(Feed):
+    """RSS feed of the latest published posts, optionally for one category"""
+
+    description = "Herbal medicine articles and wellness insights."
+
+    def get_object(self, request, category=None):
+        if category is not None and category not in CATEGORY_LABELS:
+            raise Http404("Unknown category")
+        return category
+
+    def title(self, category):
+        if category:
+            return f"Lois's Herbs: {CATEGORY_LABELS[category]}"
+        return "Lois's Herbs"
+
+    def link(self, category):
+        return f"/blog/category/{category}/" if category else "/blog/"
+
+    def items(self, category):
+        """Load only the columns the feed renders, with a truncated body"""
+        posts = (
+            BlogPost.objects.filter(status="published")
+            .only("title", "slug", "categories", "published_date", "updated_at")
+            .annotate(summary=Substr("content", 1, FEED_SUMMARY_LENGTH))
+            .order_by(F("published_date").desc(nulls_last=True), "-id")
+        )
+        if category:
+            posts = posts.filter(categories=category)
+        return posts[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(item.summary).words(60)
+
+    def item_link(self, item):
+        return item.get_absolute_url()
+
+    def item_pubdate(self, item):
+        # The admin can publish a post without a date; use its last edit
+        if item.published_date is None:
+            return item.updated_at
+        return datetime.combine(item.published_date, time.min, tzinfo=dt_timezone.utc)
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return [item.get_categories_display()]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    """Atom version of the latest posts feed"""
+
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description
+
+
+def _request_freshness(request):
+    """
+    get_feed_freshness(), read once per request so that the ETag and the
+    rendered feed always belong to the same version
+    """
+    if not hasattr(request, "_feed_freshness"):
+        request._feed_freshness = get_feed_freshness()
+    return request._feed_freshness
+
+
+def _feed_freshness(request, category=None, feed=None):
+    if category is not None and category not in CATEGORY_LABELS:
+        raise Http404("Unknown category")
+    freshness = _request_freshness(request)
+    return (
+        f"{freshness['version']}-{feed}-{category or 'all'}",
+        freshness["last_modified"],
+    )
+
+
+FEEDS = {"rss": LatestPostsFeed(), "atom": LatestPostsAtomFeed()}
+
+
+@conditional(_feed_freshness)
+def feed_view(request, category=None, feed="rss"):
+    """
+    Serve a feed from cache.
+    Conditional requests are answered from the cached freshness entry
+    before any query runs; a changed feed is rendered once per version.
+    """
+    version = _request_freshness(request)["version"]
+
+    def render():
+        response = FEEDS[feed](request, category=category)
+        return response.content, response["Content-Type"]
+
+    content, content_type = blog_cache.get_or_set(
+        f"feed:{feed}:{category or 'all'}:{version}", render, FEED_CACHE_TIMEOUT
+    )
+    return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,30 @@
+"""
+Freshness probes for conditional GETs of blog reads. Both answer from
+the cache: the feed freshness entry changes whenever a published post
+does, and the related-posts version whenever the index is rewritten.
+"""
+
+from uuid import uuid4
+
+from backend.cache import namespace
+
+from .feeds import get_feed_freshness
+
+blog_cache = namespace("blog")
+
+RELATED_VERSION_KEY = "related:version"
+
+
+def invalidate_related():
+    blog_cache.delete(RELATED_VERSION_KEY)
+
+
+def posts_freshness(request, *args, **kwargs):
+    freshness = get_feed_freshness()
+    return freshness["version"], freshness["last_modified"]
+
+
+def related_freshness(request, slug):
+    version = blog_cache.get_or_set(RELATED_VERSION_KEY, lambda: uuid4().hex, None)
+    freshness = get_feed_freshness()
+    return f"{freshness['version']}:{version}:{slug}", freshness["last_modified"]
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.related_index import rebuild_index, refresh_posts
+
+
+class Command(BaseCommand):
+    help = "Build the TF-IDF related-posts index, fully or for a single post"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--post",
+            type=int,
+            help="Only refresh the entries affected by this post id",
+        )
+
+    def handle(self, *args, **options):
+        if options["post"]:
+            total = refresh_posts([options["post"]])
+        else:
+            total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Stored {total} related-post entries"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.facets import invalidate_facets
+from blog.models import BlogFacetCount
+
+
+class Command(BaseCommand):
+    help = "Recompute the blog category and archive month counters"
+
+    def handle(self, *args, **options):
+        total = BlogFacetCount.rebuild()
+        invalidate_facets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} facet counters"))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.related_index import process_queue
+
+
+class Command(BaseCommand):
+    help = "Refresh related-post lists for posts queued by recent edits"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=30.0,
+            help="Seconds to wait between checks for queued posts",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_queue()
+            if handled:
+                self.stdout.write(f"Refreshed related posts for {handled} posts")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
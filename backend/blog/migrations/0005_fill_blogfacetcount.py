@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def fill_facet_counts(apps, schema_editor):
+    """Count the posts published before the counter table existed"""
+    BlogPost = apps.get_model("blog", "BlogPost")
+    BlogFacetCount = apps.get_model("blog", "BlogFacetCount")
+
+    published = BlogPost.objects.filter(status="published").order_by()
+    counters = [
+        BlogFacetCount(kind="category", key=row["categories"], count=row["total"])
+        for row in published.values("categories").annotate(total=Count("id"))
+    ]
+    counters += [
+        BlogFacetCount(
+            kind="month", key=row["month"].strftime("%Y-%m"), count=row["total"]
+        )
+        for row in published.exclude(published_date=None)
+        .annotate(month=TruncMonth("published_date"))
+        .values("month")
+        .annotate(total=Count("id"))
+    ]
+    BlogFacetCount.objects.all().delete()
+    BlogFacetCount.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_relatedpost"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_facet_counts, migrations.RunPython.noop),
+    ]
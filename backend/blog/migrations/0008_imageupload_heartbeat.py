@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_imageupload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="imageupload",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
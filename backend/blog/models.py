@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -9,6 +11,15 @@ class BlogPost(models.Model):
     Stores all information related to a single blog post.
     """
 
+    # Available categories, shared by the feeds and archive pages
+    CATEGORIES = [
+        ("herbs", "Herbal Medicine"),
+        ("wellness", "Wellness Tips"),
+        ("recipes", "Herbal Recipes"),
+        ("health", "Health Insights"),
+        ("treatments", "Treatment Information"),
+    ]
+
     # The main title of the blog post
     title = models.CharField(max_length=200)
 
@@ -39,6 +50,9 @@ class BlogPost(models.Model):
     # Can be empty (for drafts)
     published_date = models.DateField(blank=True, null=True)
 
+    # Timestamp of the last edit, used for feed and sitemap freshness
+    updated_at = models.DateTimeField(auto_now=True)
+
     # Current status of the post (draft or published)
     status = models.CharField(
         max_length=10,
@@ -47,24 +61,21 @@ class BlogPost(models.Model):
     )
 
     # Category of the blog post for organization
-    categories = models.CharField(
-        max_length=100,
-        choices=[
-            ("herbs", "Herbal Medicine"),
-            ("wellness", "Wellness Tips"),
-            ("recipes", "Herbal Recipes"),
-            ("health", "Health Insights"),
-            ("treatments", "Treatment Information"),
-        ],
-    )
+    categories = models.CharField(max_length=100, choices=CATEGORIES)
 
     class Meta:
         """
         Meta options for BlogPost model.
         Orders posts by published date (newest first)
+        Indexes the published listing used by feeds and archives
         """
 
         ordering = ["-published_date"]
+        indexes = [
+            models.Index(
+                fields=["status", "-published_date"], name="blog_status_pubdate_idx"
+            ),
+        ]
 
     def publish(self):
         """
@@ -77,9 +88,213 @@ class BlogPost(models.Model):
         self.status = "published"
         self.save()
 
+    def facet_keys(self):
+        """
+        Facet counters this post contributes to:
+        its category and publication month, only while published
+        """
+        return _facet_keys(self.status, self.categories, self.published_date)
+
+    def save(self, *args, **kwargs):
+        """
+        Save the post and move its facet counts in the same transaction.
+        Publishing, unpublishing, recategorising or re-dating a post
+        shifts one count from its old keys to its new ones.
+        """
+        with transaction.atomic():
+            previous = set()
+            # Read by the post_save signal to tell whether the post left
+            # the published set
+            self._was_published = False
+            if self.pk:
+                old = (
+                    BlogPost.objects.filter(pk=self.pk)
+                    .values("status", "categories", "published_date")
+                    .first()
+                )
+                if old:
+                    previous = _facet_keys(**old)
+                    self._was_published = old["status"] == "published"
+            super().save(*args, **kwargs)
+            BlogFacetCount.adjust(previous, self.facet_keys())
+
+    def get_absolute_url(self):
+        """
+        Path of the post on the public site
+        The React frontend renders posts by slug under /blog/
+        """
+        return f"/blog/{self.slug}/"
+
     def __str__(self):
         """
         String representation of the blog post
         Returns the title when the object is printed
         """
         return self.title
+
+
+def _facet_keys(status, categories, published_date):
+    if status != "published":
+        return set()
+    keys = {("category", categories)}
+    if published_date:
+        keys.add(("month", published_date.strftime("%Y-%m")))
+    return keys
+
+
+class BlogFacetCount(models.Model):
+    """
+    Number of published posts per category and per archive month.
+    Kept current by BlogPost.save() and the post delete signal so the
+    blog sidebar never has to group over all posts.
+    """
+
+    FACET_KINDS = [
+        ("category", "Category"),
+        ("month", "Archive month"),
+    ]
+
+    # Which facet this counter belongs to
+    kind = models.CharField(max_length=10, choices=FACET_KINDS)
+
+    # Category value or "YYYY-MM" month
+    key = models.CharField(max_length=100)
+
+    # Number of published posts with this facet value
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "key"], name="blog_facet_unique")
+        ]
+
+    @classmethod
+    def adjust(cls, removed, added):
+        """Decrement counters a post left and increment the ones it joined"""
+        for kind, key in removed - added:
+            cls.objects.filter(kind=kind, key=key).update(count=F("count") - 1)
+        for kind, key in added - removed:
+            counter, created = cls.objects.get_or_create(
+                kind=kind, key=key, defaults={"count": 1}
+            )
+            if not created:
+                cls.objects.filter(pk=counter.pk).update(count=F("count") + 1)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls):
+        """
+        Replace every counter with counts grouped over the published
+        posts; returns how many were written
+        """
+        published = BlogPost.objects.filter(status="published").order_by()
+        counters = [
+            cls(kind="category", key=row["categories"], count=row["total"])
+            for row in published.values("categories").annotate(total=Count("id"))
+        ]
+        counters += [
+            cls(kind="month", key=row["month"].strftime("%Y-%m"), count=row["total"])
+            for row in published.exclude(published_date=None)
+            .annotate(month=TruncMonth("published_date"))
+            .values("month")
+            .annotate(total=Count("id"))
+        ]
+        cls.objects.all().delete()
+        cls.objects.bulk_create(counters)
+        return len(counters)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.key}: {self.count}"
+
+
+class RelatedPost(models.Model):
+    """
+    Precomputed "related reading" for a published post.
+    Filled by blog.related_index from TF-IDF similarity so that showing related
+    posts is a single indexed lookup on (post, rank).
+    """
+
+    # The post the recommendation is shown on
+    post = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name="related_entries"
+    )
+
+    # The recommended post
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name="+")
+
+    # Cosine similarity between the two posts
+    score = models.FloatField()
+
+    # Position in the post's list, 0 being the most similar
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["post", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["post", "rank"], name="blog_related_rank")
+        ]
+
+    def __str__(self):
+        return f"{self.post} -> {self.related} ({self.score:.3f})"
+
+
+class RelatedPostUpdate(models.Model):
+    """
+    A post whose related-post lists need refreshing, queued by the save
+    and delete signals and drained by run_related_posts_worker. Not a
+    foreign key, so that deleted posts can still be removed from the lists.
+    """
+
+    # Id of the post that was saved or deleted
+    post_id = models.BigIntegerField()
+
+    # When the change was committed
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"Post {self.post_id} queued at {self.queued_at}"
+
+
+class ImageUpload(models.Model):
+    """
+    A featured image being uploaded in pieces by blog.uploads.
+    The bytes received so far wait in a temporary file named after the
+    token; the row goes once the image is stored on its post.
+    """
+
+    # Random id the client addresses the upload by
+    token = models.CharField(max_length=32, unique=True)
+
+    # Post whose featured image the upload becomes
+    post = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name="image_uploads"
+    )
+
+    # Staff user who started the upload
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+
+    # Name of the file on the client, for the admin
+    filename = models.CharField(max_length=255, blank=True)
+
+    # Total size the client announced, in bytes
+    size = models.BigIntegerField()
+
+    # Bytes stored so far; the next piece must start here
+    received = models.BigIntegerField(default=0)
+
+    # Hex SHA-256 the client expects the whole file to have, if given
+    sha256 = models.CharField(max_length=64, blank=True)
+
+    # Last sign of life from the request writing a piece, None when no
+    # request is; other requests are refused until it goes silent
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    # When the upload was started and last received data
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename or self.token}: {self.received}/{self.size} bytes"
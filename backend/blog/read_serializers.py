@@ -0,0 +1,25 @@
+"""
+Row-based read serializer for blog listings, giving the output of
+BlogPostSerializer without building model instances.
+"""
+
+from backend.read_serializers import ReadSerializer
+
+from .models import BlogPost
+
+
+class BlogPostReadSerializer(ReadSerializer):
+    model = BlogPost
+    fields = (
+        "id",
+        "title",
+        "slug",
+        "author",
+        "content",
+        "featured_image",
+        "created_date",
+        "published_date",
+        "updated_at",
+        "status",
+        "categories",
+    )
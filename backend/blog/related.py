@@ -0,0 +1,28 @@
+"""
+Related posts: the read path and the refresh queue.
+
+Lists are precomputed by blog.related_index, which needs NumPy; this
+module does not, so the page serving related posts and the save signals
+never load it.
+"""
+
+from .models import RelatedPost, RelatedPostUpdate
+
+# Number of related posts kept per post
+TOP_K = 5
+
+
+def get_related_posts(post, limit=TOP_K):
+    """Return up to `limit` related published posts, most similar first"""
+    return [
+        entry.related
+        for entry in RelatedPost.objects.filter(post=post, related__status="published")
+        .select_related("related")
+        .only("related", "related__title", "related__slug", "related__published_date")
+        .order_by("rank")[:limit]
+    ]
+
+
+def queue_refresh(pk):
+    """Ask the related-posts worker to refresh the lists a post affects"""
+    RelatedPostUpdate.objects.create(post_id=pk)
@@ -0,0 +1,286 @@
+"""
+Related-posts index built from TF-IDF vectors of published posts.
+
+A full rebuild vectorises the whole corpus into one L2-normalised
+float32 matrix, so cosine similarity is a plain matrix product.
+Neighbours are computed in row blocks to bound memory and stored in
+RelatedPost; pages then read them with one indexed query.
+
+The vocabulary, idf weights and matrix are saved to INDEX_PATH. When
+posts change, the worker vectorises only those posts with the saved
+vocabulary and idf, swaps their rows and finds the lists that may move
+with one matrix-vector product per post. Unpublished and deleted posts
+keep an all-zero row until the next full rebuild. New terms and idf
+drift are also left for the next full rebuild.
+"""
+
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .freshness import invalidate_related
+from .models import BlogPost, RelatedPost, RelatedPostUpdate
+from .related import TOP_K
+
+# Vocabulary size; the most widespread terms are kept
+MAX_FEATURES = 4096
+
+# Rows of the similarity matrix computed at once
+BLOCK_SIZE = 512
+
+INDEX_PATH = Path(
+    getattr(
+        settings,
+        "RELATED_POSTS_INDEX_PATH",
+        Path(settings.BASE_DIR) / ".related" / "index.npz",
+    )
+)
+
+TOKEN_RE = re.compile(r"[a-z]{3,}")
+
+STOP_WORDS = frozenset("""
+    about after also and any are because been before being between both but
+    can could did does doing down during each few for from further had has
+    have having her here hers herself him himself his how into its itself
+    just more most not now off once only other our ours out over own same
+    she should some such than that the their theirs them then there these
+    they this those through too under until very was were what when where
+    which while who whom why will with you your yours
+    """.split())
+
+
+def _tokens(text):
+    return [word for word in TOKEN_RE.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def _document(title, content):
+    # Titles are counted twice so they outweigh incidental body terms
+    return Counter(_tokens(f"{title} {title} {content}"))
+
+
+def load_corpus():
+    """Return (ids, token counts) for every published post, in id order"""
+    ids, documents = [], []
+    posts = (
+        BlogPost.objects.filter(status="published")
+        .order_by("id")
+        .values_list("id", "title", "content")
+    )
+    for pk, title, content in posts.iterator(chunk_size=500):
+        ids.append(pk)
+        documents.append(_document(title, content))
+    return ids, documents
+
+
+class TfidfIndex:
+    """Post ids, vocabulary, idf weights and the normalised TF-IDF matrix"""
+
+    def __init__(self, ids, terms, idf, matrix):
+        self.ids = list(ids)
+        self.terms = list(terms)
+        self.idf = idf
+        self.matrix = matrix
+        self.vocabulary = {term: column for column, term in enumerate(self.terms)}
+        self.position = {post_id: row for row, post_id in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, ids, documents):
+        """
+        Vectorise token counts into an (n_posts, n_terms) TF-IDF matrix.
+        Term frequency is log-scaled, idf is smoothed, rows are L2-normalised.
+        """
+        document_frequency = Counter()
+        for counts in documents:
+            document_frequency.update(counts.keys())
+        terms = [term for term, _ in document_frequency.most_common(MAX_FEATURES)]
+        frequencies = np.array(
+            [document_frequency[term] for term in terms], dtype=np.float32
+        )
+        idf = np.log((1.0 + len(documents)) / (1.0 + frequencies)) + 1.0
+        index = cls(ids, terms, idf, None)
+        index.matrix = np.zeros((len(documents), len(terms)), dtype=np.float32)
+        for row, counts in enumerate(documents):
+            index.matrix[row] = index.vectorise(counts)
+        return index
+
+    @classmethod
+    def load(cls, path=None):
+        with np.load(path or INDEX_PATH) as data:
+            return cls(data["ids"].tolist(), data["terms"], data["idf"], data["matrix"])
+
+    def save(self, path=None):
+        """Write the index next to the old one and swap it in atomically"""
+        path = path or INDEX_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial.npz")
+        np.savez(
+            partial,
+            ids=np.array(self.ids, dtype=np.int64),
+            terms=np.array(self.terms, dtype=str),
+            idf=self.idf,
+            matrix=self.matrix,
+        )
+        os.replace(partial, path)
+
+    def vectorise(self, counts):
+        """TF-IDF row for one document, using the index's vocabulary"""
+        vector = np.zeros(len(self.terms), dtype=np.float32)
+        for term, count in counts.items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = 1.0 + np.log(count)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def set_row(self, pk, vector):
+        """Replace a post's row, appending one for a post not yet indexed"""
+        row = self.position.get(pk)
+        if row is None:
+            row = len(self.ids)
+            self.ids.append(pk)
+            self.position[pk] = row
+            self.matrix = np.vstack([self.matrix, vector[np.newaxis]])
+        else:
+            self.matrix[row] = vector
+        return row
+
+
+def top_neighbours(matrix, rows, k=TOP_K):
+    """
+    Yield (row, neighbour_rows, scores) for the given rows.
+    Similarities are computed BLOCK_SIZE rows at a time and the top k are
+    picked with argpartition, so no full n x n matrix is ever built.
+    """
+    k = min(k, len(matrix) - 1)
+    if k <= 0:
+        return
+    rows = np.asarray(rows, dtype=np.int64)
+    for start in range(0, len(rows), BLOCK_SIZE):
+        block = rows[start : start + BLOCK_SIZE]
+        similarities = matrix[block] @ matrix.T
+        similarities[np.arange(len(block)), block] = -np.inf
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(similarities, candidates, axis=1)
+        order = np.argsort(-scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        for offset, row in enumerate(block.tolist()):
+            yield row, candidates[offset], scores[offset]
+
+
+def _entries(ids, neighbours):
+    entries = []
+    for row, columns, scores in neighbours:
+        entries += [
+            RelatedPost(
+                post_id=ids[row], related_id=ids[column], score=float(score), rank=rank
+            )
+            for rank, (column, score) in enumerate(zip(columns.tolist(), scores))
+            if score > 0
+        ]
+    return entries
+
+
+def rebuild_index():
+    """Recompute related posts for every published post and save the index"""
+    queued = list(RelatedPostUpdate.objects.values_list("pk", flat=True))
+    ids, documents = load_corpus()
+    index = TfidfIndex.build(ids, documents)
+    entries = _entries(ids, top_neighbours(index.matrix, range(len(ids))))
+    index.save()
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(entries, batch_size=1000)
+        # Changes queued before the corpus was read are covered by this build
+        RelatedPostUpdate.objects.filter(pk__in=queued).delete()
+    invalidate_related()
+    return len(entries)
+
+
+def refresh_posts(pks):
+    """
+    Update the index after the given posts changed. Each post's own list
+    is recomputed, and so is the list of every post that referenced it or
+    now ranks it above its weakest kept neighbour.
+    """
+    if not INDEX_PATH.exists():
+        return rebuild_index()
+    index = TfidfIndex.load()
+    pks = set(pks)
+    published = {
+        pk: _document(title, content)
+        for pk, title, content in BlogPost.objects.filter(
+            pk__in=pks, status="published"
+        ).values_list("id", "title", "content")
+    }
+    lists = {
+        row["post_id"]: (row["weakest"], row["kept"])
+        for row in RelatedPost.objects.values("post_id").annotate(
+            weakest=Min("score"), kept=Count("id")
+        )
+    }
+    k = min(TOP_K, len(index.ids) - 1)
+
+    affected = set()
+    for pk in pks:
+        old_row = index.position.get(pk)
+        old_vector = None if old_row is None else index.matrix[old_row].copy()
+        if pk in published:
+            vector = index.vectorise(published[pk])
+            affected.add(index.set_row(pk, vector))
+        elif old_row is not None:
+            vector = np.zeros(len(index.terms), dtype=np.float32)
+            index.matrix[old_row] = vector
+        else:
+            continue
+
+        # Lists that may now rank this post above their weakest neighbour
+        similarities = index.matrix @ vector
+        for row in np.flatnonzero(similarities > 0).tolist():
+            weakest, kept = lists.get(index.ids[row], (0.0, 0))
+            if kept < k or similarities[row] > weakest:
+                affected.add(row)
+        # Lists that held it; a deleted post's entries are already gone,
+        # so look for short lists that were close to its old vector
+        if old_vector is not None:
+            previous = index.matrix @ old_vector
+            for row in np.flatnonzero(previous > 0).tolist():
+                if lists.get(index.ids[row], (0.0, 0))[1] < k:
+                    affected.add(row)
+    referenced_by = RelatedPost.objects.filter(related_id__in=pks).values_list(
+        "post_id", flat=True
+    )
+    affected.update(
+        index.position[post_id]
+        for post_id in referenced_by
+        if post_id in index.position
+    )
+
+    live = [row for row in sorted(affected) if index.matrix[row].any()]
+    entries = _entries(index.ids, top_neighbours(index.matrix, live))
+    index.save()
+    with transaction.atomic():
+        RelatedPost.objects.filter(
+            post_id__in=[*pks, *(index.ids[row] for row in affected)]
+        ).delete()
+        RelatedPost.objects.bulk_create(entries, batch_size=1000)
+    invalidate_related()
+    return len(entries)
+
+
+def process_queue():
+    """Refresh the posts queued by the post signals; returns posts handled"""
+    queued = list(RelatedPostUpdate.objects.values_list("pk", "post_id"))
+    if not queued:
+        return 0
+    pks = {post_id for _, post_id in queued}
+    refresh_posts(pks)
+    RelatedPostUpdate.objects.filter(pk__in=[pk for pk, _ in queued]).delete()
+    return len(pks)
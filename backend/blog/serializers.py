@@ -0,0 +1,16 @@
+"""
+REST framework serializer for blog posts. Listings use
+BlogPostReadSerializer, which shares these fields and gives the same
+output.
+"""
+
+from rest_framework import serializers
+
+from .models import BlogPost
+from .read_serializers import BlogPostReadSerializer
+
+
+class BlogPostSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BlogPost
+        fields = BlogPostReadSerializer.fields
@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.sitemaps import invalidate_section
+
+from .facets import invalidate_facets
+from .feeds import invalidate_feeds
+from .models import BlogFacetCount, BlogPost
+from .related import queue_refresh
+from .sitemaps import mark_shard_changed
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def blog_post_changed(sender, instance, **kwargs):
+    """Refresh cached feeds, facets and the post's sitemap shard once committed"""
+    pk = instance.pk
+    # Drafts are not in the sitemap; only entering, leaving or editing
+    # within the published set touches the index
+    listed = instance.status == "published" or getattr(
+        instance, "_was_published", False
+    )
+
+    def refresh():
+        invalidate_feeds()
+        invalidate_facets()
+        if listed:
+            shard = mark_shard_changed(pk)
+            invalidate_section("index", f"blog-{shard}")
+            # Similarity lists are recomputed by the worker, not the request
+            queue_refresh(pk)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_delete, sender=BlogPost)
+def blog_post_deleted(sender, instance, **kwargs):
+    """Remove a deleted post from its facet counts, inside the delete transaction"""
+    BlogFacetCount.adjust(instance.facet_keys(), set())
@@ -0,0 +1,85 @@
+from django.db.models import F, Max
+
+from backend.cache import namespace
+
+from .models import BlogPost
+
+blog_cache = namespace("blog")
+
+# Number of post ids covered by each sitemap shard
+SHARD_SIZE = 5000
+
+SHARD_INDEX_CACHE_KEY = "sitemap:shards"
+
+# Seconds a post save waits for another to finish updating the index
+SHARD_INDEX_LOCK_WAIT = 2
+
+
+def shard_for(pk):
+    """Return the shard number holding the post with the given id"""
+    return (pk - 1) // SHARD_SIZE
+
+
+def get_shard_lastmods():
+    """
+    Return {shard: lastmod} for every shard containing published posts.
+    Built with one grouped query on a cold cache and then kept current
+    by mark_shard_changed(), so crawlers never trigger the aggregate.
+    """
+    return blog_cache.get_or_set(SHARD_INDEX_CACHE_KEY, _build_shard_index, None)
+
+
+def _build_shard_index():
+    rows = (
+        BlogPost.objects.filter(status="published")
+        .annotate(shard=(F("id") - 1) / SHARD_SIZE)
+        .values("shard")
+        .annotate(lastmod=Max("updated_at"))
+        .order_by("shard")
+    )
+    return {row["shard"]: row["lastmod"] for row in rows}
+
+
+def _published_in(shard):
+    return BlogPost.objects.filter(
+        status="published",
+        id__gt=shard * SHARD_SIZE,
+        id__lte=(shard + 1) * SHARD_SIZE,
+    )
+
+
+def shard_entries(shard):
+    """Yield (path, lastmod) for published posts in a shard, in id order"""
+    posts = _published_in(shard).order_by("id").values_list("slug", "updated_at")
+    for slug, updated_at in posts.iterator(chunk_size=1000):
+        yield f"/blog/{slug}/", updated_at
+
+
+def invalidate_shard_index():
+    """Forget the cached index, for bulk writes that bypass the signals"""
+    blog_cache.delete(SHARD_INDEX_CACHE_KEY)
+
+
+def mark_shard_changed(pk):
+    """
+    Set the lastmod of the shard holding a published post to the newest
+    updated_at among its published posts, or drop the shard from the
+    index once it has none left, and return its number. The cached index
+    is updated in place, under a lock so that concurrent saves do not
+    overwrite each other's shards.
+    """
+    shard = shard_for(pk)
+    with blog_cache.lock(SHARD_INDEX_CACHE_KEY, SHARD_INDEX_LOCK_WAIT) as locked:
+        if not locked:
+            # Rebuilt from the posts on the next read instead
+            invalidate_shard_index()
+            return shard
+        lastmods = blog_cache.get(SHARD_INDEX_CACHE_KEY, shared=True)
+        if lastmods is not None:
+            lastmod = _published_in(shard).aggregate(lastmod=Max("updated_at"))
+            if lastmod["lastmod"] is None:
+                lastmods.pop(shard, None)
+            else:
+                lastmods[shard] = lastmod["lastmod"]
+            blog_cache.set(SHARD_INDEX_CACHE_KEY, lastmods, None)
+    return shard
@@ -1,3 +1,561 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
 
-# Create your tests here.
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from accounts.tokens import issue_access_token
+from backend import cache
+
+from . import feeds, sitemaps, uploads, views
+from .models import (
+    BlogFacetCount,
+    BlogPost,
+    ImageUpload,
+    RelatedPost,
+    RelatedPostUpdate,
+)
+from .read_serializers import BlogPostReadSerializer
+from .serializers import BlogPostSerializer
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class FacetCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("lois")
+
+    def counts(self):
+        return dict(
+            BlogFacetCount.objects.filter(count__gt=0).values_list("key", "count")
+        )
+
+    def post(self, slug, **fields):
+        fields.setdefault("categories", "herbs")
+        return BlogPost.objects.create(
+            title=slug, slug=slug, author=self.author, content="", **fields
+        )
+
+    def test_drafts_are_not_counted(self):
+        self.post("draft")
+        self.assertEqual(self.counts(), {})
+
+    def test_publish(self):
+        post = self.post("calendula")
+        post.published_date = date(2026, 3, 14)
+        post.status = "published"
+        post.save()
+        self.assertEqual(self.counts(), {"herbs": 1, "2026-03": 1})
+
+    def test_unpublish(self):
+        post = self.post("nettle", status="published", published_date=date(2026, 3, 14))
+        self.post("yarrow", status="published", published_date=date(2026, 3, 20))
+        post.status = "draft"
+        post.save()
+        self.assertEqual(self.counts(), {"herbs": 1, "2026-03": 1})
+
+    def test_recategorise_and_redate(self):
+        post = self.post("mint", status="published", published_date=date(2026, 3, 14))
+        post.categories = "recipes"
+        post.published_date = date(2026, 4, 1)
+        post.save()
+        self.assertEqual(self.counts(), {"recipes": 1, "2026-04": 1})
+
+    def test_delete(self):
+        post = self.post("sage", status="published", published_date=date(2026, 3, 14))
+        self.post("thyme", status="published", published_date=date(2026, 5, 2))
+        post.delete()
+        self.assertEqual(self.counts(), {"herbs": 1, "2026-05": 1})
+
+    def test_saving_unchanged_post_keeps_counts(self):
+        post = self.post(
+            "lavender", status="published", published_date=date(2026, 3, 1)
+        )
+        post.title = "Lavender"
+        post.save()
+        self.assertEqual(self.counts(), {"herbs": 1, "2026-03": 1})
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.post("rose", status="published", published_date=date(2026, 3, 1))
+        self.post("hops", status="published", published_date=date(2026, 4, 1))
+        self.post("fennel")
+        incremental = self.counts()
+        BlogFacetCount.objects.all().delete()
+        BlogFacetCount.rebuild()
+        self.assertEqual(self.counts(), incremental)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+@override_settings(CACHES=LOCAL_CACHE)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("lois")
+
+    def setUp(self):
+        cache.local.clear()
+        self.addCleanup(cache.local.clear)
+
+    def post(self, slug, **fields):
+        fields.setdefault("categories", "herbs")
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title=slug.title(), slug=slug, author=self.author, content="", **fields
+            )
+
+    def test_lists_published_posts(self):
+        self.post("nettle", status="published", published_date=date(2026, 3, 1))
+        self.post("draft")
+        for path in ("/blog/feed/rss/", "/blog/feed/atom/", "/blog/feed/herbs/rss/"):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "Nettle")
+            self.assertNotContains(response, "Draft")
+        self.assertEqual(self.client.get("/blog/feed/weeds/rss/").status_code, 404)
+
+    def test_published_post_without_a_date(self):
+        self.post("undated", status="published")
+        for path in ("/blog/feed/rss/", "/blog/feed/atom/"):
+            self.assertContains(self.client.get(path), "Undated")
+
+    def test_304_until_a_post_changes(self):
+        self.post("nettle", status="published", published_date=date(2026, 3, 1))
+        etag = self.client.get("/blog/feed/rss/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/blog/feed/rss/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.post("yarrow", status="published", published_date=date(2026, 3, 2))
+        response = self.client.get("/blog/feed/rss/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Yarrow")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_freshness_is_read_once_per_request(self):
+        self.post("nettle", status="published", published_date=date(2026, 3, 1))
+        with mock.patch.object(
+            feeds, "get_feed_freshness", wraps=feeds.get_feed_freshness
+        ) as freshness:
+            self.client.get("/blog/feed/rss/")
+        self.assertEqual(freshness.call_count, 1)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+@mock.patch.object(sitemaps, "SHARD_SIZE", 2)
+class SitemapShardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("lois")
+
+    def setUp(self):
+        cache.local.clear()
+        self.addCleanup(cache.local.clear)
+
+    def post(self, slug, status="published"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title=slug,
+                slug=slug,
+                author=self.author,
+                content="",
+                categories="herbs",
+                status=status,
+                published_date=date(2026, 3, 1),
+            )
+
+    def save(self, post):
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+
+    def test_index_lastmods_come_from_the_posts(self):
+        posts = [self.post(f"post-{number}") for number in range(3)]
+        self.post("draft", status="draft")
+        expected = {}
+        for post in posts:
+            shard = sitemaps.shard_for(post.pk)
+            expected[shard] = max(expected.get(shard, post.updated_at), post.updated_at)
+        self.assertEqual(sitemaps.get_shard_lastmods(), expected)
+
+        response = self.client.get("/sitemap.xml")
+        body = b"".join(response.streaming_content).decode()
+        for shard in expected:
+            self.assertIn(f"/sitemap-blog-{shard}.xml", body)
+
+    def test_edit_moves_only_its_shard(self):
+        *_, third = [self.post(f"post-{number}") for number in range(3)]
+        lastmods = sitemaps.get_shard_lastmods()
+        shard = sitemaps.shard_for(third.pk)
+        third.title = "Edited"
+        self.save(third)
+
+        updated = sitemaps.get_shard_lastmods()
+        self.assertEqual(updated[shard], third.updated_at)
+        for other, lastmod in lastmods.items():
+            if other != shard:
+                self.assertEqual(updated[other], lastmod)
+
+    def test_unpublishing_the_last_post_drops_the_shard(self):
+        post = self.post("lonely")
+        shard = sitemaps.shard_for(post.pk)
+        self.assertIn(shard, sitemaps.get_shard_lastmods())
+        post.status = "draft"
+        self.save(post)
+        self.assertNotIn(shard, sitemaps.get_shard_lastmods())
+        self.assertEqual(self.client.get(f"/sitemap-blog-{shard}.xml").status_code, 404)
+
+    def test_drafts_leave_the_index_alone(self):
+        with mock.patch("blog.signals.mark_shard_changed") as mark:
+            self.post("draft", status="draft")
+        mark.assert_not_called()
+
+    def test_stale_entries_are_corrected_from_the_data(self):
+        post = self.post("nettle")
+        shard = sitemaps.shard_for(post.pk)
+        sitemaps.get_shard_lastmods()
+        # Another process wrote an older value meanwhile
+        cache.namespace("blog").set(sitemaps.SHARD_INDEX_CACHE_KEY, {}, None)
+        sitemaps.mark_shard_changed(post.pk)
+        self.assertEqual(sitemaps.get_shard_lastmods(), {shard: post.updated_at})
+
+    def test_busy_lock_drops_the_index(self):
+        post = self.post("nettle")
+        sitemaps.get_shard_lastmods()
+        blog_cache = cache.namespace("blog")
+        with mock.patch.object(sitemaps, "SHARD_INDEX_LOCK_WAIT", 0):
+            with blog_cache.lock(sitemaps.SHARD_INDEX_CACHE_KEY):
+                sitemaps.mark_shard_changed(post.pk)
+        self.assertIsNone(blog_cache.get(sitemaps.SHARD_INDEX_CACHE_KEY))
+        self.assertEqual(
+            sitemaps.get_shard_lastmods(),
+            {sitemaps.shard_for(post.pk): post.updated_at},
+        )
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class RelatedPostsTests(TestCase):
+    TOPICS = {
+        "nettle": "nettle soup spring greens iron nettle tea",
+        "nettle-tea": "nettle tea iron minerals spring tonic",
+        "nettle-pesto": "nettle pesto spring greens garlic",
+        "lavender": "lavender sleep calm evening pillow",
+        "lavender-oil": "lavender oil sleep massage calm pillow",
+        "lavender-bath": "lavender bath evening soak",
+        "ginger": "ginger root digestion warming",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("lois")
+        for slug, content in cls.TOPICS.items():
+            BlogPost.objects.create(
+                title=slug.replace("-", " "),
+                slug=slug,
+                author=author,
+                content=content,
+                categories="herbs",
+                status="published",
+                published_date=date(2026, 3, 1),
+            )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch(
+            "blog.related_index.INDEX_PATH", Path(directory.name) / "index.npz"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from . import related_index
+
+        self.related_index = related_index
+        related_index.rebuild_index()
+
+    def lists(self):
+        lists = {}
+        for post, related in RelatedPost.objects.order_by(
+            "post__slug", "rank"
+        ).values_list("post__slug", "related__slug"):
+            lists.setdefault(post, []).append(related)
+        return lists
+
+    def change(self, slug, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = BlogPost.objects.get(slug=slug)
+            for name, value in fields.items():
+                setattr(post, name, value)
+            post.save()
+        return post
+
+    def assert_matches_full_rebuild(self):
+        incremental = self.lists()
+        call_command("build_related_posts", stdout=io.StringIO())
+        self.assertEqual(incremental, self.lists())
+
+    def test_topics_are_related(self):
+        lists = self.lists()
+        self.assertEqual(set(lists["nettle"]), {"nettle-tea", "nettle-pesto"})
+        self.assertEqual(set(lists["lavender"]), {"lavender-oil", "lavender-bath"})
+
+    def test_edit_matches_full_rebuild(self):
+        # Same terms, different weights, so the saved idf still holds
+        post = self.change(
+            "nettle-pesto", content="nettle nettle pesto spring greens garlic garlic"
+        )
+        self.related_index.refresh_posts([post.pk])
+        self.assert_matches_full_rebuild()
+
+    def test_unpublish_matches_full_rebuild(self):
+        post = self.change("nettle-tea", status="draft")
+        self.related_index.refresh_posts([post.pk])
+        self.assertNotIn("nettle-tea", self.lists())
+        self.assertNotIn("nettle-tea", self.lists()["nettle"])
+        self.assert_matches_full_rebuild()
+
+    def test_worker_drains_the_queue(self):
+        RelatedPostUpdate.objects.all().delete()
+        self.change("ginger", content="ginger root calm evening sleep tea")
+        self.assertEqual(RelatedPostUpdate.objects.count(), 1)
+        output = io.StringIO()
+        call_command("run_related_posts_worker", "--once", stdout=output)
+        self.assertIn("Refreshed related posts for 1 posts", output.getvalue())
+        self.assertFalse(RelatedPostUpdate.objects.exists())
+        self.assertIn("lavender", " ".join(self.lists()["ginger"]))
+        self.assertEqual(self.related_index.process_queue(), 0)
+
+    def test_refresh_without_a_saved_index_rebuilds(self):
+        self.related_index.INDEX_PATH.unlink()
+        RelatedPost.objects.all().delete()
+        self.related_index.refresh_posts([BlogPost.objects.get(slug="ginger").pk])
+        self.assertTrue(self.related_index.INDEX_PATH.exists())
+        self.assertIn("nettle", self.lists())
+
+
+class BlogPostReadSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("lois")
+        for number in range(3):
+            BlogPost.objects.create(
+                title=f"Post {number}",
+                slug=f"post-{number}",
+                author=author,
+                content="Nettle soup",
+                categories="recipes",
+                status="published",
+                published_date=date(2026, 3, 1 + number),
+                featured_image=f"blog_images/post-{number}.jpg" if number else "",
+            )
+        BlogPost.objects.create(
+            title="Draft", slug="draft", author=author, content="", categories="herbs"
+        )
+
+    def test_matches_model_serializer(self):
+        request = RequestFactory().get("/blog/posts/")
+        posts = BlogPost.objects.order_by("pk")
+        for context in ({}, {"request": request}):
+            expected = json.loads(
+                json.dumps(BlogPostSerializer(posts, many=True, context=context).data)
+            )
+            rows = BlogPostReadSerializer(context.get("request")).many(posts)
+            self.assertEqual(rows, expected)
+        self.assertTrue(rows[1]["featured_image"].startswith("http://testserver/"))
+        self.assertIsNone(rows[3]["published_date"])
+
+    def test_stream_matches_json_dumps(self):
+        posts = BlogPost.objects.order_by("pk")
+        serializer = BlogPostReadSerializer()
+        with mock.patch("backend.read_serializers.STREAM_CHUNK_SIZE", 2):
+            streamed = b"".join(serializer.stream(posts, "posts", {"page": 1}))
+        self.assertEqual(
+            streamed.decode(),
+            json.dumps({"page": 1, "posts": serializer.many(posts)}),
+        )
+        empty = b"".join(serializer.stream(posts.none(), "posts"))
+        self.assertEqual(json.loads(empty), {"posts": []})
+
+    def test_post_list(self):
+        response = self.client.get("/blog/posts/", {"limit": 2})
+        self.assertEqual(
+            [post["slug"] for post in response.json()["posts"]], ["post-2", "post-1"]
+        )
+        with mock.patch.object(views, "POSTS_STREAM_FROM", 2):
+            response = self.client.get("/blog/posts/", {"offset": 1, "limit": 5})
+        self.assertTrue(response.streaming)
+        posts = json.loads(b"".join(response.streaming_content))["posts"]
+        self.assertEqual([post["slug"] for post in posts], ["post-1", "post-0"])
+        self.assertEqual(
+            self.client.get("/blog/posts/", {"limit": "many"}).status_code, 400
+        )
+
+
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("lois", is_staff=True)
+        cls.post = BlogPost.objects.create(
+            title="Nettles", slug="nettles", author=cls.staff, content=""
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = Path(directory.name)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch.object(uploads, "TEMP_DIR", self.media / "uploads")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(uploads._hashers.clear)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_access_token(self.staff)}"}
+
+    def image(self, size=(40, 30)):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "green").save(buffer, "PNG")
+        return buffer.getvalue()
+
+    def start(self, data, **fields):
+        fields = {"post": "nettles", "size": len(data), **fields}
+        return self.client.post(
+            "/blog/uploads/", fields, content_type="application/json", **self.auth
+        )
+
+    def send(self, url, data, offset):
+        return self.client.patch(
+            url,
+            data,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": str(offset)},
+            **self.auth,
+        )
+
+    def test_resumes_and_stores_the_image(self):
+        data = self.image()
+        digest = hashlib.sha256(data).hexdigest()
+        response = self.start(data, filename="nettles.png", sha256=digest)
+        self.assertEqual(response.status_code, 201)
+        url = response.json()["url"]
+        upload = ImageUpload.objects.get()
+
+        # The connection drops a few bytes into the piece
+        uploads.append(upload, 0, io.BytesIO(data[:10]), len(data))
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.json(), {"offset": 10, "size": len(data)})
+        self.assertEqual(response["Upload-Offset"], "10")
+
+        response = self.send(url, data[20:], 20)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 10)
+
+        # Resumed in another process, which rebuilds the running hash
+        uploads._hashers.clear()
+        response = self.send(url, data[10:], 10)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["complete"])
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.featured_image.name, f"blog_images/{digest}.png")
+        self.assertEqual(self.post.featured_image.read(), data)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertEqual(list((self.media / "uploads").iterdir()), [])
+
+    def test_same_image_is_stored_once(self):
+        data = self.image()
+        other = BlogPost.objects.create(
+            title="Yarrow", slug="yarrow", author=self.staff, content=""
+        )
+        for slug in ("nettles", "yarrow"):
+            url = self.start(data, post=slug).json()["url"]
+            self.assertEqual(self.send(url, data, 0).status_code, 200)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.post.featured_image.name, other.featured_image.name)
+        self.assertEqual(len(list((self.media / "blog_images").iterdir())), 1)
+
+    def test_rejects_what_is_not_the_expected_image(self):
+        url = self.start(b"not an image").json()["url"]
+        response = self.send(url, b"not an image", 0)
+        self.assertEqual(response.status_code, 415)
+
+        data = self.image()
+        url = self.start(data, sha256="0" * 64).json()["url"]
+        self.assertEqual(self.send(url, data, 0).status_code, 422)
+
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertEqual(list((self.media / "uploads").iterdir()), [])
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.featured_image)
+
+        with mock.patch.object(uploads, "MAX_BYTES", 10):
+            self.assertEqual(self.start(data).status_code, 413)
+
+    def test_one_request_writes_at_a_time(self):
+        data = self.image()
+        url = self.start(data).json()["url"]
+        upload = ImageUpload.objects.get()
+        competing = []
+
+        class Body(io.BytesIO):
+            # A second PATCH at the same offset while the first is reading
+            def read(body, size=-1):
+                if not competing:
+                    competing.append(self.send(url, data, 0))
+                return super().read(size)
+
+        post = uploads.append(upload, 0, Body(data), len(data))
+        self.assertEqual(competing[0].status_code, 409)
+        self.assertEqual(competing[0].json()["offset"], 0)
+        self.assertEqual(post.featured_image.read(), data)
+
+    def test_silent_writer_is_taken_over(self):
+        data = self.image()
+        url = self.start(data).json()["url"]
+        stalled = ImageUpload.objects.get()
+        taken_over = []
+
+        class Body(io.BytesIO):
+            # The first request goes silent, and the client resumes
+            def read(body, size=-1):
+                if not taken_over:
+                    ImageUpload.objects.update(
+                        heartbeat_at=timezone.now()
+                        - uploads.WRITE_LEASE
+                        - timedelta(seconds=1)
+                    )
+                    taken_over.append(self.send(url, data, 0))
+                return super().read(size)
+
+        with self.assertRaisesMessage(uploads.UploadError, "took over"):
+            uploads.append(stalled, 0, Body(data), len(data))
+        self.assertEqual(taken_over[0].status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.featured_image.read(), data)
+
+    def test_checks_the_header_only(self):
+        path = self.media / "header.png"
+        path.write_bytes(self.image((4000, 3000))[:64])
+        self.assertEqual(uploads.image_format(path), ".png")
+        with mock.patch.object(uploads, "MAX_PIXELS", 1000):
+            with self.assertRaises(uploads.UploadError):
+                uploads.image_format(path)
+
+    def test_staff_only(self):
+        client = User.objects.create_user("mara")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_access_token(client)}"}
+        self.assertEqual(self.start(b"data").status_code, 403)
+        self.auth = {}
+        self.assertEqual(self.start(b"data").status_code, 403)
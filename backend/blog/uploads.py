@@ -0,0 +1,287 @@
+"""
+Resumable uploads of blog featured images.
+
+A staff client starts an upload by giving the file's size, and
+optionally its SHA-256. It then sends the bytes in order, in as many
+requests as it likes, each one saying which offset it starts at. A
+dropped connection resumes from the offset the server reports.
+
+Each request body is copied to a temporary file CHUNK_SIZE bytes at a
+time, and a running SHA-256 is updated as the bytes go by. A worker
+holds one chunk per upload, whatever the size of the photo.
+
+One request writes to an upload at a time. It claims the ImageUpload
+row with a conditional UPDATE on the offset and heartbeat_at, renews
+the heartbeat while the body arrives, and fences every later write on
+it, so that a request which went silent for WRITE_LEASE and was taken
+over stops instead of writing alongside the new one.
+
+Once the last byte is in, Pillow reads only the image header to check
+the format and dimensions. The file is then handed to storage as a
+temporary file, which FileSystemStorage moves into MEDIA_ROOT rather
+than copying. The stored name is the content hash, so a photo uploaded
+twice is stored once.
+"""
+
+import hashlib
+import os
+import secrets
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BlogPost, ImageUpload
+
+TEMP_DIR = Path(
+    getattr(settings, "BLOG_UPLOAD_TEMP_DIR", Path(settings.MEDIA_ROOT) / "uploads")
+)
+MAX_BYTES = getattr(settings, "BLOG_IMAGE_MAX_BYTES", 50 * 1024 * 1024)
+
+# Largest image accepted, in pixels, checked before anything is decoded
+MAX_PIXELS = getattr(settings, "BLOG_IMAGE_MAX_PIXELS", 50_000_000)
+
+# Bytes read from a request body and written at a time
+CHUNK_SIZE = 64 * 1024
+
+# Uploads that received nothing for this long are removed
+EXPIRY = timedelta(hours=24)
+
+# A request writing a piece that has been silent this long is taken over
+WRITE_LEASE = timedelta(minutes=5)
+
+# A piece still arriving after this long renews the lease between chunks
+RENEW_AFTER = WRITE_LEASE / 3
+
+# Image formats accepted, with the extension they are stored under
+FORMATS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "GIF": ".gif"}
+
+# Running hashes of the uploads in progress in this process, by token.
+# An upload resumed in another process, or after its hash was evicted,
+# has it rebuilt once from the bytes already on disk.
+HASHERS_KEPT = 256
+_hashers = OrderedDict()
+
+
+class UploadError(Exception):
+    """Raised when an upload or a piece of it is refused"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _TemporaryFile(File):
+    """A complete upload, which storage may move instead of reading"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def temp_path(upload):
+    return TEMP_DIR / f"{upload.token}.part"
+
+
+def start_upload(post, owner_id, size, filename="", sha256=""):
+    """Create an upload of size bytes that will become post's featured image"""
+    if size <= 0:
+        raise UploadError("size must be positive")
+    if size > MAX_BYTES:
+        raise UploadError(f"Images are limited to {MAX_BYTES} bytes", 413)
+    sha256 = sha256.lower()
+    if sha256 and (len(sha256) != 64 or set(sha256) - set("0123456789abcdef")):
+        raise UploadError("sha256 must be 64 hexadecimal digits")
+
+    remove_expired()
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    upload = ImageUpload.objects.create(
+        token=secrets.token_hex(16),
+        post=post,
+        owner_id=owner_id,
+        filename=filename[:255],
+        size=size,
+        sha256=sha256,
+    )
+    temp_path(upload).touch()
+    return upload
+
+
+def _hasher(upload, handle):
+    """The running SHA-256 of upload's first upload.received bytes"""
+    offset, hasher = _hashers.pop(upload.token, (None, None))
+    if offset != upload.received:
+        hasher = hashlib.sha256()
+        handle.seek(0)
+        remaining = upload.received
+        while remaining:
+            data = handle.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                raise UploadError("The upload's data has been lost", 410)
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def _keep_hasher(token, offset, hasher):
+    _hashers[token] = (offset, hasher)
+    while len(_hashers) > HASHERS_KEPT:
+        _hashers.popitem(last=False)
+
+
+def _claim(upload, offset):
+    """
+    Take upload for a request writing at offset, provided it stands
+    there and no other request is writing to it or that request has been
+    silent for WRITE_LEASE
+    """
+    now = timezone.now()
+    claimed = (
+        ImageUpload.objects.filter(pk=upload.pk, received=offset)
+        .filter(Q(heartbeat_at=None) | Q(heartbeat_at__lt=now - WRITE_LEASE))
+        .update(heartbeat_at=now, updated_at=now)
+    )
+    # Another process may have written since upload was loaded
+    try:
+        upload.refresh_from_db(fields=["received", "heartbeat_at"])
+    except ImageUpload.DoesNotExist:
+        raise UploadError("The upload is finished or abandoned", 404)
+    if offset != upload.received:
+        raise UploadError(f"Expected offset {upload.received}", 409)
+    if not claimed:
+        raise UploadError("Another request is writing to this upload", 409)
+
+
+def _checkpoint(upload, **fields):
+    """
+    Write fields to upload and renew its heartbeat, provided this request
+    still holds it; raise UploadError otherwise
+    """
+    now = timezone.now()
+    fields = {"heartbeat_at": now, **fields}
+    updated = ImageUpload.objects.filter(
+        pk=upload.pk, heartbeat_at=upload.heartbeat_at
+    ).update(updated_at=now, **fields)
+    if not updated:
+        raise UploadError("Another request took over this upload", 409)
+    upload.heartbeat_at = fields["heartbeat_at"]
+
+
+def append(upload, offset, stream, length):
+    """
+    Write length bytes read from stream at offset, which must be where
+    the upload stands. Bytes that arrived before the stream ended are
+    kept, so the client resumes from upload.received. The image is
+    stored once the last byte is in.
+    """
+    if offset + length > upload.size:
+        raise UploadError(f"The upload is {upload.size} bytes long", 413)
+    path = temp_path(upload)
+    try:
+        handle = open(path, "r+b")
+    except FileNotFoundError:
+        raise UploadError("The upload's data has been lost", 410)
+    with handle:
+        _claim(upload, offset)
+        try:
+            hasher = _hasher(upload, handle)
+            handle.seek(offset)
+            # Drop what a failed request left beyond the recorded offset
+            handle.truncate()
+            written = 0
+            while written < length:
+                try:
+                    data = stream.read(min(CHUNK_SIZE, length - written))
+                except OSError:
+                    # The client went away; keep what it sent
+                    break
+                if not data:
+                    break
+                if timezone.now() - upload.heartbeat_at > RENEW_AFTER:
+                    _checkpoint(upload)
+                handle.write(data)
+                hasher.update(data)
+                written += len(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        except BaseException:
+            # Let the next request have the upload; a no-op once taken over
+            ImageUpload.objects.filter(
+                pk=upload.pk, heartbeat_at=upload.heartbeat_at
+            ).update(heartbeat_at=None)
+            raise
+
+    upload.received = offset + written
+    if upload.received < upload.size:
+        _checkpoint(upload, received=upload.received, heartbeat_at=None)
+        _keep_hasher(upload.token, upload.received, hasher)
+        return None
+    # Held while the image is stored; the row goes with it
+    _checkpoint(upload, received=upload.received)
+    return _finish(upload, path, hasher.hexdigest())
+
+
+def image_format(path):
+    """
+    Check the image at path from its header alone, without decoding the
+    pixels, and return the extension to store it under
+    """
+    # Pillow is only needed here, so keep it off the startup path
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            kind, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise UploadError("The file is not an image Pillow can read", 415)
+    if kind not in FORMATS:
+        raise UploadError(f"{kind} images are not accepted", 415)
+    if width * height > MAX_PIXELS:
+        raise UploadError(f"Images are limited to {MAX_PIXELS} pixels", 413)
+    return FORMATS[kind]
+
+
+def _finish(upload, path, digest):
+    """Check the complete file, store it and set it on the post"""
+    try:
+        if upload.sha256 and digest != upload.sha256:
+            raise UploadError("The data does not match the expected sha256", 422)
+        extension = image_format(path)
+        post = BlogPost.objects.get(pk=upload.post_id)
+        field = post.featured_image
+        name = field.field.generate_filename(post, digest + extension)
+        with transaction.atomic():
+            if field.storage.exists(name):
+                # The same image is already stored
+                post.featured_image = name
+            else:
+                with _TemporaryFile(open(path, "rb")) as content:
+                    field.save(digest + extension, content, save=False)
+            post.save(update_fields=["featured_image", "updated_at"])
+            upload.delete()
+    except UploadError:
+        discard(upload)
+        raise
+    # Left behind when the image was already stored
+    path.unlink(missing_ok=True)
+    return post
+
+
+def discard(upload):
+    """Remove upload and its temporary file"""
+    _hashers.pop(upload.token, None)
+    temp_path(upload).unlink(missing_ok=True)
+    if upload.pk:
+        upload.delete()
+
+
+def remove_expired():
+    """Remove the uploads that received nothing for EXPIRY"""
+    for upload in ImageUpload.objects.filter(
+        updated_at__lt=timezone.now() - EXPIRY
+    ).only("pk", "token"):
+        discard(upload)
@@ -0,0 +1,26 @@
+from django.urls import path
+from . import feeds, views
+
+app_name = "blog"
+
+urlpatterns = [
+    path("facets/", views.facet_counts, name="facet_counts"),
+    path("posts/", views.post_list, name="post_list"),
+    path("posts/<slug:slug>/related/", views.related_posts, name="related_posts"),
+    path("uploads/", views.upload_start, name="upload_start"),
+    path("uploads/<str:token>/", views.upload_detail, name="upload_detail"),
+    path("feed/rss/", feeds.feed_view, {"feed": "rss"}, name="feed_rss"),
+    path("feed/atom/", feeds.feed_view, {"feed": "atom"}, name="feed_atom"),
+    path(
+        "feed/<slug:category>/rss/",
+        feeds.feed_view,
+        {"feed": "rss"},
+        name="category_feed_rss",
+    ),
+    path(
+        "feed/<slug:category>/atom/",
+        feeds.feed_view,
+        {"feed": "atom"},
+        name="category_feed_atom",
+    ),
+]
@@ -1,3 +1,169 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+
+from accounts.tokens import InvalidToken, read_access_token
+from backend.conditional import conditional
+
+from . import uploads
+from .facets import get_facet_counts
+from .freshness import posts_freshness, related_freshness
+from .models import BlogPost, ImageUpload
+from .read_serializers import BlogPostReadSerializer
+from .related import get_related_posts
+
+# Most posts one page of the post listing may hold
+POSTS_MAX_LIMIT = getattr(settings, "BLOG_POSTS_MAX_LIMIT", 1000)
+
+# Pages of at least this many posts are streamed instead of built in memory
+POSTS_STREAM_FROM = getattr(settings, "BLOG_POSTS_STREAM_FROM", 200)
+
+
+@conditional(posts_freshness)
+def facet_counts(request):
+    """Published post counts per category and archive month"""
+    return JsonResponse(get_facet_counts())
+
+
+@conditional(posts_freshness)
+def post_list(request):
+    """Published posts, newest first, paged with ?offset= and ?limit="""
+    try:
+        offset = max(int(request.GET.get("offset", 0)), 0)
+        limit = min(max(int(request.GET.get("limit", 20)), 1), POSTS_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({"error": "offset and limit must be numbers"}, status=400)
+    posts = BlogPost.objects.filter(status="published").order_by(
+        "-published_date", "-id"
+    )[offset : offset + limit]
+    serializer = BlogPostReadSerializer(request)
+    if limit >= POSTS_STREAM_FROM:
+        return StreamingHttpResponse(
+            serializer.stream(posts, "posts"), content_type="application/json"
+        )
+    return JsonResponse({"posts": serializer.many(posts)})
+
+
+@conditional(related_freshness)
+def related_posts(request, slug):
+    """Precomputed related reading for a published post"""
+    post = get_object_or_404(BlogPost.objects.only("id"), slug=slug, status="published")
+    return JsonResponse(
+        {
+            "related": [
+                {
+                    "title": related.title,
+                    "slug": related.slug,
+                    "published_date": related.published_date,
+                }
+                for related in get_related_posts(post)
+            ]
+        }
+    )
+
+
+def _staff_id(request):
+    """
+    Id of the staff user making request, from a bearer token or the
+    session; None for anyone else. Session requests are CSRF-checked.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = read_access_token(token)
+        except InvalidToken:
+            return None
+        return payload["uid"] if payload.get("stf") else None
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return None
+    check = CsrfViewMiddleware(lambda request: None)
+    check.process_request(request)
+    if check.process_view(request, None, (), {}):
+        return None
+    return request.user.pk
+
+
+def _upload_state(upload, status=200, **extra):
+    response = JsonResponse(
+        {"offset": upload.received, "size": upload.size, **extra}, status=status
+    )
+    response["Upload-Offset"] = upload.received
+    return response
+
+
+@csrf_exempt
+@require_POST
+def upload_start(request):
+    """
+    Start a resumable upload of a post's featured image, from JSON with
+    the post's slug, the file's size and optionally its filename and
+    sha256. Send the bytes to the returned url with PATCH.
+    """
+    user_id = _staff_id(request)
+    if user_id is None:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    try:
+        data = json.loads(request.body)
+        post = BlogPost.objects.get(slug=data["post"])
+        upload = uploads.start_upload(
+            post,
+            user_id,
+            int(data["size"]),
+            filename=str(data.get("filename", "")),
+            sha256=str(data.get("sha256", "")),
+        )
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"error": "post and size are required"}, status=400)
+    except BlogPost.DoesNotExist:
+        return JsonResponse({"error": "No such post"}, status=404)
+    except uploads.UploadError as exc:
+        return JsonResponse({"error": str(exc)}, status=exc.status)
+    url = reverse("blog:upload_detail", args=[upload.token])
+    return _upload_state(upload, status=201, token=upload.token, url=url)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+def upload_detail(request, token):
+    """
+    GET or HEAD: the offset to resume from. PATCH: append the body at
+    the offset in the Upload-Offset header; the last piece stores the
+    image. DELETE: abandon the upload.
+    """
+    if _staff_id(request) is None:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    upload = ImageUpload.objects.filter(token=token).first()
+    if upload is None:
+        return JsonResponse({"error": "No such upload"}, status=404)
+
+    if request.method == "DELETE":
+        uploads.discard(upload)
+        return HttpResponse(status=204)
+    if request.method != "PATCH":
+        return _upload_state(upload)
+
+    try:
+        offset = int(request.headers["Upload-Offset"])
+        length = int(request.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"error": "Upload-Offset and Content-Length are required"}, status=400
+        )
+    try:
+        # Read the body as a stream; request.body would load it whole
+        post = uploads.append(upload, offset, request, length)
+    except uploads.UploadError as exc:
+        return _upload_state(upload, status=exc.status, error=str(exc))
+    if post is None:
+        return _upload_state(upload)
+    return _upload_state(
+        upload,
+        complete=True,
+        featured_image=request.build_absolute_uri(post.featured_image.url),
+    )
@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Service, Booking, BusinessHours
+from django.db.models import Q
+from accounts.search import search_clients
+from .models import (
+    Booking,
+    BookingEvent,
+    BusinessHours,
+    EffectiveHours,
+    Resource,
+    ResourceHours,
+    ScheduleException,
+    Service,
+    SlotHold,
+)
+from .transitions import InvalidTransition, transition_batch
 
 
 @admin.register(BusinessHours)
@@ -9,11 +22,60 @@ class BusinessHoursAdmin(admin.ModelAdmin):
     ordering = ["day"]
 
 
+@admin.register(ScheduleException)
+class ScheduleExceptionAdmin(admin.ModelAdmin):
+    list_display = ("date", "is_closed", "start_time", "end_time", "reason")
+    list_filter = ("is_closed",)
+    date_hierarchy = "date"
+
+
+@admin.register(EffectiveHours)
+class EffectiveHoursAdmin(admin.ModelAdmin):
+    """Compiled from business hours and exceptions; edit those instead"""
+
+    list_display = ("date", "is_open", "start_time", "end_time")
+    list_filter = ("is_open",)
+    date_hierarchy = "date"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ResourceHoursInline(admin.TabularInline):
+    model = ResourceHours
+    extra = 0
+
+
+@admin.register(Resource)
+class ResourceAdmin(admin.ModelAdmin):
+    list_display = ("name", "kind", "is_active")
+    list_filter = ("kind", "is_active")
+    inlines = [ResourceHoursInline]
+
+
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ("name", "duration", "price", "is_active")
     list_filter = ("is_active",)
     search_fields = ("name", "description")
+    filter_horizontal = ("resources",)
+
+
+class BookingEventInline(admin.TabularInline):
+    model = BookingEvent
+    extra = 0
+    can_delete = False
+    fields = ("created_at", "from_status", "to_status", "actor", "note")
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Booking)
@@ -22,9 +84,78 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ("status", "date", "service", "created_by_admin")
     search_fields = ("client__first_name", "client__last_name", "service__name")
     date_hierarchy = "date"
+    # Assigned by Booking.save(); the form must not overwrite the choice
+    readonly_fields = ("resources",)
+    inlines = [BookingEventInline]
+    actions = ["confirm_bookings", "complete_bookings", "cancel_bookings"]
+
+    def get_readonly_fields(self, request, obj=None):
+        """Existing bookings change status through the actions only"""
+        if obj is None:
+            return self.readonly_fields
+        return self.readonly_fields + ("status",)
+
+    def _transition(self, request, queryset, new_status):
+        skipped = 0
+        with transition_batch(actor=request.user) as batch:
+            for booking in queryset.select_related("client", "service"):
+                try:
+                    if not batch.transition(booking, new_status):
+                        skipped += 1
+                except InvalidTransition:
+                    skipped += 1
+        message = f"{batch.applied} booking(s) {new_status}"
+        if skipped:
+            message += f", {skipped} skipped as they cannot become {new_status}"
+        self.message_user(request, message)
+
+    @admin.action(description="Confirm selected bookings")
+    def confirm_bookings(self, request, queryset):
+        self._transition(request, queryset, "confirmed")
+
+    @admin.action(description="Mark selected bookings completed")
+    def complete_bookings(self, request, queryset):
+        self._transition(request, queryset, "completed")
+
+    @admin.action(description="Cancel selected bookings")
+    def cancel_bookings(self, request, queryset):
+        self._transition(request, queryset, "cancelled")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match clients through the trigram search backend, services by name"""
+        if not search_term:
+            return queryset, False
+        clients = search_clients(search_term, limit=None)
+        return (
+            queryset.filter(
+                Q(client__in=clients.values("pk"))
+                | Q(service__name__icontains=search_term)
+            ),
+            False,
+        )
 
     def save_model(self, request, obj, form, change):
         """Set created_by_admin when booking is created in admin"""
         if not change:  # Only for new bookings
             obj.created_by_admin = True
         super().save_model(request, obj, form, change)
+
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(admin.ModelAdmin):
+    """Holds are placed by clients at checkout; staff can only release them"""
+
+    list_display = ("service", "date", "time", "client", "expires_at")
+    list_filter = ("date",)
+    readonly_fields = (
+        "token",
+        "client",
+        "service",
+        "date",
+        "time",
+        "expires_at",
+        "resources",
+    )
+
+    def has_add_permission(self, request):
+        return False
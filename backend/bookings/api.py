@@ -0,0 +1,168 @@
+"""
+JSON API for the booking flow used by the frontend: list services,
+look up free slots, hold one during checkout, book it and list the
+client's own bookings.
+"""
+
+from datetime import date, time
+
+from django.core.exceptions import ValidationError
+from django.utils.decorators import method_decorator
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.clients import get_client_id
+from accounts.models import Client
+from backend.conditional import conditional
+
+from .availability import SERVICES_CACHE_KEY, available_slots, bookings_cache
+from .freshness import client_bookings_freshness, services_freshness
+from .holds import SlotUnavailable, place_hold, release_hold
+from .models import Booking, Service
+from .notifications import send_later
+from .payloads import BOOKING_FIELDS, load_services, validation_status
+
+
+def _client_id(request):
+    """Session users reuse the cached id; bearer tokens carry only the user"""
+    if request.auth is None:
+        return get_client_id(request)
+    return (
+        Client.objects.filter(user_id=request.user.pk)
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+
+def _error(message, code=status.HTTP_400_BAD_REQUEST):
+    return Response({"status": "error", "message": message}, status=code)
+
+
+class ServiceListAPI(APIView):
+    """Active services"""
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(conditional(lambda request: services_freshness()))
+    def get(self, request):
+        services = bookings_cache.get_or_set(SERVICES_CACHE_KEY, load_services, None)
+        return Response({"status": "success", "services": services})
+
+
+class AvailabilityAPI(APIView):
+    """
+    Free start times for ?service=<id>&date=<YYYY-MM-DD>; with &hold=<token>
+    the slot of the caller's own hold is listed as free
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            day = date.fromisoformat(request.query_params.get("date", ""))
+            service = Service.objects.get(
+                pk=int(request.query_params.get("service", "")), is_active=True
+            )
+        except (ValueError, Service.DoesNotExist):
+            return _error("A valid service and date are required")
+        return Response(
+            {
+                "status": "success",
+                "service": service.pk,
+                "date": day,
+                "slots": available_slots(
+                    service, day, hold=request.query_params.get("hold")
+                ),
+            }
+        )
+
+
+class BookingAPI(APIView):
+    """The client's bookings (GET) and new booking requests (POST)"""
+
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(
+        conditional(
+            lambda request: client_bookings_freshness(_client_id(request)),
+            private=True,
+        )
+    )
+    def get(self, request):
+        bookings = (
+            Booking.objects.filter(client_id=_client_id(request))
+            .order_by("date", "time")
+            .values(*BOOKING_FIELDS)
+        )
+        return Response({"status": "success", "bookings": list(bookings)})
+
+    def post(self, request):
+        client_id = _client_id(request)
+        if client_id is None:
+            return _error("Please complete your client profile to book.")
+        try:
+            service = Service.objects.get(
+                pk=int(request.data.get("service", "")), is_active=True
+            )
+            booking = Booking(
+                client_id=client_id,
+                service=service,
+                date=date.fromisoformat(request.data.get("date", "")),
+                time=time.fromisoformat(request.data.get("time", "")),
+                notes=request.data.get("notes", ""),
+            )
+            booking.hold_token = request.data.get("hold")
+        except (TypeError, ValueError, Service.DoesNotExist):
+            return _error("A valid service, date and time are required")
+        try:
+            booking.save()
+        except ValidationError as exc:
+            return _error(exc.messages[0], validation_status(exc))
+        send_later(booking.notify_new_booking)
+        return Response(
+            {
+                "status": "success",
+                "booking": {"id": booking.pk, "status": booking.status},
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class SlotHoldAPI(APIView):
+    """
+    Hold a slot during checkout (POST with service, date and time) or
+    release it (DELETE with hold). Booking with the returned token within
+    the hold's lifetime cannot lose the slot to another client.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        client_id = _client_id(request)
+        if client_id is None:
+            return _error("Please complete your client profile to book.")
+        try:
+            service = Service.objects.get(
+                pk=int(request.data.get("service", "")), is_active=True
+            )
+            day = date.fromisoformat(request.data.get("date", ""))
+            start = time.fromisoformat(request.data.get("time", ""))
+        except (TypeError, ValueError, Service.DoesNotExist):
+            return _error("A valid service, date and time are required")
+        try:
+            hold = place_hold(client_id, service, day, start)
+        except SlotUnavailable as exc:
+            return _error(str(exc), status.HTTP_409_CONFLICT)
+        return Response(
+            {
+                "status": "success",
+                "hold": {"token": hold.token, "expires_at": hold.expires_at},
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def delete(self, request):
+        release_hold(_client_id(request), request.data.get("hold", ""))
+        return Response(status=status.HTTP_204_NO_CONTENT)
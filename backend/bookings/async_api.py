@@ -0,0 +1,88 @@
+"""
+Async client registration for the ASGI deployment.
+
+Validating a sign-up runs the password validators and hashing the
+password is deliberately slow, so both run in a small dedicated thread
+pool instead of the event loop or the shared thread-sensitive executor.
+A semaphore caps how many sign-ups may wait for the pool; beyond that
+the API answers 503 rather than queueing without bound.
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .forms import ClientRegistrationForm
+
+REGISTRATION_WORKERS = getattr(settings, "REGISTRATION_WORKERS", 4)
+
+
+def _load_validators():
+    """Load the password validators, and the common-password list, once"""
+    password_validation.get_default_password_validators()
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=REGISTRATION_WORKERS,
+    thread_name_prefix="registration",
+    initializer=_load_validators,
+)
+_pending = asyncio.Semaphore(REGISTRATION_WORKERS * 8)
+
+
+def _register(data):
+    """Validate and save a registration; runs in the registration pool"""
+    try:
+        form = ClientRegistrationForm(data=data)
+        if not form.is_valid():
+            return None, form.errors
+        return form.save(), None
+    finally:
+        close_old_connections()
+
+
+register_in_pool = sync_to_async(_register, thread_sensitive=False, executor=_executor)
+
+
+@csrf_exempt
+@require_POST
+async def register_client(request):
+    """API endpoint for client registration"""
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+    if _pending.locked():
+        response = JsonResponse(
+            {"status": "error", "message": "Too many registrations, retry shortly"},
+            status=503,
+        )
+        response["Retry-After"] = "1"
+        return response
+
+    async with _pending:
+        user, errors = await register_in_pool(data)
+    if errors is not None:
+        return JsonResponse({"status": "error", "errors": errors}, status=400)
+    return JsonResponse(
+        {
+            "status": "success",
+            "message": "Registration successful",
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+            },
+        },
+        status=201,
+    )
@@ -0,0 +1,218 @@
+"""
+Native async booking API for the ASGI deployment.
+
+The same JSON as bookings.api, written as async views. Their queries
+run in the bounded pool of backend.db_threads instead of a thread and a
+database connection per request, which is what sync views and Django's
+async ORM cost under ASGI; requests beyond the pool size wait on the
+event loop. Creating a booking runs Booking.save() and its validation in
+that pool too, and the emails go out later from the notification pool.
+
+DRF views cannot be async, so authentication is done here: bearer
+tokens are verified inline, session users are resolved in the pool and
+have their unsafe requests CSRF-checked the way DRF does.
+"""
+
+import json
+from datetime import date, time, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+
+from accounts.clients import get_client_id
+from accounts.models import Client
+from accounts.tokens import InvalidToken, read_access_token
+from backend.conditional import conditional
+from backend.db_threads import run_in_db_thread
+
+from .availability import SERVICES_CACHE_KEY, available_slots, bookings_cache
+from .freshness import aservices_freshness, client_bookings_freshness
+from .models import Booking, Service
+from .notifications import send_later
+from .payloads import BOOKING_FIELDS, load_services, validation_status
+from .slot_events import slot_stream
+
+# Most days one availability stream may watch
+STREAM_MAX_DAYS = getattr(settings, "SLOT_STREAM_MAX_DAYS", 31)
+
+
+def _error(message, status=400):
+    return JsonResponse({"status": "error", "message": message}, status=status)
+
+
+def _session_user(request):
+    """(user id, client id) of a session user, loading the session once"""
+    if not request.user.is_authenticated:
+        return None, None
+    return request.user.pk, get_client_id(request)
+
+
+def _token_client(user_id):
+    return Client.objects.filter(user_id=user_id).values_list("pk", flat=True).first()
+
+
+async def _client_id(request):
+    """
+    Return (user id, via bearer token, client id) for the request, looked
+    up once per request. The user id is None for anonymous requests and
+    rejected tokens.
+    """
+    if not hasattr(request, "_booking_client"):
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                user_id = read_access_token(token)["uid"]
+            except InvalidToken:
+                request._booking_client = (None, True, None)
+            else:
+                client_id = await run_in_db_thread(_token_client, user_id)
+                request._booking_client = (user_id, True, client_id)
+        else:
+            user_id, client_id = await run_in_db_thread(_session_user, request)
+            request._booking_client = (user_id, False, client_id)
+    return request._booking_client
+
+
+def _csrf_failure(request):
+    check = CsrfViewMiddleware(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+async def _services_freshness(request):
+    return await aservices_freshness()
+
+
+@conditional(_services_freshness)
+@require_GET
+async def services(request):
+    """Active services"""
+    data = await bookings_cache.aget_or_set(SERVICES_CACHE_KEY, load_services, None)
+    return JsonResponse({"status": "success", "services": data})
+
+
+def _availability(service_id, day, hold):
+    service = Service.objects.get(pk=service_id, is_active=True)
+    return service, available_slots(service, day, hold=hold)
+
+
+@require_GET
+async def availability(request):
+    """Free start times for ?service=<id>&date=<YYYY-MM-DD>"""
+    try:
+        day = date.fromisoformat(request.GET.get("date", ""))
+        service, slots = await run_in_db_thread(
+            _availability,
+            int(request.GET.get("service", "")),
+            day,
+            request.GET.get("hold"),
+        )
+    except (ValueError, Service.DoesNotExist):
+        return _error("A valid service and date are required")
+    return JsonResponse(
+        {"status": "success", "service": service.pk, "date": day, "slots": slots}
+    )
+
+
+def _active_service(service_id):
+    return Service.objects.get(pk=service_id, is_active=True)
+
+
+@require_GET
+async def availability_stream(request):
+    """
+    Server-Sent Events of slot changes for ?service=<id>&from=<date>,
+    optionally up to &to=<date>; &hold=<token> counts the caller's own
+    held slot as free, as in availability
+    """
+    try:
+        first = date.fromisoformat(request.GET.get("from", ""))
+        last = date.fromisoformat(request.GET.get("to") or first.isoformat())
+        service = await run_in_db_thread(
+            _active_service, int(request.GET.get("service", ""))
+        )
+    except (ValueError, Service.DoesNotExist):
+        return _error("A valid service and dates are required")
+    if not 0 <= (last - first).days < STREAM_MAX_DAYS:
+        return _error(f"Watch between 1 and {STREAM_MAX_DAYS} days")
+
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    response = StreamingHttpResponse(
+        slot_stream(service, days, request.GET.get("hold")),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the events
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _bookings_freshness(request):
+    user_id, bearer, client_id = await _client_id(request)
+    return await run_in_db_thread(client_bookings_freshness, client_id)
+
+
+def _list_bookings(client_id):
+    return list(
+        Booking.objects.filter(client_id=client_id)
+        .order_by("date", "time")
+        .values(*BOOKING_FIELDS)
+    )
+
+
+def _create_booking(client_id, data):
+    """Validate and save a booking request; raises ValueError on bad input"""
+    try:
+        service = Service.objects.get(pk=int(data.get("service", "")), is_active=True)
+    except Service.DoesNotExist:
+        raise ValueError("Unknown service") from None
+    booking = Booking(
+        client_id=client_id,
+        service=service,
+        date=date.fromisoformat(data.get("date", "")),
+        time=time.fromisoformat(data.get("time", "")),
+        notes=data.get("notes", ""),
+    )
+    booking.hold_token = data.get("hold")
+    booking.save()
+    send_later(booking.notify_new_booking)
+    return booking
+
+
+@csrf_exempt
+@require_http_methods(["GET", "HEAD", "POST"])
+@conditional(_bookings_freshness, private=True)
+async def bookings(request):
+    """The client's bookings (GET) and new booking requests (POST)"""
+    user_id, bearer, client_id = await _client_id(request)
+    if user_id is None:
+        return _error("Authentication credentials were not provided.", 401)
+
+    if request.method != "POST":
+        bookings = await run_in_db_thread(_list_bookings, client_id)
+        return JsonResponse({"status": "success", "bookings": bookings})
+
+    if not bearer:
+        rejected = _csrf_failure(request)
+        if rejected is not None:
+            return rejected
+    if client_id is None:
+        return _error("Please complete your client profile to book.")
+    try:
+        data = json.loads(request.body or b"{}")
+        booking = await run_in_db_thread(_create_booking, client_id, data)
+    except (AttributeError, TypeError, ValueError):
+        return _error("A valid service, date and time are required")
+    except ValidationError as exc:
+        return _error(exc.messages[0], validation_status(exc))
+    return JsonResponse(
+        {
+            "status": "success",
+            "booking": {"id": booking.pk, "status": booking.status},
+        },
+        status=201,
+    )
@@ -0,0 +1,175 @@
+"""
+Free appointment slots for a service on a given day.
+
+Candidate start times are laid on a SLOT_MINUTES grid between opening
+and closing time. A slot is free when the whole appointment fits before
+closing and overlaps no pending or confirmed booking and no unexpired
+slot hold, which is the same rule Booking.clean() enforces on save.
+Opening hours come from the compiled EffectiveHours table, cached in the
+"bookings" namespace until the weekly hours or an exception change, and
+each day's holds are cached until a hold on that day is placed or
+released.
+"""
+
+import time
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.utils import timezone
+
+from backend.cache import namespace
+
+from .models import Booking, EffectiveHours, SlotHold
+from .scheduling import ACTIVE_STATUSES, DaySchedule, eligible_resources, to_minutes
+
+SLOT_MINUTES = getattr(settings, "BOOKING_SLOT_MINUTES", 30)
+
+# How long a slot stays held for a client in checkout
+HOLD_SECONDS = getattr(settings, "BOOKING_HOLD_SECONDS", 300)
+
+HOURS_CACHE_KEY = "hours"
+HOLDS_CACHE_KEY = "holds:{}"
+SERVICES_CACHE_KEY = "services"
+
+bookings_cache = namespace("bookings")
+
+
+def _load_hours():
+    return {
+        day: (start_time, end_time) if is_open else None
+        for day, is_open, start_time, end_time in EffectiveHours.objects.filter(
+            date__gte=timezone.localdate()
+        ).values_list("date", "is_open", "start_time", "end_time")
+    }
+
+
+def hours_on(day):
+    """
+    Return (start_time, end_time) of day, or None when closed. The
+    compiled rows from today on are cached as one table; other dates
+    are looked up directly.
+    """
+    compiled = bookings_cache.get_or_set(HOURS_CACHE_KEY, _load_hours, None)
+    if day in compiled:
+        return compiled[day]
+    return EffectiveHours.hours_on(day)
+
+
+def _taken_intervals(day):
+    return Booking.objects.filter(date=day, status__in=ACTIVE_STATUSES).values_list(
+        "time", "service__duration"
+    )
+
+
+def _load_holds(day):
+    holds = SlotHold.objects.filter(date=day, expires_at__gt=timezone.now())
+    return [
+        (start, length, token, expires_at.timestamp())
+        for start, length, token, expires_at in holds.values_list(
+            "time", "service__duration", "token", "expires_at"
+        )
+    ]
+
+
+def held_intervals(day, exclude=None):
+    """
+    (start, minutes) of the unexpired holds on day, other than the hold
+    whose token is exclude. The day's holds are cached for at most
+    HOLD_SECONDS; holds that lapse meanwhile are dropped here.
+    """
+    holds = bookings_cache.get_or_set(
+        HOLDS_CACHE_KEY.format(day.isoformat()), partial(_load_holds, day), HOLD_SECONDS
+    )
+    now = time.time()
+    return [
+        (start, length)
+        for start, length, token, expires_at in holds
+        if expires_at > now and token != exclude
+    ]
+
+
+def _candidates(hours, duration, day):
+    """
+    Yield (start time, start, end) for appointments on the SLOT_MINUTES
+    grid that fit within hours and have not started yet
+    """
+    if hours is None:
+        return
+    now = timezone.localtime()
+    if day < now.date():
+        return
+    earliest = to_minutes(now) + 1 if day == now.date() else 0
+    start_time, end_time = hours
+    start = to_minutes(start_time)
+    closing = to_minutes(end_time)
+    midnight = datetime.combine(day, datetime.min.time())
+    while start + duration <= closing:
+        if start >= earliest:
+            yield (midnight + timedelta(minutes=start)).time(), start, start + duration
+        start += SLOT_MINUTES
+
+
+def _free_slots(hours, taken, duration, day):
+    """Start times on day whose interval fits hours and avoids taken ones"""
+    taken = sorted(
+        (to_minutes(start), to_minutes(start) + length) for start, length in taken
+    )
+    return [
+        slot
+        for slot, start, end in _candidates(hours, duration, day)
+        if not any(
+            other_start < end and start < other_end for other_start, other_end in taken
+        )
+    ]
+
+
+def available_slots(service, day, hold=None, fresh=False):
+    """
+    Return the start times still bookable for service on day. The slot of
+    the caller's own hold, given by its token, counts as free. Services
+    scheduled per resource need a free practitioner and/or room as well.
+    With fresh, holds are read from the database instead of the cache,
+    whose copy in other processes may trail a change that was just made.
+    """
+    hours = hours_on(day)
+    if hours is None:
+        return []
+    eligible = eligible_resources(service)
+    if eligible:
+        schedule = DaySchedule(day, exclude_hold=hold)
+        return [
+            slot
+            for slot, start, end in _candidates(hours, service.duration, day)
+            if schedule.assign(eligible, start, end) is not None
+        ]
+    if fresh:
+        held = [
+            (start, length)
+            for start, length, token, _ in _load_holds(day)
+            if token != hold
+        ]
+    else:
+        held = held_intervals(day, exclude=hold)
+    taken = list(_taken_intervals(day)) + held
+    return _free_slots(hours, taken, service.duration, day)
+
+
+def claimable_resources(service, day, start):
+    """
+    Check one start time against bookings and holds read from the
+    database rather than the cache, for callers about to claim it.
+    Returns the resource ids to assign, an empty list for services not
+    scheduled per resource, or None when the slot cannot be had.
+    """
+    hours = hours_on(day)
+    eligible = eligible_resources(service)
+    if eligible:
+        for slot, begin, end in _candidates(hours, service.duration, day):
+            if slot == start:
+                return DaySchedule(day).assign(eligible, begin, end)
+        return None
+    taken = list(_taken_intervals(day)) + [
+        (held_start, length) for held_start, length, _, _ in _load_holds(day)
+    ]
+    return [] if start in _free_slots(hours, taken, service.duration, day) else None
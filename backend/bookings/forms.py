@@ -0,0 +1,37 @@
+from django import forms
+from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from accounts.models import Client
+
+
+class ClientRegistrationForm(UserCreationForm):
+    """
+    Sign-up form creating the user account and client profile together,
+    so booking never has to create a missing profile on the fly.
+    """
+
+    email = forms.EmailField(help_text="Used for booking confirmations")
+    first_name = forms.CharField(max_length=100)
+    last_name = forms.CharField(max_length=100)
+    phone = forms.CharField(max_length=20)
+    date_of_birth = forms.DateField()
+
+    class Meta(UserCreationForm.Meta):
+        model = User
+        fields = ("username", "email", "first_name", "last_name")
+
+    @transaction.atomic
+    def save(self, commit=True):
+        user = super().save(commit=commit)
+        if commit:
+            self.client = Client.objects.create(
+                user=user,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                email=user.email,
+                phone=self.cleaned_data["phone"],
+                date_of_birth=self.cleaned_data["date_of_birth"],
+            )
+        return user
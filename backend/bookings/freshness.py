@@ -0,0 +1,44 @@
+"""
+Freshness probes for conditional GETs of booking pages and API reads.
+Each costs at most one aggregate query, or a cache lookup.
+"""
+
+from uuid import uuid4
+
+from django.db.models import Count, Max
+
+from .availability import bookings_cache
+from .models import Booking
+
+SERVICES_VERSION_KEY = "services:version"
+
+
+def _new_version():
+    return uuid4().hex
+
+
+def services_freshness():
+    """Version token of the active services, replaced when a service changes"""
+    version = bookings_cache.get_or_set(SERVICES_VERSION_KEY, _new_version, None)
+    return f"services:{version}", None
+
+
+async def aservices_freshness():
+    version = await bookings_cache.aget_or_set(SERVICES_VERSION_KEY, _new_version, None)
+    return f"services:{version}", None
+
+
+def client_bookings_freshness(client_id):
+    """
+    Last change to a client's bookings. The count is part of the token
+    because deleting a booking does not move the latest updated_at.
+    """
+    if client_id is None:
+        return None, None
+    latest = Booking.objects.filter(client_id=client_id).aggregate(
+        updated=Max("updated_at"), total=Count("id")
+    )
+    return (
+        f"bookings:{client_id}:{latest['total']}:{latest['updated']}",
+        latest["updated"],
+    )
@@ -0,0 +1,65 @@
+"""
+Slot holds: a client who picks a time keeps it for HOLD_SECONDS while
+filling in the booking form, so the submit does not lose the slot to
+someone else and fail late in Booking.clean().
+
+Holds are rows in SlotHold, which availability and Booking.clean() read;
+availability goes through a per-day cache entry that the SlotHold
+signals drop. Nothing sweeps the table: expired holds are skipped when
+read and deleted when the next hold on the same day is placed.
+
+Checking a slot and inserting its hold are two statements, so holds on
+one day are placed one at a time, under a lock in the shared cache held
+until the hold is committed.
+"""
+
+import secrets
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import HOLD_SECONDS, bookings_cache, claimable_resources
+from .models import SlotHold
+
+# Seconds to wait for a hold being placed on the same day
+DAY_LOCK_WAIT = 5
+
+
+class SlotUnavailable(Exception):
+    """Raised when the requested slot is booked, held or outside hours"""
+
+
+def place_hold(client_id, service, day, start):
+    """
+    Hold start on day for service, with the practitioner and room it
+    would be booked with, and return the SlotHold. A client holds one
+    slot at a time, so any earlier hold of theirs is released.
+    """
+    lock = bookings_cache.lock(f"hold:{day.isoformat()}", DAY_LOCK_WAIT)
+    with lock as locked, transaction.atomic():
+        if not locked:
+            raise SlotUnavailable("Times on this day are being held, try again")
+        now = timezone.now()
+        # Reclaim the day's expired holds instead of sweeping the table
+        SlotHold.objects.filter(date=day, expires_at__lte=now).delete()
+        SlotHold.objects.filter(client_id=client_id).delete()
+        resources = claimable_resources(service, day, start)
+        if resources is None:
+            raise SlotUnavailable("This time slot is no longer available")
+        hold = SlotHold.objects.create(
+            token=secrets.token_hex(16),
+            client_id=client_id,
+            service=service,
+            date=day,
+            time=start,
+            expires_at=now + timedelta(seconds=HOLD_SECONDS),
+        )
+        hold.resources.set(resources)
+        return hold
+
+
+def release_hold(client_id, token):
+    """Release a client's hold; returns whether there was one"""
+    deleted, _ = SlotHold.objects.filter(client_id=client_id, token=token).delete()
+    return bool(deleted)
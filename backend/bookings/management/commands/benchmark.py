@@ -0,0 +1,269 @@
+import json
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.clients import SESSION_KEY
+from accounts.models import Client
+from blog.models import BlogPost
+from bookings.models import Booking, BusinessHours, Service
+from bookings.views import ClientDashboard, ClientRegistrationAPI, ServiceListView
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summarise(durations, queries):
+    durations = sorted(durations)
+    p95 = (
+        statistics.quantiles(durations, n=20)[18]
+        if len(durations) > 1
+        else durations[0]
+    )
+    return {
+        "iterations": len(durations),
+        "min_ms": round(durations[0] * 1000, 3),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "queries": max(queries),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the booking hot paths against the current database and write "
+        "JSON results that can be compared across commits. Run seed_data "
+        "first for realistic volumes."
+    )
+
+    CASES = [
+        "booking_clean",
+        "client_dashboard",
+        "service_list",
+        "admin_changelist",
+        "registration_api",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--only", nargs="+", choices=self.CASES, help="Run only these cases"
+        )
+        parser.add_argument(
+            "--output",
+            help="Where to write the JSON results (default benchmark-<commit>.json)",
+        )
+        parser.add_argument(
+            "--compare", help="Previous results file to print a comparison against"
+        )
+
+    def handle(self, *args, **options):
+        if not Service.objects.filter(is_active=True).exists():
+            raise CommandError("No active services; run seed_data first")
+        self.factory = RequestFactory()
+        commit = _git_commit()
+        results = {
+            "commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "rows": {
+                "bookings": Booking.objects.count(),
+                "clients": Client.objects.count(),
+                "services": Service.objects.count(),
+                "posts": BlogPost.objects.count(),
+            },
+            "cases": {},
+        }
+
+        # Registration writes rows; everything is rolled back at the end
+        with transaction.atomic():
+            self.superuser = User.objects.create_superuser(f"bench-{uuid4().hex[:8]}")
+            for name in options["only"] or self.CASES:
+                run = getattr(self, f"case_{name}")()
+                summary = self._measure(run, options["iterations"], options["warmup"])
+                results["cases"][name] = summary
+                self.stdout.write(
+                    f"{name:<20} median {summary['median_ms']:>9.2f} ms  "
+                    f"p95 {summary['p95_ms']:>9.2f} ms  "
+                    f"{summary['queries']:>4} queries"
+                )
+            transaction.set_rollback(True)
+
+        output = options["output"] or f"benchmark-{commit or 'local'}.json"
+        with open(output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options["compare"]:
+            with open(options["compare"]) as handle:
+                self._compare(json.load(handle), results)
+
+    def _measure(self, run, iterations, warmup):
+        for _ in range(warmup):
+            run()
+        durations, queries = [], []
+        for _ in range(iterations):
+            with ExitStack() as stack:
+                captures = [
+                    stack.enter_context(CaptureQueriesContext(connections[alias]))
+                    for alias in settings.DATABASES
+                ]
+                started = time.perf_counter()
+                run()
+                durations.append(time.perf_counter() - started)
+            queries.append(sum(len(capture) for capture in captures))
+        return _summarise(durations, queries)
+
+    def _compare(self, previous, current):
+        self.stdout.write(
+            f"\nAgainst {previous.get('commit')} ({previous.get('created_at')}):"
+        )
+        for name, summary in current["cases"].items():
+            before = previous["cases"].get(name)
+            if before is None:
+                continue
+            change = (summary["median_ms"] / before["median_ms"] - 1) * 100
+            self.stdout.write(
+                f"{name:<20} median {before['median_ms']:>9.2f} -> "
+                f"{summary['median_ms']:>9.2f} ms ({change:+.1f}%)  "
+                f"queries {before['queries']} -> {summary['queries']}"
+            )
+
+    def _request(self, path, user):
+        request = self.factory.get(path)
+        request.user = user
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def case_booking_clean(self):
+        """Validate a new booking on the busiest upcoming day"""
+        today = timezone.now().date()
+        busiest = (
+            Booking.objects.filter(date__gt=today, status__in=["pending", "confirmed"])
+            .values("date")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+            .first()
+        )
+        day = busiest["date"] if busiest else today + timedelta(days=1)
+        hours = BusinessHours.objects.filter(
+            day=day.weekday(), is_available=True
+        ).first()
+        service = Service.objects.filter(is_active=True).order_by("duration").first()
+        # The last slot of the day has to be compared against every booking
+        closing = datetime.combine(
+            day, hours.end_time if hours else datetime.min.time()
+        )
+        booking = Booking(
+            client=Client.objects.first(),
+            service=service,
+            date=day,
+            time=(closing - timedelta(minutes=service.duration)).time(),
+        )
+
+        def run():
+            try:
+                booking.clean()
+            except ValidationError:
+                pass
+
+        return run
+
+    def case_client_dashboard(self):
+        """
+        List the bookings of the client with the most history. The
+        templates live in the frontend, so the response is not rendered;
+        evaluating the queryset is the server-side cost.
+        """
+        client = (
+            Client.objects.annotate(total=Count("booking"))
+            .order_by("-total")
+            .select_related("user")
+            .first()
+        )
+        view = ClientDashboard.as_view()
+
+        def run():
+            request = self._request("/dashboard/", client.user)
+            request.session[SESSION_KEY] = client.pk
+            response = view(request)
+            list(response.context_data["bookings"])
+
+        return run
+
+    def case_service_list(self):
+        view = ServiceListView.as_view()
+        user = self.superuser
+
+        def run():
+            response = view(self._request("/services/", user))
+            list(response.context_data["services"])
+
+        return run
+
+    def case_admin_changelist(self):
+        """Render the first page of the booking changelist"""
+        model_admin = admin.site._registry[Booking]
+
+        def run():
+            request = self._request("/admin/bookings/booking/", self.superuser)
+            model_admin.changelist_view(request).render()
+
+        return run
+
+    def case_registration_api(self):
+        view = ClientRegistrationAPI.as_view()
+        factory = APIRequestFactory()
+
+        def run():
+            username = f"bench-{uuid4().hex[:12]}"
+            request = factory.post(
+                "/api/register/",
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "first_name": "Bench",
+                    "last_name": "Mark",
+                    "phone": "07000000000",
+                    "date_of_birth": "1990-01-01",
+                    "password1": "herbal-remedy-42",
+                    "password2": "herbal-remedy-42",
+                },
+                format="json",
+            )
+            # IsAuthenticatedOrReadOnly, the API default, rejects anonymous POSTs
+            force_authenticate(request, user=self.superuser)
+            response = view(request)
+            if response.status_code != 201:
+                raise CommandError(f"Registration failed: {response.data}")
+
+        return run
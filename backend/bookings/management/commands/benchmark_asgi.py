@@ -0,0 +1,83 @@
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings.models import Booking
+
+from .loadtest import _load_fixtures, _percentile, parse_mix, run_load
+
+DEFAULT_MIX = "browse=40,availability=40,dashboard=20"
+STACKS = {"sync": "/api/", "async": "/api/async/"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the same booking-flow load against the sync (DRF) and native "
+        "async API views at rising concurrency in one process, and compare "
+        "throughput and p95 latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            default="10,50,100,200",
+            help="Comma-separated concurrency levels",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=10.0, help="Seconds per run"
+        )
+        parser.add_argument("--mix", default=DEFAULT_MIX)
+        parser.add_argument("--clients", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Also write the results as JSON here")
+
+    def handle(self, *args, **options):
+        from backend.asgi import application
+
+        for name in ("backend.instrumentation", "django.request"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+        settings.EMAIL_BACKEND = "django.core.mail.backends.dummy.EmailBackend"
+        mix = parse_mix(options["mix"])
+        fixtures = _load_fixtures(options["clients"])
+        levels = [int(level) for level in options["concurrency"].split(",")]
+
+        self.stdout.write(
+            f"{'concurrency':>11}{'stack':>7}{'req/s':>9}{'p95':>9}{'err%':>7}"
+        )
+        results = []
+        for concurrency in levels:
+            for stack, api in STACKS.items():
+                stats, elapsed = asyncio.run(
+                    run_load(
+                        application,
+                        fixtures,
+                        mix,
+                        concurrency,
+                        options["duration"],
+                        options["seed"],
+                        api,
+                    )
+                )
+                if stats.created:
+                    Booking.objects.filter(pk__in=stats.created).delete()
+                latencies = [s for values in stats.latencies.values() for s in values]
+                errors = sum(stats.errors.values())
+                result = {
+                    "concurrency": concurrency,
+                    "stack": stack,
+                    "throughput_rps": round(len(latencies) / elapsed, 1),
+                    "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+                    "error_rate": round(errors / max(len(latencies), 1), 4),
+                }
+                results.append(result)
+                self.stdout.write(
+                    f"{concurrency:>11}{stack:>7}{result['throughput_rps']:>9}"
+                    f"{result['p95_ms']:>9}{result['error_rate'] * 100:>7.1f}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(results, handle, indent=2)
@@ -0,0 +1,184 @@
+"""
+Compare the REST framework ModelSerializers with the row-based read
+serializers on listings of 1k and 10k rows.
+
+Each case serializes the first N rows of a model both ways, checks the
+outputs are identical and reports the median time of each, plus the
+time to render the JSON in one piece and streamed. Missing rows are
+bulk-created inside a transaction that is rolled back at the end.
+"""
+
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import Client
+from accounts.read_serializers import ClientReadSerializer
+from accounts.serializers import ClientSerializer
+from blog.models import BlogPost
+from blog.read_serializers import BlogPostReadSerializer
+from blog.serializers import BlogPostSerializer
+from bookings.models import Booking, Service
+from bookings.read_serializers import BookingReadSerializer, ServiceReadSerializer
+from bookings.serializers import BookingSerializer, ServiceSerializer
+
+CASES = {
+    "service": (Service, ServiceSerializer, ServiceReadSerializer),
+    "booking": (Booking, BookingSerializer, BookingReadSerializer),
+    "blogpost": (BlogPost, BlogPostSerializer, BlogPostReadSerializer),
+    "client": (Client, ClientSerializer, ClientReadSerializer),
+}
+
+
+def _median_ms(run, iterations):
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - started)
+    return round(statistics.median(durations) * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ModelSerializer against the row-based read serializers for "
+        "services, bookings, blog posts and clients at the given row counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            default="1000,10000",
+            help="Comma-separated row counts to serialize",
+        )
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--only", nargs="+", choices=sorted(CASES))
+        parser.add_argument("--output", help="Also write the results as JSON here")
+
+    def handle(self, *args, **options):
+        counts = [int(count) for count in options["rows"].split(",")]
+        results = []
+        with transaction.atomic():
+            self.fill(max(counts))
+            for name in options["only"] or CASES:
+                model, serializer, read_serializer = CASES[name]
+                for count in counts:
+                    results.append(
+                        self.measure(
+                            name,
+                            model.objects.order_by("pk")[:count],
+                            serializer,
+                            read_serializer,
+                            options["iterations"],
+                        )
+                    )
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'case':<10}{'rows':>7}{'model ms':>11}{'rows ms':>10}"
+            f"{'speedup':>9}{'json ms':>10}{'stream ms':>11}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['case']:<10}{result['rows']:>7}"
+                f"{result['model_serializer_ms']:>11.1f}"
+                f"{result['read_serializer_ms']:>10.1f}"
+                f"{result['speedup']:>8.1f}x"
+                f"{result['model_json_ms']:>10.1f}"
+                f"{result['read_stream_ms']:>11.1f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(results, handle, indent=2)
+
+    def measure(self, name, queryset, serializer, read_serializer, iterations):
+        expected = json.loads(json.dumps(serializer(queryset, many=True).data))
+        if read_serializer().many(queryset) != expected:
+            raise AssertionError(f"{name}: the read serializer's output differs")
+
+        model_ms = _median_ms(lambda: serializer(queryset, many=True).data, iterations)
+        read_ms = _median_ms(lambda: read_serializer().many(queryset), iterations)
+        return {
+            "case": name,
+            "rows": len(expected),
+            "model_serializer_ms": model_ms,
+            "read_serializer_ms": read_ms,
+            "speedup": round(model_ms / read_ms, 1) if read_ms else None,
+            "model_json_ms": _median_ms(
+                lambda: json.dumps(serializer(queryset, many=True).data), iterations
+            ),
+            "read_stream_ms": _median_ms(
+                lambda: b"".join(read_serializer().stream(queryset, "rows")),
+                iterations,
+            ),
+        }
+
+    def fill(self, count):
+        """Bulk-create rows until every model has count of them"""
+        prefix = uuid4().hex[:8]
+        today = date.today()
+
+        def missing(model):
+            return max(count - model.objects.count(), 0)
+
+        users = User.objects.bulk_create(
+            User(username=f"bench-{prefix}-{number}")
+            for number in range(max(missing(Client), 1))
+        )
+        Client.objects.bulk_create(
+            Client(
+                user=user,
+                first_name="Bench",
+                last_name=str(number),
+                email=f"{user.username}@example.com",
+                phone="555",
+                date_of_birth=date(1990, 1, 1),
+            )
+            for number, user in enumerate(users[: missing(Client)])
+        )
+        Service.objects.bulk_create(
+            Service(
+                name=f"Bench {number}",
+                description="Synthetic service",
+                duration=60,
+                price="45.50",
+            )
+            for number in range(missing(Service))
+        )
+        client = Client.objects.first()
+        service = Service.objects.first()
+        Booking.objects.bulk_create(
+            (
+                Booking(
+                    client=client,
+                    service=service,
+                    date=today + timedelta(days=number % 365),
+                    time="10:00",
+                    notes="Synthetic booking",
+                )
+                for number in range(missing(Booking))
+            ),
+            batch_size=2000,
+        )
+        BlogPost.objects.bulk_create(
+            (
+                BlogPost(
+                    title=f"Bench {number}",
+                    slug=f"bench-{prefix}-{number}",
+                    author=users[0],
+                    content="Synthetic post " * 20,
+                    featured_image=f"blog_images/bench-{number}.jpg",
+                    published_date=today,
+                    status="published",
+                    categories="herbs",
+                )
+                for number in range(missing(BlogPost))
+            ),
+            batch_size=2000,
+        )
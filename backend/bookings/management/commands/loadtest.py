@@ -0,0 +1,333 @@
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.models import Client
+from accounts.tokens import issue_access_token
+from blog.models import BlogPost
+from bookings.models import Booking, Service
+
+DEFAULT_MIX = "browse=30,availability=30,book=10,dashboard=15,blog=15"
+
+
+class ASGIClient:
+    """Minimal HTTP client calling an ASGI application in process"""
+
+    def __init__(self, application, host="localhost"):
+        self.application = application
+        self.host = host.encode()
+
+    async def request(self, method, path, query=None, headers=None, body=b""):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(query or {}).encode(),
+            "root_path": "",
+            "headers": [(b"host", self.host)]
+            + [
+                (name.encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Nobody disconnects; Django cancels this once it has responded
+            await asyncio.Future()
+
+        response = {"status": None, "headers": [], "body": []}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.application(scope, receive, send)
+        response["body"] = b"".join(response["body"])
+        return response
+
+    async def get(self, path, query=None, headers=None):
+        return await self.request("GET", path, query, headers)
+
+    async def post_json(self, path, data, headers=None):
+        body = json.dumps(data).encode()
+        headers = {
+            **(headers or {}),
+            "content-type": "application/json",
+            "content-length": str(len(body)),
+        }
+        return await self.request("POST", path, None, headers, body)
+
+
+def _percentile(values, percent):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.conflicts = defaultdict(int)
+        self.created = []
+
+    def record(self, endpoint, started, response):
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if response["status"] == 409:
+            self.conflicts[endpoint] += 1
+        elif response["status"] >= 400:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            count = len(latencies)
+            rows[endpoint] = {
+                "requests": count,
+                "throughput_rps": round(count / elapsed, 1),
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+                "error_rate": round(self.errors[endpoint] / count, 4),
+                "conflict_rate": round(self.conflicts[endpoint] / count, 4),
+            }
+        return rows
+
+
+class Scenarios:
+    """User journeys; each issues one or more requests and records them"""
+
+    def __init__(self, client, stats, fixtures, rng, api="/api/"):
+        self.api = api
+        self.client = client
+        self.stats = stats
+        self.fixtures = fixtures
+        self.random = rng
+
+    async def _call(self, endpoint, method, *args):
+        started = time.perf_counter()
+        response = await getattr(self.client, method)(*args)
+        self.stats.record(endpoint, started, response)
+        return response
+
+    def _auth(self):
+        return {
+            "authorization": f"Bearer {self.random.choice(self.fixtures['tokens'])}"
+        }
+
+    def _pick_slot_query(self):
+        day = timezone.now().date() + timedelta(days=self.random.randint(1, 30))
+        return {"service": self.random.choice(self.fixtures["services"]), "date": day}
+
+    async def browse(self):
+        path = f"{self.api}services/"
+        await self._call(f"GET {path}", "get", path)
+
+    async def availability(self):
+        path = f"{self.api}availability/"
+        await self._call(f"GET {path}", "get", path, self._pick_slot_query())
+
+    async def book(self):
+        """Look up free slots then try to book one, as the booking page does"""
+        query = self._pick_slot_query()
+        path = f"{self.api}availability/"
+        response = await self._call(f"GET {path}", "get", path, query)
+        if response["status"] != 200:
+            return
+        slots = json.loads(response["body"])["slots"]
+        if not slots:
+            return
+        path = f"{self.api}bookings/"
+        response = await self._call(
+            f"POST {path}",
+            "post_json",
+            path,
+            {
+                "service": query["service"],
+                "date": query["date"].isoformat(),
+                "time": self.random.choice(slots),
+            },
+            self._auth(),
+        )
+        if response["status"] == 201:
+            self.stats.created.append(json.loads(response["body"])["booking"]["id"])
+
+    async def dashboard(self):
+        path = f"{self.api}bookings/"
+        await self._call(f"GET {path}", "get", path, None, self._auth())
+
+    async def blog(self):
+        choice = self.random.random()
+        if choice < 0.4:
+            await self._call("GET /blog/feed/rss/", "get", "/blog/feed/rss/")
+        elif choice < 0.7:
+            await self._call("GET /blog/facets/", "get", "/blog/facets/")
+        elif self.fixtures["posts"]:
+            slug = self.random.choice(self.fixtures["posts"])
+            await self._call(
+                "GET /blog/posts/<slug>/related/",
+                "get",
+                f"/blog/posts/{slug}/related/",
+            )
+
+
+def _load_fixtures(clients):
+    services = list(Service.objects.filter(is_active=True).values_list("pk", flat=True))
+    if not services:
+        raise CommandError("No active services; run seed_data first")
+    users = [
+        client.user
+        for client in Client.objects.select_related("user").order_by("?")[:clients]
+    ]
+    if not users:
+        raise CommandError("No clients; run seed_data first")
+    posts = list(
+        BlogPost.objects.filter(status="published")
+        .order_by("-published_date")
+        .values_list("slug", flat=True)[:500]
+    )
+    return {
+        "services": services,
+        "tokens": [issue_access_token(user) for user in users],
+        "posts": posts,
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("browse", "availability", "book", "dashboard", "blog"):
+            raise CommandError(f"Unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run_load(
+    application, fixtures, mix, concurrency, duration, seed, api="/api/"
+):
+    """Run the scenario mix at the given concurrency; returns (stats, elapsed)"""
+    client = ASGIClient(application)
+    stats = Stats()
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def worker(number):
+        rng = random.Random(seed + number)
+        scenarios = Scenarios(client, stats, fixtures, rng, api)
+        while time.perf_counter() < deadline:
+            await getattr(scenarios, rng.choices(names, weights)[0])()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the ASGI application in process with weighted booking-flow "
+        "scenarios and report throughput and latency percentiles per "
+        "endpoint. Bookings it creates are deleted afterwards unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+        parser.add_argument(
+            "--mix",
+            default=DEFAULT_MIX,
+            help=f"Scenario weights (default {DEFAULT_MIX})",
+        )
+        parser.add_argument(
+            "--clients", type=int, default=100, help="Distinct clients to act as"
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Also write the results as JSON here")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument(
+            "--api",
+            default="/api/",
+            help="API prefix; /api/async/ targets the native async views",
+        )
+
+    def handle(self, *args, **options):
+        from backend.asgi import application
+
+        # Per-request log lines would drown the report
+        for name in ("backend.instrumentation", "django.request"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+        # Booking emails would be printed by the development mail backend
+        settings.EMAIL_BACKEND = "django.core.mail.backends.dummy.EmailBackend"
+        mix = parse_mix(options["mix"])
+        fixtures = _load_fixtures(options["clients"])
+        stats, elapsed = asyncio.run(
+            run_load(
+                application,
+                fixtures,
+                mix,
+                options["concurrency"],
+                options["duration"],
+                options["seed"],
+                options["api"],
+            )
+        )
+        self.report(stats, elapsed, options)
+
+        if stats.created and not options["keep"]:
+            Booking.objects.filter(pk__in=stats.created).delete()
+
+    def report(self, stats, elapsed, options):
+        rows = stats.summary(elapsed)
+        total = sum(row["requests"] for row in rows.values())
+        self.stdout.write(
+            f"{'endpoint':<34}{'reqs':>7}{'rps':>9}{'p50':>9}{'p95':>9}"
+            f"{'p99':>9}{'err%':>7}{'409%':>7}"
+        )
+        for endpoint, row in rows.items():
+            self.stdout.write(
+                f"{endpoint:<34}{row['requests']:>7}{row['throughput_rps']:>9}"
+                f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+                f"{row['error_rate'] * 100:>7.1f}{row['conflict_rate'] * 100:>7.1f}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} requests in {elapsed:.1f}s at concurrency "
+                f"{options['concurrency']}: {total / elapsed:.1f} req/s"
+            )
+        )
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(
+                    {
+                        "concurrency": options["concurrency"],
+                        "duration_s": round(elapsed, 2),
+                        "throughput_rps": round(total / elapsed, 1),
+                        "endpoints": rows,
+                    },
+                    handle,
+                    indent=2,
+                )
@@ -0,0 +1,192 @@
+"""
+Measure how long a fresh worker takes to boot and answer its first request.
+
+A child interpreter is started with -X importtime and goes through the
+same steps as a WSGI worker: django.setup(), building the handler and
+loading the URLconf, then serving one request. Its import log is split
+at each step, so modules imported at startup and modules first imported
+by the request are reported separately.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Budget for the summed self time of every module imported at startup
+IMPORT_BUDGET_MS = getattr(settings, "STARTUP_IMPORT_BUDGET_MS", 400)
+
+# Modules that only some requests or jobs need; they must not load at
+# startup. django.core.mail itself is imported by Django's logging setup,
+# but the SMTP backend (smtplib, via get_connection) is not.
+LAZY_MODULES = ("rest_framework.views", "PIL.Image", "smtplib", "numpy")
+
+PHASE_MARKER = "# phase "
+
+CHILD_SCRIPT = """
+import io, sys, time
+started = time.perf_counter()
+def phase(name):
+    sys.stderr.write(f"{marker}{{name}} {{(time.perf_counter() - started) * 1000:.1f}}\\n")
+    sys.stderr.flush()
+import django
+django.setup()
+phase("setup")
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+phase("urlconf")
+path = {path!r}
+if path:
+    environ = {{
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": {host!r},
+        "SERVER_PORT": "80",
+        "HTTP_HOST": {host!r},
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }}
+    status = []
+    body = application(environ, lambda code, headers: status.append(code))
+    b"".join(body)
+    phase("request")
+    sys.stdout.write(status[0])
+"""
+
+
+def parse_importtime(lines):
+    """
+    Split -X importtime output into phases.
+    Returns {phase: [(module, self_us, cumulative_us), ...]} and
+    {phase: elapsed_ms}, where a phase holds the imports made before
+    its marker.
+    """
+    phases, elapsed, current = {}, {}, []
+    for line in lines:
+        if line.startswith(PHASE_MARKER):
+            name, milliseconds = line[len(PHASE_MARKER) :].split()
+            phases[name] = current
+            elapsed[name] = float(milliseconds)
+            current = []
+        elif line.startswith("import time:") and "|" in line:
+            own, cumulative, module = line[len("import time:") :].split("|")
+            if own.strip().isdigit():
+                current.append((module.strip(), int(own), int(cumulative)))
+    return phases, elapsed
+
+
+def profile_startup(path=None, host=None):
+    """
+    Boot a worker in a child process and return its import profile:
+    the phases from parse_importtime, the wall time until the child
+    exited and the first request's status line.
+    """
+    if host is None:
+        host = next(
+            (name for name in settings.ALLOWED_HOSTS if "*" not in name),
+            "localhost",
+        )
+    script = CHILD_SCRIPT.format(marker=PHASE_MARKER, path=path, host=host)
+    started = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=settings.BASE_DIR,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if child.returncode:
+        raise RuntimeError(child.stderr.splitlines()[-1] if child.stderr else "failed")
+    phases, elapsed = parse_importtime(child.stderr.splitlines())
+    return {
+        "phases": phases,
+        "elapsed_ms": elapsed,
+        "wall_ms": wall_ms,
+        "status": child.stdout.strip(),
+    }
+
+
+def startup_imports(profile):
+    """Modules imported before the first request"""
+    return profile["phases"]["setup"] + profile["phases"]["urlconf"]
+
+
+def import_ms(imports):
+    return sum(own for _, own, _ in imports) / 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot a worker in a fresh interpreter with -X importtime and report "
+        "the slowest imports at startup and during the first request, the "
+        "import total against the budget and the time to first request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/services/",
+            help="Path of the first request; empty to stop after startup",
+        )
+        parser.add_argument("--host", help="Host header of the first request")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--output", help="Also write the results as JSON here")
+
+    def handle(self, *args, **options):
+        profile = profile_startup(options["path"] or None, options["host"])
+        startup = startup_imports(profile)
+        first_request = profile["phases"].get("request", [])
+
+        for title, imports in (("startup", startup), ("first request", first_request)):
+            self.stdout.write(
+                f"\nSlowest imports at {title} "
+                f"({len(imports)} modules, {import_ms(imports):.1f} ms self)"
+            )
+            self.stdout.write(f"{'self ms':>9}{'cumul ms':>10}  module")
+            slowest = sorted(imports, key=lambda row: row[2], reverse=True)
+            for module, own, cumulative in slowest[: options["top"]]:
+                self.stdout.write(
+                    f"{own / 1000:>9.1f}{cumulative / 1000:>10.1f}  {module}"
+                )
+
+        loaded = {module for module, _, _ in startup}
+        eager = [module for module in LAZY_MODULES if module in loaded]
+        total = import_ms(startup)
+        self.stdout.write("")
+        for name, milliseconds in profile["elapsed_ms"].items():
+            self.stdout.write(f"{name:>10} done at {milliseconds:8.1f} ms")
+        if profile["status"]:
+            self.stdout.write(
+                f"First request {options['path']}: {profile['status']}, "
+                f"{profile['wall_ms']:.1f} ms after the process started"
+            )
+        self.stdout.write(
+            f"Startup imports: {total:.1f} ms (budget {IMPORT_BUDGET_MS} ms)"
+        )
+        if eager:
+            self.stdout.write(
+                self.style.WARNING(f"Loaded at startup: {', '.join(eager)}")
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(
+                    {
+                        "startup_import_ms": round(total, 1),
+                        "first_request_import_ms": round(import_ms(first_request), 1),
+                        "elapsed_ms": profile["elapsed_ms"],
+                        "wall_ms": round(profile["wall_ms"], 1),
+                        "eager_modules": eager,
+                    },
+                    handle,
+                    indent=2,
+                )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from bookings.availability import HOURS_CACHE_KEY, bookings_cache
+from bookings.models import HOURS_HORIZON_DAYS, EffectiveHours
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile business hours and schedule exceptions into the effective "
+        "hours of the next days; run daily to roll the horizon forward"
+    )
+
+    def handle(self, *args, **options):
+        total = EffectiveHours.rebuild()
+        bookings_cache.delete(HOURS_CACHE_KEY)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compiled {total} dates (horizon {HOURS_HORIZON_DAYS} days)"
+            )
+        )
@@ -0,0 +1,281 @@
+import csv
+import io
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import Client
+from backend.cache import namespace
+from blog.facets import invalidate_facets
+from blog.feeds import invalidate_feeds
+from blog.models import BlogFacetCount, BlogPost
+from blog.sitemaps import invalidate_shard_index
+from bookings.models import Booking, BusinessHours, EffectiveHours, Service
+
+FIRST_NAMES = (
+    "Ava Ben Chloe Daniel Ella Finn Grace Harry Isla Jack Lily Leo Mia Noah "
+    "Olivia Oscar Poppy Rosie Sam Sophie Theo Willow Zara Arthur Freya"
+).split()
+LAST_NAMES = (
+    "Smith Jones Taylor Brown Williams Wilson Johnson Davies Patel Wright "
+    "Walker Evans Thomas Roberts Green Hall Wood Hughes Clarke Turner"
+).split()
+HERBS = (
+    "nettle chamomile ginger turmeric elderberry lavender peppermint "
+    "valerian echinacea calendula dandelion ashwagandha rosemary thyme "
+    "sage fennel yarrow hawthorn lemon balm milk thistle"
+).split()
+WORDS = (
+    "tea tincture infusion remedy sleep digestion anxiety immune skin liver "
+    "stress season harvest dosage blend root leaf flower recipe balance "
+    "inflammation circulation energy calm support daily traditional study"
+).split()
+SERVICES = [
+    ("Initial Consultation", 90, "85.00"),
+    ("Follow-up Consultation", 45, "50.00"),
+    ("Herbal Prescription Review", 30, "35.00"),
+    ("Nutrition and Lifestyle Session", 60, "60.00"),
+    ("Stress and Sleep Programme", 60, "65.00"),
+    ("Digestive Health Assessment", 60, "65.00"),
+    ("Skin Health Consultation", 45, "55.00"),
+    ("Women's Health Consultation", 60, "70.00"),
+]
+
+# Slots are laid on this grid between opening and closing time
+SLOT_MINUTES = 30
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic users, clients, services, business hours, "
+        "bookings and blog posts for benchmarking"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=10000)
+        parser.add_argument("--bookings", type=int, default=1000000)
+        parser.add_argument("--posts", type=int, default=5000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = f"seed{timezone.now():%Y%m%d%H%M%S}"
+
+        hours = self.seed_business_hours()
+        services = self.seed_services()
+        client_ids = self.seed_clients(options["clients"])
+        self.seed_bookings(options["bookings"], hours, services, client_ids)
+        self.seed_posts(options["posts"])
+        # bulk_create sends no signals, so drop whatever was cached before
+        namespace("bookings").invalidate()
+        self.stdout.write(self.style.SUCCESS("Seeding finished"))
+
+    def seed_business_hours(self):
+        if not BusinessHours.objects.exists():
+            BusinessHours.objects.bulk_create(
+                BusinessHours(day=day, start_time=time(9), end_time=time(17))
+                for day in range(6)
+            )
+            EffectiveHours.rebuild()
+        return {
+            hours.day: hours
+            for hours in BusinessHours.objects.filter(is_available=True)
+        }
+
+    def seed_services(self):
+        existing = set(Service.objects.values_list("name", flat=True))
+        Service.objects.bulk_create(
+            Service(
+                name=name,
+                description=f"{name} with a qualified medical herbalist.",
+                duration=duration,
+                price=price,
+            )
+            for name, duration, price in SERVICES
+            if name not in existing
+        )
+        return list(
+            Service.objects.filter(is_active=True).values_list("id", "duration")
+        )
+
+    def seed_clients(self, count):
+        # One hash shared by every seeded user; hashing per user would take hours
+        password = make_password("seeded-password")
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(
+                        username=f"{self.prefix}-{created + n}",
+                        email=f"{self.prefix}-{created + n}@example.com",
+                        first_name=self.random.choice(FIRST_NAMES),
+                        last_name=self.random.choice(LAST_NAMES),
+                        password=password,
+                    )
+                    for n in range(size)
+                )
+                if users[0].pk is None:
+                    users = list(
+                        User.objects.filter(
+                            username__startswith=f"{self.prefix}-"
+                        ).order_by("id")[created : created + size]
+                    )
+                Client.objects.bulk_create(
+                    Client(
+                        user_id=user.pk,
+                        first_name=user.first_name,
+                        last_name=user.last_name,
+                        email=user.email,
+                        phone=f"07{self.random.randrange(10**9):09d}",
+                        date_of_birth=date(1950, 1, 1)
+                        + timedelta(days=self.random.randrange(20000)),
+                        newsletter_opt_in=self.random.random() < 0.4,
+                    )
+                    for user in users
+                )
+            created += size
+            self.stdout.write(f"  clients: {created}/{count}")
+        return list(
+            Client.objects.filter(user__username__startswith=f"{self.prefix}-")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def _booking_rows(self, count, hours, services, client_ids):
+        """
+        Yield booking rows day by day, newest first, starting two months
+        ahead. Bookings on a day never overlap, so the data stays valid for
+        the overlap check; older days are mostly completed or cancelled.
+        """
+        today = timezone.now().date()
+        now = timezone.now()
+        day = today + timedelta(days=60)
+        produced = 0
+        while produced < count:
+            opening = hours.get(day.weekday())
+            if opening is not None:
+                cursor = datetime.combine(day, opening.start_time)
+                closing = datetime.combine(day, opening.end_time)
+                while produced < count:
+                    service_id, duration = self.random.choice(services)
+                    end = cursor + timedelta(minutes=duration)
+                    if end > closing:
+                        break
+                    if self.random.random() < 0.7:
+                        if day >= today:
+                            status = self.random.choice(("pending", "confirmed"))
+                        else:
+                            status = self.random.choices(
+                                ("completed", "cancelled"), (9, 1)
+                            )[0]
+                        yield (
+                            self.random.choice(client_ids),
+                            service_id,
+                            day,
+                            cursor.time(),
+                            status,
+                            False,
+                            "",
+                            now,
+                            now,
+                        )
+                        produced += 1
+                        cursor = end
+                    else:
+                        cursor += timedelta(minutes=SLOT_MINUTES)
+            day -= timedelta(days=1)
+
+    def seed_bookings(self, count, hours, services, client_ids):
+        if not count or not client_ids or not services or not hours:
+            return
+        rows = self._booking_rows(count, hours, services, client_ids)
+        columns = [
+            "client_id",
+            "service_id",
+            "date",
+            "time",
+            "status",
+            "created_by_admin",
+            "notes",
+            "created_at",
+            "updated_at",
+        ]
+        written = 0
+        while written < count:
+            batch = [row for _, row in zip(range(self.batch_size), rows)]
+            if not batch:
+                break
+            if connection.vendor == "postgresql":
+                self._copy(Booking._meta.db_table, columns, batch)
+            else:
+                Booking.objects.bulk_create(
+                    Booking(**dict(zip(columns, row))) for row in batch
+                )
+            written += len(batch)
+            if written % (self.batch_size * 20) == 0 or written == count:
+                self.stdout.write(f"  bookings: {written}/{count}")
+
+    def _copy(self, table, columns, rows):
+        """
+        Load rows with COPY, far faster than INSERT on PostgreSQL. In CSV
+        format an unquoted empty field is NULL, so empty strings are
+        written quoted and only the fields kept numeric stay bare.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    def seed_posts(self, count):
+        if not count:
+            return
+        author = User.objects.filter(is_staff=True).first() or User.objects.first()
+        today = timezone.now().date()
+        categories = [key for key, label in BlogPost.CATEGORIES]
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            posts = []
+            for n in range(created, created + size):
+                herb = self.random.choice(HERBS)
+                published = self.random.random() < 0.9
+                paragraphs = [
+                    " ".join(self.random.choices(WORDS + [herb] * 5, k=80))
+                    for _ in range(self.random.randint(3, 12))
+                ]
+                posts.append(
+                    BlogPost(
+                        title=f"{herb.title()} for {self.random.choice(WORDS)} ({n})",
+                        slug=f"{self.prefix}-post-{n}",
+                        author=author,
+                        content="\n\n".join(paragraphs),
+                        status="published" if published else "draft",
+                        published_date=(
+                            today - timedelta(days=self.random.randrange(1500))
+                            if published
+                            else None
+                        ),
+                        categories=self.random.choice(categories),
+                    )
+                )
+            BlogPost.objects.bulk_create(posts)
+            created += size
+            self.stdout.write(f"  posts: {created}/{count}")
+        # bulk_create skips BlogPost.save(), so rebuild the derived data
+        BlogFacetCount.rebuild()
+        invalidate_facets()
+        invalidate_feeds()
+        invalidate_shard_index()
+        namespace("sitemap").invalidate()
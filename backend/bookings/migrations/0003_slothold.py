@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_client_trigram_indexes"),
+        ("bookings", "0002_alter_booking_client_booking_created_by_admin_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "token",
+                    models.CharField(
+                        help_text="Secret the client books the slot with",
+                        max_length=32,
+                        unique=True,
+                    ),
+                ),
+                ("date", models.DateField(help_text="Date of the held appointment")),
+                (
+                    "time",
+                    models.TimeField(help_text="Start time of the held appointment"),
+                ),
+                ("expires_at", models.DateTimeField(help_text="When the hold lapses")),
+                (
+                    "client",
+                    models.ForeignKey(
+                        help_text="The client holding the slot",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slot_holds",
+                        to="accounts.client",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        help_text="The service being booked; its duration sets the interval",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="bookings.service",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["date", "expires_at"], name="bookings_hold_day_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_client_trigram_indexes"),
+        ("bookings", "0003_slothold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Resource",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(help_text="Name shown to staff", max_length=100),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("practitioner", "Practitioner"),
+                            ("room", "Treatment room"),
+                        ],
+                        help_text="What sort of resource this is",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Whether new appointments can use this resource",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["kind", "pk"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ResourceHours",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "day",
+                    models.IntegerField(
+                        choices=[
+                            (0, "Monday"),
+                            (1, "Tuesday"),
+                            (2, "Wednesday"),
+                            (3, "Thursday"),
+                            (4, "Friday"),
+                            (5, "Saturday"),
+                            (6, "Sunday"),
+                        ],
+                        help_text="Day of the week",
+                    ),
+                ),
+                (
+                    "start_time",
+                    models.TimeField(help_text="When the resource becomes bookable"),
+                ),
+                (
+                    "end_time",
+                    models.TimeField(
+                        help_text="When the resource stops being bookable"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Resource hours",
+                "ordering": ["resource", "day"],
+            },
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="resources",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Practitioner and room assigned when the booking was made",
+                related_name="bookings",
+                to="bookings.resource",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="resources",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Practitioners and rooms that can deliver the service; each booking takes one free resource of every kind listed",
+                related_name="services",
+                to="bookings.resource",
+            ),
+        ),
+        migrations.AddField(
+            model_name="slothold",
+            name="resources",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Practitioner and room kept for the booking",
+                related_name="holds",
+                to="bookings.resource",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["date", "status"], name="bookings_day_status_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="resourcehours",
+            name="resource",
+            field=models.ForeignKey(
+                help_text="The practitioner or room",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="hours",
+                to="bookings.resource",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="resourcehours",
+            constraint=models.UniqueConstraint(
+                fields=("resource", "day"), name="bookings_resource_day_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0004_resources"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EffectiveHours",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("is_open", models.BooleanField()),
+                ("start_time", models.TimeField(null=True)),
+                ("end_time", models.TimeField(null=True)),
+            ],
+            options={
+                "verbose_name_plural": "Effective hours",
+                "ordering": ["date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ScheduleException",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateField(
+                        help_text="Date the exception applies to", unique=True
+                    ),
+                ),
+                (
+                    "is_closed",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Whether no appointments can be booked on this date",
+                    ),
+                ),
+                (
+                    "start_time",
+                    models.TimeField(
+                        blank=True,
+                        help_text="Start time for appointments when open",
+                        null=True,
+                    ),
+                ),
+                (
+                    "end_time",
+                    models.TimeField(
+                        blank=True,
+                        help_text="End time for appointments when open",
+                        null=True,
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        blank=True,
+                        help_text="Why the hours differ, e.g. a holiday",
+                        max_length=200,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+            },
+        ),
+    ]
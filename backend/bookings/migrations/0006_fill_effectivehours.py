@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+# Days compiled ahead; later dates are compiled on read until the next rebuild
+HORIZON_DAYS = 180
+
+
+def fill_effective_hours(apps, schema_editor):
+    """Compile the horizon from the weekly hours that already exist"""
+    BusinessHours = apps.get_model("bookings", "BusinessHours")
+    ScheduleException = apps.get_model("bookings", "ScheduleException")
+    EffectiveHours = apps.get_model("bookings", "EffectiveHours")
+
+    start = timezone.localdate()
+    dates = [start + timedelta(days=offset) for offset in range(HORIZON_DAYS)]
+    weekly = {
+        day: (start_time, end_time)
+        for day, start_time, end_time in BusinessHours.objects.filter(
+            is_available=True
+        ).values_list("day", "start_time", "end_time")
+    }
+    exceptions = {
+        day: None if is_closed else (start_time, end_time)
+        for day, is_closed, start_time, end_time in ScheduleException.objects.filter(
+            date__range=(dates[0], dates[-1])
+        ).values_list("date", "is_closed", "start_time", "end_time")
+    }
+
+    rows = []
+    for day in dates:
+        hours = exceptions[day] if day in exceptions else weekly.get(day.weekday())
+        start_time, end_time = hours or (None, None)
+        rows.append(
+            EffectiveHours(
+                date=day,
+                is_open=hours is not None,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        )
+    EffectiveHours.objects.filter(date__in=dates).delete()
+    EffectiveHours.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0005_effective_hours"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_effective_hours, migrations.RunPython.noop),
+    ]
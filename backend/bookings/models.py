@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
-from accounts.models import Client
+from accounts.models import Client, ClientHealthRecord
 
 
 class BusinessHours(models.Model):
@@ -43,13 +43,219 @@ class BusinessHours(models.Model):
 
     @classmethod
     def is_time_available(cls, date, time):
-        """Check if a given time is within business hours"""
-        day_of_week = date.weekday()
-        try:
-            hours = cls.objects.get(day=day_of_week, is_available=True)
-            return hours.start_time <= time <= hours.end_time
-        except cls.DoesNotExist:
-            return False
+        """Check if a given time is within the opening hours of date"""
+        hours = EffectiveHours.hours_on(date)
+        return hours is not None and hours[0] <= time <= hours[1]
+
+
+class ScheduleException(models.Model):
+    """
+    A date on which the weekly business hours do not apply: a closure
+    such as a holiday, or different hours such as an extended day.
+    """
+
+    date = models.DateField(unique=True, help_text="Date the exception applies to")
+    is_closed = models.BooleanField(
+        default=True, help_text="Whether no appointments can be booked on this date"
+    )
+    start_time = models.TimeField(
+        null=True, blank=True, help_text="Start time for appointments when open"
+    )
+    end_time = models.TimeField(
+        null=True, blank=True, help_text="End time for appointments when open"
+    )
+    reason = models.CharField(
+        max_length=200, blank=True, help_text="Why the hours differ, e.g. a holiday"
+    )
+
+    class Meta:
+        ordering = ["date"]
+
+    def clean(self):
+        """Open exceptions need their own hours"""
+        if self.is_closed:
+            return
+        if not self.start_time or not self.end_time:
+            raise ValidationError("Give the hours of a date that is not closed")
+        if self.start_time >= self.end_time:
+            raise ValidationError("The start time must be before the end time")
+
+    def __str__(self):
+        if self.is_closed:
+            return f"{self.date}: closed"
+        return f"{self.date}: {self.start_time} - {self.end_time}"
+
+
+# Days ahead, from today, for which EffectiveHours rows are kept
+HOURS_HORIZON_DAYS = getattr(settings, "BOOKING_HOURS_HORIZON_DAYS", 180)
+
+
+class EffectiveHours(models.Model):
+    """
+    Opening hours of one date, compiled from the weekly BusinessHours and
+    the ScheduleExceptions so that checking a date reads one row instead
+    of combining the rules. Rows cover HOURS_HORIZON_DAYS from the last
+    rebuild and are recompiled by signals when either source changes;
+    dates without a row are compiled on read.
+    """
+
+    date = models.DateField(unique=True)
+    is_open = models.BooleanField()
+    start_time = models.TimeField(null=True)
+    end_time = models.TimeField(null=True)
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name_plural = "Effective hours"
+
+    @classmethod
+    def hours_on(cls, day):
+        """Return (start_time, end_time) of day, or None when closed"""
+        row = (
+            cls.objects.filter(date=day)
+            .values_list("is_open", "start_time", "end_time")
+            .first()
+        )
+        if row is None:
+            return compile_hours(BusinessHours, ScheduleException, [day])[day]
+        is_open, start_time, end_time = row
+        return (start_time, end_time) if is_open else None
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, dates):
+        """Recompile the stored rows among dates"""
+        stored = cls.objects.filter(date__in=dates).values_list("date", flat=True)
+        return store_effective_hours(
+            BusinessHours, ScheduleException, cls, list(stored)
+        )
+
+    @classmethod
+    @transaction.atomic
+    def refresh_weekdays(cls, weekdays):
+        """Recompile the stored rows falling on weekdays (0 is Monday)"""
+        stored = cls.objects.filter(
+            date__iso_week_day__in=[day + 1 for day in weekdays]
+        ).values_list("date", flat=True)
+        return store_effective_hours(
+            BusinessHours, ScheduleException, cls, list(stored)
+        )
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, start=None):
+        """Compile the horizon from start, today by default, dropping older rows"""
+        start = start or timezone.localdate()
+        cls.objects.filter(date__lt=start).delete()
+        return store_effective_hours(
+            BusinessHours, ScheduleException, cls, horizon(start)
+        )
+
+    def __str__(self):
+        if not self.is_open:
+            return f"{self.date}: closed"
+        return f"{self.date}: {self.start_time} - {self.end_time}"
+
+
+def horizon(start):
+    return [start + timedelta(days=offset) for offset in range(HOURS_HORIZON_DAYS)]
+
+
+def compile_hours(hours_model, exception_model, dates):
+    """
+    Return {date: (start_time, end_time) or None when closed} for dates:
+    the date's exception if it has one, else its weekday's hours.
+    """
+    weekly = {
+        day: (start_time, end_time)
+        for day, start_time, end_time in hours_model.objects.filter(
+            is_available=True
+        ).values_list("day", "start_time", "end_time")
+    }
+    exceptions = {}
+    if dates:
+        for day, is_closed, start_time, end_time in exception_model.objects.filter(
+            date__range=(min(dates), max(dates))
+        ).values_list("date", "is_closed", "start_time", "end_time"):
+            exceptions[day] = None if is_closed else (start_time, end_time)
+    return {
+        day: exceptions[day] if day in exceptions else weekly.get(day.weekday())
+        for day in dates
+    }
+
+
+def store_effective_hours(hours_model, exception_model, effective_model, dates):
+    """Replace the EffectiveHours rows of dates; returns how many were written"""
+    compiled = compile_hours(hours_model, exception_model, dates)
+    effective_model.objects.filter(date__in=dates).delete()
+    rows = []
+    for day, hours in compiled.items():
+        start_time, end_time = hours or (None, None)
+        rows.append(
+            effective_model(
+                date=day,
+                is_open=hours is not None,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        )
+    effective_model.objects.bulk_create(rows)
+    return len(rows)
+
+
+class Resource(models.Model):
+    """
+    A practitioner or treatment room that appointments are booked with.
+    Services that list eligible resources are scheduled per resource;
+    services without any keep the single-practice rules.
+    """
+
+    KINDS = [
+        ("practitioner", "Practitioner"),
+        ("room", "Treatment room"),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Name shown to staff")
+    kind = models.CharField(
+        max_length=20, choices=KINDS, help_text="What sort of resource this is"
+    )
+    is_active = models.BooleanField(
+        default=True, help_text="Whether new appointments can use this resource"
+    )
+
+    class Meta:
+        ordering = ["kind", "pk"]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+
+
+class ResourceHours(models.Model):
+    """Weekly hours during which a resource can be booked"""
+
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        related_name="hours",
+        help_text="The practitioner or room",
+    )
+    day = models.IntegerField(
+        choices=BusinessHours.DAYS_OF_WEEK, help_text="Day of the week"
+    )
+    start_time = models.TimeField(help_text="When the resource becomes bookable")
+    end_time = models.TimeField(help_text="When the resource stops being bookable")
+
+    class Meta:
+        ordering = ["resource", "day"]
+        verbose_name_plural = "Resource hours"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["resource", "day"], name="bookings_resource_day_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.resource.name} {self.get_day_display()}: {self.start_time} - {self.end_time}"
 
 
 class Service(models.Model):
@@ -71,6 +277,17 @@ class Service(models.Model):
     is_active = models.BooleanField(
         default=True, help_text="Whether this service is currently being offered"
     )
+    resources = models.ManyToManyField(
+        Resource,
+        blank=True,
+        related_name="services",
+        help_text="Practitioners and rooms that can deliver the service; each "
+        "booking takes one free resource of every kind listed",
+    )
+
+    def get_absolute_url(self):
+        """Path of the service page on the public site"""
+        return f"/services/{self.pk}/"
 
     def __str__(self):
         """Returns the service name when the object is printed"""
@@ -118,6 +335,12 @@ class Booking(models.Model):
         blank=True,
         help_text="Any special requests or notes about the appointment",
     )
+    resources = models.ManyToManyField(
+        Resource,
+        blank=True,
+        related_name="bookings",
+        help_text="Practitioner and room assigned when the booking was made",
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         help_text="When the booking was created",
@@ -127,8 +350,19 @@ class Booking(models.Model):
         help_text="When the booking was last modified",
     )
 
+    # Token of the SlotHold the client placed on this slot, if any; set
+    # before validation so the client's own hold does not block it
+    hold_token = None
+
+    # Practitioner and room ids picked by clean(), assigned on save
+    _assigned_resources = None
+
     class Meta:
         ordering = ["-date", "-time"]
+        indexes = [
+            # A day's active bookings are read by every availability check
+            models.Index(fields=["date", "status"], name="bookings_day_status_idx")
+        ]
 
     def clean(self):
         """
@@ -143,7 +377,7 @@ class Booking(models.Model):
             return
 
         # Check if booking is in the past
-        booking_datetime = datetime.combine(self.date, self.time)
+        booking_datetime = timezone.make_aware(datetime.combine(self.date, self.time))
         if booking_datetime < timezone.now():
             raise ValidationError("Cannot book appointments in the past")
 
@@ -159,6 +393,35 @@ class Booking(models.Model):
         if not BusinessHours.is_time_available(self.date, booking_end):
             raise ValidationError("The appointment would end outside business hours")
 
+        # Services delivered by practitioners and rooms are checked per
+        # resource; scheduling imports this module, so it is imported here
+        from .scheduling import (
+            ACTIVE_STATUSES,
+            DaySchedule,
+            eligible_resources,
+            to_minutes,
+        )
+
+        eligible = eligible_resources(self.service)
+        if eligible:
+            self._assigned_resources = None
+            if self.status not in ACTIVE_STATUSES:
+                return
+            start = to_minutes(self.time)
+            self._assigned_resources = DaySchedule(
+                self.date, exclude_booking=self.pk, exclude_hold=self.hold_token
+            ).assign(
+                eligible,
+                start,
+                start + self.service.duration,
+                prefer=self._preferred_resources(),
+            )
+            if self._assigned_resources is None:
+                raise ValidationError(
+                    "No practitioner or room is free at this time", code="overlap"
+                )
+            return
+
         # Check for overlapping bookings
         overlapping = Booking.objects.filter(
             date=self.date, status__in=["pending", "confirmed"]
@@ -176,13 +439,43 @@ class Booking(models.Model):
                 or (self.time < other_end <= booking_end)
                 or (other_start <= self.time < other_end)
             ):
-                raise ValidationError("This time slot overlaps with another booking")
+                raise ValidationError(
+                    "This time slot overlaps with another booking", code="overlap"
+                )
+
+        # Slots other clients hold during checkout are taken too; expired
+        # holds are ignored until the next hold on the day deletes them
+        held = (
+            SlotHold.objects.filter(date=self.date, expires_at__gt=timezone.now())
+            .exclude(token=self.hold_token or "")
+            .values_list("time", "service__duration")
+        )
+        for other_start, length in held:
+            other_end = (
+                datetime.combine(self.date, other_start) + timedelta(minutes=length)
+            ).time()
+            if other_start < booking_end and self.time < other_end:
+                raise ValidationError(
+                    "This time slot is being held by another client", code="held"
+                )
+
+    def _preferred_resources(self):
+        """Resources to keep: the booking's own, then those its hold kept"""
+        preferred = []
+        if self.pk:
+            preferred += self.resources.values_list("pk", flat=True)
+        if self.hold_token:
+            preferred += SlotHold.resources.through.objects.filter(
+                slothold__token=self.hold_token
+            ).values_list("resource_id", flat=True)
+        return preferred
 
     def save(self, *args, **kwargs):
         """
         Handle saving based on the flow:
         - Admin flow: Can set status directly
         - Client flow: Always starts as pending
+        Resources picked by clean() are assigned in the same transaction.
         """
         if not self.pk:  # New booking
             if not self.created_by_admin:
@@ -190,7 +483,15 @@ class Booking(models.Model):
             # Admin bookings can be set to any status
 
         self.clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self._assigned_resources is not None:
+                self.resources.set(self._assigned_resources)
+                self._assigned_resources = None
+            if self.hold_token:
+                # The hold has done its job once the booking exists
+                SlotHold.objects.filter(token=self.hold_token).delete()
+                self.hold_token = None
 
     def notify_new_booking(self):
         """Send notification for new booking request"""
@@ -199,6 +500,9 @@ class Booking(models.Model):
             "bookings/email/new_booking.txt",
             {
                 "booking": self,
+                "health": ClientHealthRecord.objects.filter(
+                    client_id=self.client_id
+                ).first(),
                 "admin_url": f"/admin/bookings/booking/{self.pk}/change/",
             },
         )
@@ -236,3 +540,80 @@ class Booking(models.Model):
 
     def __str__(self):
         return f"{self.client} - {self.service} on {self.date} at {self.time}"
+
+
+class BookingEvent(models.Model):
+    """
+    One status change of a booking, written by bookings.transitions when
+    the change is applied; the booking's history, oldest first.
+    """
+
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name="events",
+        help_text="The booking whose status changed",
+    )
+    from_status = models.CharField(
+        max_length=20, choices=Booking.BOOKING_STATUS, help_text="Status before"
+    )
+    to_status = models.CharField(
+        max_length=20, choices=Booking.BOOKING_STATUS, help_text="Status after"
+    )
+    actor = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text="Who made the change, if it was a person",
+    )
+    note = models.TextField(blank=True, help_text="Why the status changed")
+    created_at = models.DateTimeField(
+        default=timezone.now, help_text="When the change was applied"
+    )
+
+    class Meta:
+        ordering = ["created_at", "pk"]
+
+    def __str__(self):
+        return f"{self.booking_id}: {self.from_status} → {self.to_status}"
+
+
+class SlotHold(models.Model):
+    """
+    Short reservation of a slot while a client completes checkout.
+    Holds past expires_at are ignored by availability and Booking.clean()
+    and deleted lazily when the next hold on the same day is placed.
+    """
+
+    token = models.CharField(
+        max_length=32, unique=True, help_text="Secret the client books the slot with"
+    )
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        related_name="slot_holds",
+        help_text="The client holding the slot",
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        help_text="The service being booked; its duration sets the interval",
+    )
+    date = models.DateField(help_text="Date of the held appointment")
+    time = models.TimeField(help_text="Start time of the held appointment")
+    expires_at = models.DateTimeField(help_text="When the hold lapses")
+    resources = models.ManyToManyField(
+        Resource,
+        blank=True,
+        related_name="holds",
+        help_text="Practitioner and room kept for the booking",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "expires_at"], name="bookings_hold_day_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.service} on {self.date} at {self.time}, held by {self.client}"
@@ -0,0 +1,38 @@
+"""
+Booking emails sent off the request path.
+
+Rendering the message and talking to the mail server run in a small
+thread pool once the booking is committed, so neither the sync nor the
+async booking API waits on SMTP, and a rolled-back booking sends nothing.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_WORKERS = getattr(settings, "NOTIFICATION_WORKERS", 2)
+
+_executor = ThreadPoolExecutor(
+    max_workers=NOTIFICATION_WORKERS, thread_name_prefix="notifications"
+)
+
+
+def _run(notify, args):
+    try:
+        notify(*args)
+    except Exception:
+        logger.exception("Booking notification %s failed", notify.__name__)
+    finally:
+        close_old_connections()
+
+
+def send_later(notify, *args):
+    """
+    Queue a notification method, e.g. booking.notify_new_booking, to run
+    in the pool after the current transaction commits
+    """
+    transaction.on_commit(lambda: _executor.submit(_run, notify, args))
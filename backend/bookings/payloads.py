@@ -0,0 +1,36 @@
+"""
+Fields and helpers shared by the DRF booking API and the async views.
+Kept free of REST framework so the async views, and worker startup,
+do not import it.
+"""
+
+from .models import Service
+
+SERVICE_FIELDS = ("id", "name", "description", "duration", "price")
+BOOKING_FIELDS = (
+    "id",
+    "service_id",
+    "service__name",
+    "date",
+    "time",
+    "status",
+    "notes",
+)
+
+
+def load_services():
+    services = list(Service.objects.filter(is_active=True).values(*SERVICE_FIELDS))
+    for service in services:
+        # Prices are sent as strings, like DRF's DecimalField, not floats
+        service["price"] = str(service["price"])
+    return services
+
+
+def validation_status(exc):
+    """
+    Losing a race for a slot, or finding it held, is a conflict (409);
+    anything else is bad input
+    """
+    if any(error.code in ("overlap", "held") for error in exc.error_list):
+        return 409
+    return 400
@@ -0,0 +1,29 @@
+"""
+Row-based read serializers for booking listings, giving the output of
+the ModelSerializers in serializers.py without building model instances.
+"""
+
+from backend.read_serializers import ReadSerializer
+
+from .models import Booking, Service
+
+
+class ServiceReadSerializer(ReadSerializer):
+    model = Service
+    fields = ("id", "name", "description", "duration", "price", "is_active")
+
+
+class BookingReadSerializer(ReadSerializer):
+    model = Booking
+    fields = (
+        "id",
+        "client",
+        "service",
+        "date",
+        "time",
+        "status",
+        "created_by_admin",
+        "notes",
+        "created_at",
+        "updated_at",
+    )
@@ -0,0 +1,147 @@
+"""
+Scheduling for services delivered by practitioners and rooms.
+
+A service that lists eligible resources needs one free resource of each
+kind among them (a practitioner, a room, or both) for the whole
+appointment, within that resource's weekly hours. The first free
+resource of each kind, in primary key order, is assigned.
+
+DaySchedule loads a day's resource assignments of active bookings and
+unexpired holds and keeps an IntervalIndex per resource: its busy
+intervals, merged and sorted. Since they never overlap, their ends are
+sorted too, so checking whether [start, end) is free is one bisect and
+finding resources for a slot costs O(resources x log bookings) instead
+of a scan of every booking.
+
+Bookings and holds without resources, made for services that are not
+scheduled per resource, occupy the whole practice as they did before
+resources existed.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import chain
+
+from django.utils import timezone
+
+from .models import Booking, ResourceHours, SlotHold
+
+ACTIVE_STATUSES = ["pending", "confirmed"]
+
+
+def to_minutes(value):
+    """Minutes since midnight of a time"""
+    return value.hour * 60 + value.minute
+
+
+class IntervalIndex:
+    """Disjoint busy [start, end) intervals in minutes, sorted by start"""
+
+    def __init__(self, intervals=()):
+        self.starts, self.ends = [], []
+        for start, end in sorted(intervals):
+            if self.ends and start < self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def is_free(self, start, end):
+        # The first interval ending after start is the only one that can clash
+        position = bisect_right(self.ends, start)
+        return position == len(self.starts) or self.starts[position] >= end
+
+
+def _intervals(rows):
+    return [(to_minutes(start), to_minutes(start) + length) for start, length in rows]
+
+
+class DaySchedule:
+    """Busy intervals of every resource on one day"""
+
+    def __init__(self, day, exclude_booking=None, exclude_hold=None):
+        now = timezone.now()
+        bookings = Booking.objects.filter(date=day, status__in=ACTIVE_STATUSES)
+        holds = SlotHold.objects.filter(date=day, expires_at__gt=now)
+        if exclude_booking is not None:
+            bookings = bookings.exclude(pk=exclude_booking)
+        if exclude_hold:
+            holds = holds.exclude(token=exclude_hold)
+
+        busy = defaultdict(list)
+        assigned = chain(
+            Booking.resources.through.objects.filter(booking__in=bookings).values_list(
+                "resource_id", "booking__time", "booking__service__duration"
+            ),
+            SlotHold.resources.through.objects.filter(slothold__in=holds).values_list(
+                "resource_id", "slothold__time", "slothold__service__duration"
+            ),
+        )
+        for resource_id, start, length in assigned:
+            busy[resource_id].append((to_minutes(start), to_minutes(start) + length))
+        self.busy = {
+            resource_id: IntervalIndex(intervals)
+            for resource_id, intervals in busy.items()
+        }
+        self.practice = IntervalIndex(
+            _intervals(
+                chain(
+                    bookings.filter(resources=None).values_list(
+                        "time", "service__duration"
+                    ),
+                    holds.filter(resources=None).values_list(
+                        "time", "service__duration"
+                    ),
+                )
+            )
+        )
+        self.hours = {
+            resource_id: (to_minutes(start), to_minutes(end))
+            for resource_id, start, end in ResourceHours.objects.filter(
+                day=day.weekday(), resource__is_active=True
+            ).values_list("resource_id", "start_time", "end_time")
+        }
+        self._empty = IntervalIndex()
+
+    def is_free(self, resource_id, start, end):
+        hours = self.hours.get(resource_id)
+        return (
+            hours is not None
+            and hours[0] <= start
+            and end <= hours[1]
+            and self.busy.get(resource_id, self._empty).is_free(start, end)
+        )
+
+    def assign(self, eligible, start, end, prefer=()):
+        """
+        Return one free resource id per kind of eligible, as produced by
+        eligible_resources(), trying the ids in prefer first; None when
+        some kind has no free resource
+        """
+        if not self.practice.is_free(start, end):
+            return None
+        chosen = []
+        for kind, resource_ids in eligible:
+            candidates = [pk for pk in prefer if pk in resource_ids] + resource_ids
+            resource_id = next(
+                (pk for pk in candidates if self.is_free(pk, start, end)), None
+            )
+            if resource_id is None:
+                return None
+            chosen.append(resource_id)
+        return chosen
+
+
+def eligible_resources(service):
+    """
+    [(kind, [resource ids])] of the service's active resources, in
+    assignment order; empty when the service is not scheduled per resource
+    """
+    groups = defaultdict(list)
+    for pk, kind in (
+        service.resources.filter(is_active=True)
+        .order_by("kind", "pk")
+        .values_list("pk", "kind")
+    ):
+        groups[kind].append(pk)
+    return list(groups.items())
@@ -0,0 +1,22 @@
+"""
+REST framework serializers for services and bookings. Large read-only
+listings use the serializers in read_serializers, which share these
+fields and give the same output.
+"""
+
+from rest_framework import serializers
+
+from .models import Booking, Service
+from .read_serializers import BookingReadSerializer, ServiceReadSerializer
+
+
+class ServiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Service
+        fields = ServiceReadSerializer.fields
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = BookingReadSerializer.fields
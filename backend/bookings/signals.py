@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from backend.sitemaps import invalidate_section
+
+from .availability import (
+    HOLDS_CACHE_KEY,
+    HOURS_CACHE_KEY,
+    SERVICES_CACHE_KEY,
+    bookings_cache,
+)
+from .freshness import SERVICES_VERSION_KEY
+from .models import (
+    Booking,
+    BusinessHours,
+    EffectiveHours,
+    ScheduleException,
+    Service,
+    SlotHold,
+)
+from .scheduling import ACTIVE_STATUSES
+from .slot_events import publish_slot_change
+from .transitions import status_changed
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, instance, **kwargs):
+    """Regenerate the services sitemap and list once the change is committed"""
+    transaction.on_commit(lambda: invalidate_section("services"))
+    transaction.on_commit(
+        lambda: bookings_cache.delete_many([SERVICES_CACHE_KEY, SERVICES_VERSION_KEY])
+    )
+
+
+@receiver(pre_save, sender=BusinessHours)
+def remember_weekday(sender, instance, **kwargs):
+    """Keep the weekday being edited, whose compiled hours change too"""
+    instance._previous_day = (
+        sender.objects.filter(pk=instance.pk).values_list("day", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=BusinessHours)
+@receiver(post_delete, sender=BusinessHours)
+def hours_changed(sender, instance, **kwargs):
+    """Recompile the affected weekdays' effective hours"""
+    weekdays = {instance.day, getattr(instance, "_previous_day", None)} - {None}
+    EffectiveHours.refresh_weekdays(weekdays)
+    transaction.on_commit(lambda: bookings_cache.delete(HOURS_CACHE_KEY))
+
+
+@receiver(pre_save, sender=ScheduleException)
+def remember_date(sender, instance, **kwargs):
+    instance._previous_date = (
+        sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=ScheduleException)
+@receiver(post_delete, sender=ScheduleException)
+def exception_changed(sender, instance, **kwargs):
+    """Recompile the effective hours of the exception's date"""
+    dates = {instance.date, getattr(instance, "_previous_date", None)} - {None}
+    EffectiveHours.refresh(dates)
+    transaction.on_commit(lambda: bookings_cache.delete(HOURS_CACHE_KEY))
+
+
+@receiver(post_save, sender=SlotHold)
+@receiver(post_delete, sender=SlotHold)
+def hold_changed(sender, instance, **kwargs):
+    """Drop the cached holds of the hold's day once the change is committed"""
+    key = HOLDS_CACHE_KEY.format(instance.date.isoformat())
+    transaction.on_commit(lambda: bookings_cache.delete(key))
+
+
+# Live availability. Receivers above drop cached holds on commit first,
+# so streams recomputing a day after these messages see the change.
+
+
+@receiver(pre_save, sender=Booking)
+def remember_slot(sender, instance, **kwargs):
+    """Keep the slot of a booking being edited, which it may leave"""
+    instance._previous_slot = (
+        sender.objects.filter(pk=instance.pk).values_list("date", "time").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, **kwargs):
+    if created:
+        if instance.status in ACTIVE_STATUSES:
+            publish_slot_change(
+                "booked", instance.date, instance.time, instance.service_id
+            )
+        return
+    previous = getattr(instance, "_previous_slot", None)
+    if previous and previous != (instance.date, instance.time):
+        publish_slot_change("cancelled", *previous, instance.service_id)
+    publish_slot_change("updated", instance.date, instance.time, instance.service_id)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    publish_slot_change("cancelled", instance.date, instance.time, instance.service_id)
+
+
+@receiver(status_changed, sender=Booking)
+def booking_status_changed(sender, booking, new_status, **kwargs):
+    if new_status == "cancelled":
+        publish_slot_change("cancelled", booking.date, booking.time, booking.service_id)
+
+
+@receiver(post_save, sender=SlotHold)
+def hold_placed(sender, instance, created, **kwargs):
+    if created:
+        publish_slot_change(
+            "held",
+            instance.date,
+            instance.time,
+            instance.service_id,
+            expires=instance.expires_at.timestamp(),
+        )
+
+
+@receiver(post_delete, sender=SlotHold)
+def hold_released(sender, instance, **kwargs):
+    publish_slot_change("released", instance.date, instance.time, instance.service_id)
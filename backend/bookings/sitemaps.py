@@ -0,0 +1,8 @@
+from .models import Service
+
+
+def service_entries():
+    """Yield (path, lastmod) for active services; services carry no timestamp"""
+    services = Service.objects.filter(is_active=True).order_by("id").only("id")
+    for service in services.iterator():
+        yield service.get_absolute_url(), None
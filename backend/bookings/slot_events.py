@@ -0,0 +1,112 @@
+"""
+Live availability for the booking page.
+
+Booking, hold and status-change signals publish one message per
+committed change on the channel of its date. slot_stream() subscribes
+to the days a browser watches, recomputes the free slots of its
+service for each day that changed and sends them as Server-Sent
+Events. Browsers no longer need to poll the availability endpoint.
+"""
+
+import asyncio
+import heapq
+import json
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from backend.db_threads import run_in_db_thread
+from backend.pubsub import OVERFLOW, broker
+
+from .availability import available_slots
+
+CHANNEL = "slots:{}"
+
+# Seconds between keep-alive comments, which stop proxies from closing
+# an idle stream
+KEEPALIVE_SECONDS = 15
+
+# Seconds after which the server ends a stream; EventSource reconnects
+# after RETRY_MS, so long-lived connections are spread across workers
+STREAM_SECONDS = getattr(settings, "SLOT_STREAM_SECONDS", 300)
+RETRY_MS = 2000
+
+
+def publish_slot_change(event, day, start, service_id, **extra):
+    """
+    Announce event ("booked", "updated", "cancelled", "held" or
+    "released") for the slot at start on day once the change commits
+    """
+    message = {
+        "event": event,
+        "date": day.isoformat(),
+        "time": start.isoformat(),
+        "service": service_id,
+        **extra,
+    }
+    channel = CHANNEL.format(message["date"])
+    transaction.on_commit(lambda: broker().publish(channel, message))
+
+
+def _event(name, data):
+    return (
+        f"event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode()
+    )
+
+
+async def _slots(service, day, hold):
+    slots = await run_in_db_thread(available_slots, service, day, hold, fresh=True)
+    return {"date": day, "slots": slots}
+
+
+async def slot_stream(service, days, hold=None):
+    """
+    Yield the Server-Sent Events for service over days: a "slots" event
+    with every day's free slots, then each change on one of the days as
+    an event named after it, carrying that day's new slots. Changes that
+    arrive together recompute each day once. Holds lapse without a
+    change to announce, so the day is recomputed and sent as "released"
+    when a hold seen on the stream expires.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_SECONDS
+    channels = [CHANNEL.format(day.isoformat()) for day in days]
+    expiries = []
+    # Subscribe before the first snapshot so no change falls in between
+    async with broker().subscribe(channels) as subscription:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        for day in days:
+            yield _event("slots", await _slots(service, day, hold))
+
+        while (remaining := deadline - loop.time()) > 0:
+            timeout = min(KEEPALIVE_SECONDS, remaining)
+            if expiries:
+                timeout = max(min(timeout, expiries[0][0] - time.time()), 0)
+            try:
+                messages = [await asyncio.wait_for(subscription.get(), timeout)]
+            except asyncio.TimeoutError:
+                messages = []
+            messages += subscription.drain()
+
+            while expiries and expiries[0][0] <= time.time():
+                _, day = heapq.heappop(expiries)
+                messages.append({"event": "released", "date": day})
+            if not messages:
+                yield b": keep-alive\n\n"
+                continue
+            if OVERFLOW in messages:
+                for day in days:
+                    yield _event("slots", await _slots(service, day, hold))
+                continue
+
+            fresh = {}
+            for message in messages:
+                if "expires" in message:
+                    heapq.heappush(expiries, (message["expires"], message["date"]))
+                day = date.fromisoformat(message["date"])
+                if day not in fresh:
+                    fresh[day] = await _slots(service, day, hold)
+                yield _event(message["event"], {**message, **fresh[day]})
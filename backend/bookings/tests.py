@@ -1,3 +1,979 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.core.exceptions import ValidationError
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Client
+from accounts.tokens import issue_access_token
+from backend.db_threads import run_in_db_thread
+
+from . import async_api, async_views, holds, notifications
+from .availability import HOLD_SECONDS, available_slots, hours_on
+from .holds import SlotUnavailable, place_hold
+from .models import (
+    Booking,
+    BookingEvent,
+    BusinessHours,
+    EffectiveHours,
+    Resource,
+    ResourceHours,
+    ScheduleException,
+    Service,
+    SlotHold,
+)
+from .read_serializers import BookingReadSerializer, ServiceReadSerializer
+from .scheduling import IntervalIndex
+from .serializers import BookingSerializer, ServiceSerializer
+from .slot_events import slot_stream
+from .transitions import InvalidTransition, transition, transition_batch
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class BookingFixtures:
+    """A service and a client signed in with a bearer token"""
+
+    @classmethod
+    def create_fixtures(cls):
+        cls.service = Service.objects.create(
+            name="Consultation", description="", duration=60, price="50.00"
+        )
+        user = User.objects.create_user("mara")
+        cls.client_profile = Client.objects.create(
+            user=user,
+            first_name="Mara",
+            last_name="Lind",
+            email="mara@example.com",
+            phone="555",
+            date_of_birth=date(1990, 5, 1),
+        )
+        cls.token = issue_access_token(user)
+
+    @classmethod
+    def open_every_day(cls):
+        # Saved one by one so that the effective hours are recompiled
+        for day in range(7):
+            BusinessHours.objects.create(day=day, start_time=time(9), end_time=time(17))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def book(self, days):
+        # bulk_create skips Booking.clean(), which needs business hours
+        Booking.objects.bulk_create(
+            [
+                Booking(
+                    client=self.client_profile,
+                    service=self.service,
+                    date=date.today() + timedelta(days=days),
+                    time=time(10),
+                )
+            ]
+        )
+
+    def revalidate(self, path, etag):
+        return self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ConditionalAPITests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+
+    def test_services_304_until_a_service_changes(self):
+        etag = self.client.get("/api/services/")["ETag"]
+        self.assertEqual(self.revalidate("/api/services/", etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.price = "55.00"
+            self.service.save()
+        response = self.revalidate("/api/services/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["services"][0]["price"], "55.00")
+
+    def test_bookings_304_until_the_client_books(self):
+        self.book(3)
+        response = self.client.get("/api/bookings/")
+        self.assertEqual(len(response.data["bookings"]), 1)
+        self.assertIn("private", response["Cache-Control"])
+        etag = response["ETag"]
+        self.assertEqual(self.revalidate("/api/bookings/", etag).status_code, 304)
+
+        self.book(4)
+        response = self.revalidate("/api/bookings/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["bookings"]), 2)
+
+    def test_deleting_a_booking_changes_the_etag(self):
+        self.book(3)
+        self.book(4)
+        etag = self.client.get("/api/bookings/")["ETag"]
+        Booking.objects.filter(date=date.today() + timedelta(days=3)).delete()
+        self.assertEqual(self.revalidate("/api/bookings/", etag).status_code, 200)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AsyncConditionalAPITests(BookingFixtures, TransactionTestCase):
+    """Async views query from the database pool, so rows must be committed"""
+
+    def setUp(self):
+        self.create_fixtures()
+        super().setUp()
+
+    def test_async_views_answer_the_same_etag(self):
+        self.book(3)
+        etag = self.client.get("/api/bookings/")["ETag"]
+        self.assertEqual(self.client.get("/api/async/bookings/")["ETag"], etag)
+        response = self.revalidate("/api/async/bookings/", etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class AsyncBookingTests(BookingFixtures, TransactionTestCase):
+    path = "/api/async/bookings/"
+
+    def setUp(self):
+        self.create_fixtures()
+        self.open_every_day()
+        super().setUp()
+        self.tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        # Let the booking emails finish before the tables are flushed
+        executor = ThreadPoolExecutor(1)
+        patcher = mock.patch.object(notifications, "_executor", executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(executor.shutdown)
+
+    def payload(self, **fields):
+        return json.dumps(
+            {"service": self.service.pk, "date": self.tomorrow, "time": "10:00"}
+            | fields
+        )
+
+    async def test_creates_bookings_in_the_database_pool(self):
+        threads = []
+        create = async_views._create_booking
+
+        def create_booking(*args):
+            threads.append(threading.current_thread().name)
+            return create(*args)
+
+        with mock.patch.object(async_views, "_create_booking", create_booking):
+            response = await AsyncClient().post(
+                self.path,
+                self.payload(),
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {self.token}"},
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["booking"]["status"], "pending")
+        self.assertTrue(threads[0].startswith("database"), threads)
+        booking = await Booking.objects.aget()
+        self.assertEqual(booking.client_id, self.client_profile.pk)
+
+    def test_rejects_invalid_bookings(self):
+        def post(**fields):
+            return self.client.post(
+                self.path, self.payload(**fields), content_type="application/json"
+            )
+
+        self.assertEqual(post(service="tea").status_code, 400)
+        self.assertEqual(post(date="tomorrow").status_code, 400)
+        response = post(time="20:00")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "error")
+
+        self.assertEqual(post().status_code, 201)
+        # The same slot again loses the race
+        self.assertEqual(post().status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_anonymous_requests_are_refused(self):
+        response = APIClient().post(
+            self.path, self.payload(), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_session_users_need_a_csrf_token(self):
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(self.client_profile.user)
+        response = client.post(
+            self.path, self.payload(), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Booking.objects.exists())
+
+        client.cookies["csrftoken"] = "c" * 32
+        response = client.post(
+            self.path,
+            self.payload(),
+            content_type="application/json",
+            headers={"X-CSRFToken": "c" * 32},
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SlotHoldTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        cls.open_every_day()
+        other = User.objects.create_user("ines")
+        cls.other_client = Client.objects.create(
+            user=other,
+            first_name="Ines",
+            last_name="Berg",
+            email="ines@example.com",
+            phone="556",
+            date_of_birth=date(1985, 2, 3),
+        )
+        cls.day = date.today() + timedelta(days=7)
+
+    def hold(self, client=None, start=time(10)):
+        with self.captureOnCommitCallbacks(execute=True):
+            return place_hold(
+                (client or self.client_profile).pk, self.service, self.day, start
+            )
+
+    def booking(self, client, hold=None):
+        booking = Booking(
+            client=client, service=self.service, date=self.day, time=time(10)
+        )
+        booking.hold_token = hold
+        return booking
+
+    def test_held_slot_is_hidden_from_others_only(self):
+        hold = self.hold()
+        self.assertNotIn(time(10), available_slots(self.service, self.day))
+        self.assertNotIn(time(9, 30), available_slots(self.service, self.day))
+        self.assertIn(
+            time(10), available_slots(self.service, self.day, hold=hold.token)
+        )
+
+    def test_held_slot_cannot_be_held_or_booked_by_another_client(self):
+        self.hold()
+        with self.assertRaises(SlotUnavailable):
+            self.hold(self.other_client)
+        with self.assertRaisesMessage(ValidationError, "being held"):
+            self.booking(self.other_client).save()
+
+    def test_booking_with_the_token_consumes_the_hold(self):
+        hold = self.hold()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking(self.client_profile, hold.token).save()
+        self.assertFalse(SlotHold.objects.exists())
+        self.assertNotIn(time(10), available_slots(self.service, self.day))
+
+    def test_a_client_holds_one_slot_at_a_time(self):
+        self.hold()
+        self.hold(start=time(14))
+        self.assertEqual(
+            list(SlotHold.objects.values_list("time", flat=True)), [time(14)]
+        )
+        self.assertIn(time(10), available_slots(self.service, self.day))
+
+    def test_expired_holds_are_ignored_and_reclaimed_lazily(self):
+        self.hold()
+        later = timezone.now() + timedelta(seconds=HOLD_SECONDS + 1)
+        with mock.patch("django.utils.timezone.now", return_value=later), mock.patch(
+            "bookings.availability.time.time", return_value=later.timestamp()
+        ):
+            self.assertIn(time(10), available_slots(self.service, self.day))
+            self.booking(self.other_client).clean()
+            self.assertEqual(SlotHold.objects.count(), 1)
+            self.hold(self.other_client, start=time(14))
+        self.assertEqual(SlotHold.objects.get().client, self.other_client)
+
+    def test_hold_api(self):
+        response = self.client.post(
+            "/api/holds/",
+            {"service": self.service.pk, "date": self.day, "time": "10:00"},
+        )
+        self.assertEqual(response.status_code, 201)
+        token = response.data["hold"]["token"]
+
+        response = self.client.post(
+            "/api/bookings/",
+            {
+                "service": self.service.pk,
+                "date": self.day,
+                "time": "10:00",
+                "hold": token,
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            "/api/holds/",
+            {"service": self.service.pk, "date": self.day, "time": "10:00"},
+        )
+        self.assertEqual(response.status_code, 409)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ConcurrentHoldTests(BookingFixtures, TransactionTestCase):
+    """Each hold commits in its own thread, as in two concurrent requests"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.open_every_day()
+        self.other_client = Client.objects.create(
+            user=User.objects.create_user("ines"),
+            first_name="Ines",
+            last_name="Berg",
+            email="ines@example.com",
+            phone="556",
+            date_of_birth=date(1985, 2, 3),
+        )
+        self.day = date.today() + timedelta(days=7)
+
+    def test_one_of_two_holds_on_a_slot_wins(self):
+        # Both requests check the slot before either inserts its hold,
+        # unless the first is made to finish before the second checks
+        checked = threading.Barrier(2, timeout=0.5)
+        claimable = holds.claimable_resources
+
+        def claimable_resources(*args):
+            try:
+                checked.wait()
+            except threading.BrokenBarrierError:
+                pass
+            return claimable(*args)
+
+        def hold(client):
+            try:
+                return place_hold(client.pk, self.service, self.day, time(10))
+            except SlotUnavailable:
+                return None
+            finally:
+                connection.close()
+
+        with mock.patch.object(holds, "claimable_resources", claimable_resources):
+            with ThreadPoolExecutor(2) as executor:
+                results = list(
+                    executor.map(hold, [self.client_profile, self.other_client])
+                )
+        self.assertEqual(sum(result is not None for result in results), 1)
+        self.assertEqual(SlotHold.objects.count(), 1)
+
+
+class BookingAdminSearchTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        cls.admin = User.objects.create_superuser("lois")
+        cls.other = Client.objects.create(
+            user=User.objects.create_user("ines"),
+            first_name="Ines",
+            last_name="Berg",
+            email="ines@example.com",
+            phone="555",
+            date_of_birth=date(1985, 1, 1),
+        )
+        cls.massage = Service.objects.create(
+            name="Massage", description="", duration=60, price="70.00"
+        )
+
+    def search(self, term):
+        self.client.force_login(self.admin)
+        response = self.client.get("/admin/bookings/booking/", {"q": term})
+        self.assertEqual(response.status_code, 200)
+        return sorted(
+            (booking.client.first_name, booking.service.name)
+            for booking in response.context["cl"].result_list
+        )
+
+    def test_matches_clients_and_services(self):
+        for days in range(1, 4):
+            self.book(days)
+        Booking.objects.bulk_create(
+            [
+                Booking(
+                    client=self.other,
+                    service=self.massage,
+                    date=date.today() + timedelta(days=1),
+                    time=time(12),
+                )
+            ]
+        )
+        self.assertEqual(self.search("mara lind"), [("Mara", "Consultation")] * 3)
+        self.assertEqual(self.search("ines@example"), [("Ines", "Massage")])
+        self.assertEqual(self.search("massage"), [("Ines", "Massage")])
+        self.assertEqual(self.search("nobody"), [])
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def test_touching_intervals_are_free(self):
+        index = IntervalIndex([(600, 660), (720, 780)])
+        self.assertTrue(index.is_free(660, 720))
+        self.assertTrue(index.is_free(540, 600))
+        self.assertTrue(index.is_free(780, 840))
+        self.assertFalse(index.is_free(630, 690))
+        self.assertFalse(index.is_free(690, 750))
+        self.assertFalse(index.is_free(540, 840))
+
+    def test_overlapping_intervals_are_merged(self):
+        index = IntervalIndex([(720, 780), (600, 700), (650, 730)])
+        self.assertEqual((index.starts, index.ends), ([600], [780]))
+        self.assertFalse(index.is_free(700, 720))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ResourceSchedulingTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        cls.open_every_day()
+        cls.lois, cls.ana, cls.garden_room = Resource.objects.bulk_create(
+            [
+                Resource(name="Lois", kind="practitioner"),
+                Resource(name="Ana", kind="practitioner"),
+                Resource(name="Garden room", kind="room"),
+            ]
+        )
+        ResourceHours.objects.bulk_create(
+            ResourceHours(resource=resource, day=day, start_time=start, end_time=end)
+            for day in range(7)
+            for resource, start, end in (
+                (cls.lois, time(9), time(17)),
+                (cls.ana, time(12), time(17)),
+                (cls.garden_room, time(9), time(17)),
+            )
+        )
+        cls.service.resources.set([cls.lois, cls.ana, cls.garden_room])
+        cls.day = date.today() + timedelta(days=7)
+
+    def book_at(self, start, service=None):
+        booking = Booking(
+            client=self.client_profile,
+            service=service or self.service,
+            date=self.day,
+            time=start,
+        )
+        booking.save()
+        return set(booking.resources.all())
+
+    def test_first_free_resource_of_each_kind_is_assigned(self):
+        self.assertEqual(self.book_at(time(13)), {self.lois, self.garden_room})
+
+    def test_busy_resources_are_skipped(self):
+        second_room = Resource.objects.create(name="Attic", kind="room")
+        ResourceHours.objects.create(
+            resource=second_room,
+            day=self.day.weekday(),
+            start_time=time(9),
+            end_time=time(17),
+        )
+        self.service.resources.add(second_room)
+        self.book_at(time(13))
+        self.assertEqual(self.book_at(time(13)), {self.ana, second_room})
+
+    def test_every_kind_must_be_free(self):
+        self.book_at(time(13))
+        with self.assertRaisesMessage(ValidationError, "No practitioner or room"):
+            self.book_at(time(13))
+
+    def test_resource_hours_are_respected(self):
+        self.book_at(time(10))
+        self.assertNotIn(time(10), available_slots(self.service, self.day))
+        self.assertIn(time(12), available_slots(self.service, self.day))
+
+    def test_bookings_without_resources_occupy_the_practice(self):
+        other = Service.objects.create(
+            name="Tea tasting", description="", duration=30, price="10.00"
+        )
+        self.book_at(time(14), service=other)
+        self.assertNotIn(time(14), available_slots(self.service, self.day))
+        with self.assertRaises(ValidationError):
+            self.book_at(time(14))
+
+    def test_hold_keeps_its_resources_for_the_booking(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            hold = place_hold(self.client_profile.pk, self.service, self.day, time(13))
+        self.assertEqual(set(hold.resources.all()), {self.lois, self.garden_room})
+        booking = Booking(
+            client=self.client_profile,
+            service=self.service,
+            date=self.day,
+            time=time(13),
+        )
+        booking.hold_token = hold.token
+        booking.save()
+        self.assertEqual(set(booking.resources.all()), {self.lois, self.garden_room})
+
+    def test_availability_queries_do_not_grow_with_bookings(self):
+        self.book_at(time(12))
+        # The first call also fills the cached holds of the day
+        available_slots(self.service, self.day)
+        with CaptureQueriesContext(connection) as one_booking:
+            available_slots(self.service, self.day)
+        self.book_at(time(14))
+        self.book_at(time(16))
+        with self.assertNumQueries(len(one_booking)):
+            available_slots(self.service, self.day)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class EffectiveHoursTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        cls.open_every_day()
+        cls.day = date.today() + timedelta(days=7)
+
+    def except_on(self, day, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ScheduleException.objects.create(date=day, **fields)
+
+    def rows(self):
+        return list(
+            EffectiveHours.objects.values_list(
+                "date", "is_open", "start_time", "end_time"
+            )
+        )
+
+    def test_closure(self):
+        self.except_on(self.day, reason="Midsummer")
+        self.assertIsNone(hours_on(self.day))
+        self.assertEqual(available_slots(self.service, self.day), [])
+        self.assertFalse(BusinessHours.is_time_available(self.day, time(10)))
+        self.assertTrue(
+            BusinessHours.is_time_available(self.day + timedelta(days=1), time(10))
+        )
+
+    def test_extended_day(self):
+        self.except_on(self.day, is_closed=False, start_time=time(8), end_time=time(20))
+        slots = available_slots(self.service, self.day)
+        self.assertEqual((slots[0], slots[-1]), (time(8), time(19)))
+
+    def test_removing_an_exception_restores_the_weekly_hours(self):
+        exception = self.except_on(self.day)
+        with self.captureOnCommitCallbacks(execute=True):
+            exception.delete()
+        self.assertEqual(hours_on(self.day), (time(9), time(17)))
+
+    def test_moving_weekly_hours_recompiles_both_weekdays(self):
+        next_day = (self.day.weekday() + 1) % 7
+        hours = BusinessHours.objects.get(day=self.day.weekday())
+        with self.captureOnCommitCallbacks(execute=True):
+            BusinessHours.objects.get(day=next_day).delete()
+            hours.day = next_day
+            hours.start_time = time(11)
+            hours.save()
+        self.assertIsNone(hours_on(self.day))
+        self.assertEqual(
+            EffectiveHours.hours_on(self.day + timedelta(days=1)),
+            (time(11), time(17)),
+        )
+
+    def test_dates_beyond_the_horizon_are_compiled_on_read(self):
+        far = date.today() + timedelta(days=1000)
+        self.except_on(far + timedelta(days=1))
+        self.assertFalse(EffectiveHours.objects.filter(date__gte=far).exists())
+        self.assertEqual(hours_on(far), (time(9), time(17)))
+        self.assertIsNone(hours_on(far + timedelta(days=1)))
+
+    def test_one_row_is_read_per_date(self):
+        with self.assertNumQueries(1):
+            BusinessHours.is_time_available(self.day, time(10))
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.except_on(self.day)
+        self.except_on(
+            self.day + timedelta(days=2),
+            is_closed=False,
+            start_time=time(10),
+            end_time=time(12),
+        )
+        incremental = self.rows()
+        EffectiveHours.objects.all().delete()
+        EffectiveHours.rebuild()
+        self.assertEqual(self.rows(), incremental)
+
+
+class EffectiveHoursMigrationTests(TransactionTestCase):
+    """0006 compiles the hours that existed before EffectiveHours"""
+
+    before = [("bookings", "0005_effective_hours")]
+    after = [("bookings", "0006_fill_effectivehours")]
+
+    def setUp(self):
+        leaves = MigrationExecutor(connection).loader.graph.leaf_nodes()
+        self.addCleanup(self.migrate, leaves)
+        self.apps = self.migrate(self.before)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_fills_the_horizon(self):
+        today = timezone.localdate()
+        tomorrow = today + timedelta(days=1)
+        # A week on from today, on an otherwise open weekday
+        closed = today + timedelta(days=7)
+        business_hours = self.apps.get_model("bookings", "BusinessHours")
+        business_hours.objects.create(
+            day=today.weekday(), start_time=time(9), end_time=time(17)
+        )
+        business_hours.objects.create(
+            day=tomorrow.weekday(),
+            start_time=time(9),
+            end_time=time(17),
+            is_available=False,
+        )
+        exceptions = self.apps.get_model("bookings", "ScheduleException")
+        exceptions.objects.create(date=closed, is_closed=True)
+
+        apps = self.migrate(self.after)
+        rows = {
+            row.date: row
+            for row in apps.get_model("bookings", "EffectiveHours").objects.all()
+        }
+        self.assertEqual(len(rows), 180)
+        self.assertEqual(
+            (rows[today].is_open, rows[today].start_time, rows[today].end_time),
+            (True, time(9), time(17)),
+        )
+        self.assertFalse(rows[tomorrow].is_open)
+        self.assertIsNone(rows[tomorrow].start_time)
+        self.assertFalse(rows[closed].is_open)
+
+
+class ReadSerializerTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        Service.objects.create(
+            name="Free call", description="", duration=15, price="0.00"
+        )
+
+    def test_matches_model_serializers(self):
+        self.book(3)
+        self.book(4)
+        Booking.objects.filter(date=date.today() + timedelta(days=4)).update(
+            notes="Bring notes", status="confirmed"
+        )
+        for queryset, serializer, read_serializer in (
+            (Service.objects.order_by("pk"), ServiceSerializer, ServiceReadSerializer),
+            (Booking.objects.order_by("pk"), BookingSerializer, BookingReadSerializer),
+        ):
+            expected = json.loads(json.dumps(serializer(queryset, many=True).data))
+            self.assertEqual(read_serializer().many(queryset), expected)
+
+
+class TransitionTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        cls.staff = User.objects.create_superuser("lois", password="secret")
+
+    def setUp(self):
+        for days in (3, 4, 5):
+            self.book(days)
+        self.bookings = list(Booking.objects.order_by("date"))
+        patcher = mock.patch("bookings.transitions.send_later")
+        self.send_later = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_transition_updates_status_and_records_event(self):
+        booking = self.bookings[0]
+        before = booking.updated_at
+        self.assertTrue(transition(booking, "confirmed", actor=self.staff))
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, "confirmed")
+        self.assertGreater(booking.updated_at, before)
+        event = booking.events.get()
+        self.assertEqual(
+            (event.from_status, event.to_status, event.actor),
+            ("pending", "confirmed", self.staff),
+        )
+        self.send_later.assert_called_once_with(booking.notify_status_change, "pending")
+
+    def test_disallowed_transitions_raise(self):
+        with self.assertRaises(InvalidTransition):
+            transition(self.bookings[0], "completed")
+        transition(self.bookings[0], "cancelled")
+        with self.assertRaises(InvalidTransition):
+            transition(self.bookings[0], "confirmed")
+
+    def test_stale_status_loses_the_race(self):
+        first, second = self.bookings[0], Booking.objects.get(pk=self.bookings[0].pk)
+        self.assertTrue(transition(first, "confirmed"))
+        self.assertFalse(transition(second, "cancelled"))
+        self.assertEqual(Booking.objects.get(pk=first.pk).status, "confirmed")
+        self.assertEqual(BookingEvent.objects.count(), 1)
+        self.assertEqual(self.send_later.call_count, 1)
+
+    def test_batch_inserts_events_in_bulk(self):
+        with mock.patch("bookings.transitions.EVENT_BATCH_SIZE", 2):
+            with CaptureQueriesContext(connection) as queries:
+                with transition_batch(actor=self.staff) as batch:
+                    for booking in self.bookings:
+                        batch.transition(booking, "confirmed")
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(batch.applied, 3)
+        self.assertEqual(BookingEvent.objects.filter(to_status="confirmed").count(), 3)
+
+    def test_failed_batch_changes_nothing(self):
+        with self.assertRaises(InvalidTransition):
+            with transition_batch() as batch:
+                batch.transition(self.bookings[0], "confirmed")
+                batch.transition(self.bookings[1], "completed")
+        self.assertFalse(Booking.objects.exclude(status="pending").exists())
+        self.assertFalse(BookingEvent.objects.exists())
+
+    def test_admin_actions(self):
+        Booking.objects.filter(pk=self.bookings[2].pk).update(status="cancelled")
+        self.client.force_login(self.staff)
+        response = self.client.post(
+            "/admin/bookings/booking/",
+            {
+                "action": "confirm_bookings",
+                "_selected_action": [booking.pk for booking in self.bookings],
+            },
+            follow=True,
+        )
+        self.assertContains(response, "2 booking(s) confirmed, 1 skipped")
+        self.assertEqual(BookingEvent.objects.filter(actor=self.staff).count(), 2)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SlotEventTests(BookingFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+        cls.open_every_day()
+        cls.day = date.today() + timedelta(days=7)
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch("bookings.slot_events.broker")
+        self.publish = patcher.start().return_value.publish
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return [
+            (channel, message["event"], message["time"])
+            for (channel, message), _ in self.publish.call_args_list
+        ]
+
+    def test_booking_holds_and_cancellations_are_published_on_commit(self):
+        channel = f"slots:{self.day.isoformat()}"
+        with self.captureOnCommitCallbacks(execute=True):
+            hold = place_hold(self.client_profile.pk, self.service, self.day, time(10))
+            self.publish.assert_not_called()
+        self.assertEqual(
+            self.publish.call_args.args[1]["expires"], hold.expires_at.timestamp()
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking(
+                client=self.client_profile,
+                service=self.service,
+                date=self.day,
+                time=time(10),
+            )
+            booking.hold_token = hold.token
+            booking.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(booking, "cancelled")
+        self.assertEqual(
+            self.published(),
+            [
+                (channel, "held", "10:00:00"),
+                (channel, "booked", "10:00:00"),
+                (channel, "released", "10:00:00"),
+                (channel, "cancelled", "10:00:00"),
+            ],
+        )
+
+    def test_moving_a_booking_frees_its_old_slot(self):
+        booking = Booking(
+            client=self.client_profile,
+            service=self.service,
+            date=self.day,
+            time=time(10),
+        )
+        booking.save()
+        booking.time = time(14)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertEqual(
+            [(event, start) for _, event, start in self.published()],
+            [("cancelled", "10:00:00"), ("updated", "14:00:00")],
+        )
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AvailabilityStreamTests(BookingFixtures, TransactionTestCase):
+    """The stream recomputes slots in the database pool, so rows must be committed"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.open_every_day()
+        super().setUp()
+        self.day = date.today() + timedelta(days=7)
+
+    async def next_event(self, stream):
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        lines = chunk.decode().splitlines()
+        return lines[0].partition(": ")[2], json.loads(lines[1].partition(": ")[2])
+
+    async def test_stream_pushes_changed_slots(self):
+        stream = slot_stream(self.service, [self.day, self.day + timedelta(days=1)])
+        self.assertEqual(await anext(stream), b"retry: 2000\n\n")
+        event, data = await self.next_event(stream)
+        self.assertEqual((event, data["date"]), ("slots", self.day.isoformat()))
+        self.assertIn("10:00:00", data["slots"])
+        await self.next_event(stream)
+
+        await run_in_db_thread(self.book_at, time(10))
+        event, data = await self.next_event(stream)
+        self.assertEqual((event, data["time"]), ("booked", "10:00:00"))
+        self.assertNotIn("10:00:00", data["slots"])
+        self.assertNotIn("09:30:00", data["slots"])
+        await stream.aclose()
+
+    async def test_expired_holds_are_released(self):
+        with mock.patch("bookings.holds.HOLD_SECONDS", 0.2):
+            stream = slot_stream(self.service, [self.day])
+            await anext(stream)
+            await self.next_event(stream)
+            await run_in_db_thread(
+                place_hold, self.client_profile.pk, self.service, self.day, time(10)
+            )
+            event, data = await self.next_event(stream)
+            self.assertEqual(event, "held")
+            self.assertNotIn("10:00:00", data["slots"])
+            event, data = await self.next_event(stream)
+        self.assertEqual(event, "released")
+        self.assertIn("10:00:00", data["slots"])
+        await stream.aclose()
+
+    def book_at(self, start):
+        Booking(
+            client=self.client_profile, service=self.service, date=self.day, time=start
+        ).save()
+
+    def test_view_validates_the_range(self):
+        path = "/api/async/availability/stream/"
+        query = {"service": self.service.pk, "from": self.day}
+        self.assertEqual(
+            self.client.get(
+                path, {**query, "to": self.day + timedelta(days=40)}
+            ).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get(
+                path, {**query, "to": self.day - timedelta(days=1)}
+            ).status_code,
+            400,
+        )
+        self.assertEqual(self.client.get(path, {"from": self.day}).status_code, 400)
+
+
+class RegistrationAPITests(TransactionTestCase):
+    """Sign-ups are saved from the registration pool, so rows must be committed"""
+
+    def registration(self, username, password="Sturdy-pass-42"):
+        return {
+            "username": username,
+            "email": f"{username}@example.com",
+            "first_name": "Mara",
+            "last_name": "Lind",
+            "phone": "555",
+            "date_of_birth": "1990-05-01",
+            "password1": password,
+            "password2": password,
+        }
+
+    def test_registers_user_and_client(self):
+        response = self.client.post(
+            "/api/register/",
+            self.registration("mara"),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["user"]["username"], "mara")
+        client = Client.objects.get(user__username="mara")
+        self.assertEqual((client.email, client.phone), ("mara@example.com", "555"))
+        self.assertTrue(client.user.check_password("Sturdy-pass-42"))
+
+    def test_invalid_registration(self):
+        response = self.client.post(
+            "/api/register/",
+            self.registration("weak", password="password"),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password2", response.json()["errors"])
+        response = self.client.post(
+            "/api/register/", "{", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.exists())
+
+    async def test_saturation_is_answered_with_503(self):
+        gate = asyncio.Event()
+        register = async_api.register_in_pool
+        # SQLite's shared in-memory test database locks whole tables, so
+        # the admitted sign-ups save one at a time
+        saving = asyncio.Lock()
+
+        async def held(data):
+            await gate.wait()
+            async with saving:
+                return await register(data)
+
+        with (
+            mock.patch.object(async_api, "_pending", asyncio.Semaphore(2)),
+            mock.patch.object(async_api, "register_in_pool", held),
+        ):
+            requests = [
+                asyncio.create_task(
+                    self.async_client.post(
+                        "/api/register/",
+                        self.registration(f"client{number}"),
+                        content_type="application/json",
+                    )
+                )
+                for number in range(6)
+            ]
+            # Two sign-ups wait for the pool and the rest are turned away
+            rejected = []
+            while len(rejected) < 4:
+                done, _ = await asyncio.wait(
+                    [task for task in requests if task not in rejected],
+                    timeout=5,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                self.assertTrue(done, "requests stalled while the pool was full")
+                rejected += done
+            gate.set()
+            responses = await asyncio.wait_for(asyncio.gather(*requests), 10)
+
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [201, 201, 503, 503, 503, 503])
+        self.assertTrue(all(task.result()["Retry-After"] == "1" for task in rejected))
+        self.assertEqual(await User.objects.acount(), 2)
@@ -0,0 +1,129 @@
+"""
+Booking status changes.
+
+    pending   -> confirmed or cancelled
+    confirmed -> completed or cancelled
+
+Each change is a conditional UPDATE ... WHERE id = <booking> AND status
+= <old status>, so of two people acting on the same booking at once only
+one moves it; the other's update matches no row and reports False.
+The booking is not saved or re-validated: clean() checks when and with
+whom the appointment is, which a status change does not touch.
+
+Applied changes are recorded as BookingEvents, inserted in bulk when
+transition_batch() changes many bookings, and the client is emailed once
+the change is committed.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Booking, BookingEvent
+from .notifications import send_later
+
+TRANSITIONS = {
+    "pending": {"confirmed", "cancelled"},
+    "confirmed": {"completed", "cancelled"},
+}
+
+# Sent with booking, old_status and new_status after a change is applied;
+# the update bypasses save(), so there is no post_save
+status_changed = Signal()
+
+# Events buffered by a TransitionBatch before they are inserted
+EVENT_BATCH_SIZE = getattr(settings, "BOOKING_EVENT_BATCH_SIZE", 500)
+
+
+class InvalidTransition(ValueError):
+    """Raised for a status change the state machine does not allow"""
+
+
+def check_transition(old_status, new_status):
+    if new_status not in TRANSITIONS.get(old_status, ()):
+        raise InvalidTransition(f"A {old_status} booking cannot become {new_status}")
+
+
+class TransitionBatch:
+    """
+    Status changes made by one actor, whose events are buffered and
+    inserted EVENT_BATCH_SIZE at a time; use it through transition_batch()
+    """
+
+    def __init__(self, actor=None, note=""):
+        self.actor = actor
+        self.note = note
+        self.events = []
+        self.applied = 0
+
+    def transition(self, booking, new_status):
+        """
+        Move booking from its loaded status to new_status. Returns False,
+        leaving it untouched, when its status was changed meanwhile.
+        """
+        old_status = booking.status
+        check_transition(old_status, new_status)
+        now = timezone.now()
+        updated = Booking.objects.filter(pk=booking.pk, status=old_status).update(
+            status=new_status, updated_at=now
+        )
+        if not updated:
+            return False
+
+        booking.status = new_status
+        booking.updated_at = now
+        self.events.append(
+            BookingEvent(
+                booking_id=booking.pk,
+                from_status=old_status,
+                to_status=new_status,
+                actor=self.actor,
+                note=self.note,
+                created_at=now,
+            )
+        )
+        if len(self.events) >= EVENT_BATCH_SIZE:
+            self.flush()
+        send_later(booking.notify_status_change, old_status)
+        status_changed.send(
+            sender=Booking,
+            booking=booking,
+            old_status=old_status,
+            new_status=new_status,
+        )
+        self.applied += 1
+        return True
+
+    def flush(self):
+        """Insert the buffered events"""
+        if self.events:
+            BookingEvent.objects.bulk_create(self.events)
+            self.events = []
+
+
+@contextmanager
+def transition_batch(actor=None, note=""):
+    """
+    Apply status changes in one transaction, inserting their events in
+    bulk when it ends:
+
+        with transition_batch(actor=request.user) as batch:
+            for booking in bookings:
+                batch.transition(booking, "confirmed")
+    """
+    batch = TransitionBatch(actor=actor, note=note)
+    with transaction.atomic():
+        yield batch
+        batch.flush()
+
+
+def transition(booking, new_status, actor=None, note=""):
+    """
+    Move one booking to new_status; returns whether the change was
+    applied, False when another change got there first
+    """
+    with transition_batch(actor=actor, note=note) as batch:
+        return batch.transition(booking, new_status)
@@ -1,8 +1,40 @@
 from django.urls import path
-from . import views
+
+from backend.lazy import lazy_api_view
+
+from . import async_api, async_views
 
 app_name = "bookings"
 
+
 urlpatterns = [
-    # URLs will be added here when we set up the React frontend
+    # The DRF views load REST framework on their first request, not at startup
+    path("api/register/", async_api.register_client, name="register"),
+    path(
+        "api/services/",
+        lazy_api_view("bookings.api.ServiceListAPI"),
+        name="api_services",
+    ),
+    path(
+        "api/availability/",
+        lazy_api_view("bookings.api.AvailabilityAPI"),
+        name="api_availability",
+    ),
+    path(
+        "api/bookings/", lazy_api_view("bookings.api.BookingAPI"), name="api_bookings"
+    ),
+    path("api/holds/", lazy_api_view("bookings.api.SlotHoldAPI"), name="api_holds"),
+    # Native async versions of the endpoints above, for ASGI workers
+    path("api/async/services/", async_views.services, name="async_services"),
+    path(
+        "api/async/availability/",
+        async_views.availability,
+        name="async_availability",
+    ),
+    path(
+        "api/async/availability/stream/",
+        async_views.availability_stream,
+        name="async_availability_stream",
+    ),
+    path("api/async/bookings/", async_views.bookings, name="async_bookings"),
 ]
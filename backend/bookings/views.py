@@ -2,9 +2,13 @@ from django.shortcuts import render, redirect
 from django.views.generic import ListView, CreateView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from .models import Service, Booking, Client
+from django.utils.decorators import method_decorator
+from .models import Service, Booking
 from django.contrib import messages
 from django.contrib.auth import login
+from accounts.clients import get_client_id, remember_client
+from backend.conditional import conditional
+from .freshness import client_bookings_freshness, services_freshness
 from .forms import ClientRegistrationForm
 from rest_framework import status
 from rest_framework.views import APIView
@@ -13,6 +17,7 @@ from rest_framework.response import Response
 # Create your views here.
 
 
+@method_decorator(conditional(lambda request: services_freshness()), name="get")
 class ServiceListView(ListView):
     """Display all available services"""
 
@@ -33,18 +38,19 @@ class BookingCreateView(CreateView):
     fields = ["service", "date", "time", "notes"]
     success_url = reverse_lazy("booking_confirmation")
 
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        # The client's own checkout hold must not block their booking
+        form.instance.hold_token = self.request.POST.get("hold")
+        return form
+
     def form_valid(self, form):
         """Add the current user's client profile to the booking"""
-        # Get or create client profile for the current user
-        client, created = Client.objects.get_or_create(
-            user=self.request.user,
-            defaults={
-                "first_name": self.request.user.first_name,
-                "last_name": self.request.user.last_name,
-                "email": self.request.user.email,
-            },
-        )
-        form.instance.client = client
+        # Profiles are created at signup and cached per session
+        if not self.request.client:
+            form.add_error(None, "Please complete your client profile to book.")
+            return self.form_invalid(form)
+        form.instance.client = self.request.client
         messages.success(self.request, "Booking created successfully!")
         return super().form_valid(form)
 
@@ -54,6 +60,11 @@ def booking_confirmation(request):
     return render(request, "bookings/booking_confirmation.html")
 
 
+def _dashboard_freshness(request):
+    return client_bookings_freshness(get_client_id(request))
+
+
+@method_decorator(conditional(_dashboard_freshness, private=True), name="get")
 class ClientDashboard(LoginRequiredMixin, ListView):
     """Display client's bookings and allow management"""
 
@@ -63,7 +74,7 @@ class ClientDashboard(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         """Only show current client's bookings"""
-        return Booking.objects.filter(client__user=self.request.user).order_by(
+        return Booking.objects.filter(client_id=get_client_id(self.request)).order_by(
             "date", "time"
         )
 
@@ -76,6 +87,7 @@ class ClientRegistrationView(CreateView):
     def form_valid(self, form):
         response = super().form_valid(form)
         login(self.request, self.object)  # Log the user in after registration
+        remember_client(self.request, form.client)
         return response
 
 
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import NewsletterIssue
+
+
+@admin.register(NewsletterIssue)
+class NewsletterIssueAdmin(admin.ModelAdmin):
+    list_display = ("post", "status", "sent_count", "failed_count", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = (
+        "last_client_id",
+        "sent_count",
+        "failed_count",
+        "heartbeat_at",
+        "finished_at",
+    )
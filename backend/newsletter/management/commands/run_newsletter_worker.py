@@ -0,0 +1,64 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from newsletter.sending import (
+    BATCH_PAUSE,
+    BATCH_SIZE,
+    LeaseLost,
+    claim_next_issue,
+    send_issue,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send queued newsletter issues to opted-in clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no issue is waiting instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=30.0,
+            help="Seconds to wait between checks for new issues",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=BATCH_PAUSE,
+            help="Seconds to wait between batches to throttle the mail server",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            issue = claim_next_issue()
+            if issue is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+            self.stdout.write(f"Sending {issue}")
+            try:
+                sent = send_issue(
+                    issue, batch_size=options["batch_size"], pause=options["pause"]
+                )
+            except LeaseLost:
+                # Another worker carries on from the last checkpoint
+                logger.warning("Stopped sending %s: it was taken over", issue)
+                continue
+            except Exception:
+                # The issue stays claimed and is resumed once its lease ends
+                logger.exception("Sending %s stopped", issue)
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails for {issue}"))
@@ -0,0 +1,95 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("blog", "0004_relatedpost"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NewsletterIssue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                        ],
+                        default="queued",
+                        help_text="Delivery progress of the issue",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "last_client_id",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Id of the last client whose batch was sent",
+                    ),
+                ),
+                (
+                    "sent_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of emails handed to the mail server",
+                    ),
+                ),
+                (
+                    "failed_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Number of emails the mail server rejected"
+                    ),
+                ),
+                (
+                    "heartbeat_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Last time the sending worker reported progress",
+                        null=True,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, help_text="When the issue was queued"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, help_text="When the last batch was sent", null=True
+                    ),
+                ),
+                (
+                    "post",
+                    models.OneToOneField(
+                        help_text="The article this issue announces",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="newsletter_issue",
+                        to="blog.blogpost",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at"],
+            },
+        ),
+    ]
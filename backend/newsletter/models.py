@@ -0,0 +1,55 @@
+from django.db import models
+from blog.models import BlogPost
+
+
+class NewsletterIssue(models.Model):
+    """
+    One newsletter mailing announcing a published blog post.
+    Records how far the fan-out to opted-in clients has progressed so a
+    crashed worker resumes after the last client it reached.
+    """
+
+    ISSUE_STATUS = [
+        ("queued", "Queued"),  # Created when the post is published
+        ("sending", "Sending"),  # Claimed by a worker
+        ("sent", "Sent"),  # Every recipient was processed
+    ]
+
+    post = models.OneToOneField(
+        BlogPost,
+        on_delete=models.CASCADE,
+        related_name="newsletter_issue",
+        help_text="The article this issue announces",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=ISSUE_STATUS,
+        default="queued",
+        help_text="Delivery progress of the issue",
+    )
+    last_client_id = models.BigIntegerField(
+        default=0, help_text="Id of the last client whose batch was sent"
+    )
+    sent_count = models.PositiveIntegerField(
+        default=0, help_text="Number of emails handed to the mail server"
+    )
+    failed_count = models.PositiveIntegerField(
+        default=0, help_text="Number of emails the mail server rejected"
+    )
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last time the sending worker reported progress",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, help_text="When the issue was queued"
+    )
+    finished_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the last batch was sent"
+    )
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.post} ({self.get_status_display()})"
@@ -0,0 +1,187 @@
+"""
+Newsletter fan-out to opted-in clients.
+
+The message is rendered once per issue with ${first_name} left as a
+placeholder, then filled in per recipient with string.Template. Recipients
+are streamed in id order and sent in throttled batches over one reused
+SMTP connection; progress is checkpointed after every batch. A message
+the server rejects is counted as failed and the fan-out moves on; only
+losing the server altogether stops it, to be resumed after the lease.
+
+Every write a worker makes to its issue is fenced on the heartbeat it
+last wrote. A worker that stalled past its lease and was taken over
+finds its checkpoint matching no row and stops instead of sending on
+alongside the new one.
+"""
+
+import logging
+import smtplib
+import time
+from datetime import timedelta
+from string import Template
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from accounts.models import Client
+
+from .models import NewsletterIssue
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "NEWSLETTER_BATCH_SIZE", 100)
+BATCH_PAUSE = getattr(settings, "NEWSLETTER_BATCH_PAUSE", 1.0)
+
+# A sending issue whose worker has been silent this long is taken over
+LEASE = timedelta(seconds=getattr(settings, "NEWSLETTER_LEASE_SECONDS", 300))
+
+# A batch still sending after this long renews the lease between messages
+RENEW_AFTER = LEASE / 3
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has taken over the issue being sent"""
+
+
+def claim_next_issue():
+    """
+    Claim the oldest issue that is queued or whose worker went silent.
+    The conditional UPDATE on heartbeat_at makes the claim safe when
+    several workers run at once.
+    """
+    now = timezone.now()
+    candidates = NewsletterIssue.objects.filter(
+        Q(status="queued") | Q(status="sending", heartbeat_at__lt=now - LEASE)
+    ).order_by("created_at")
+    for issue in candidates[:5]:
+        claimed = NewsletterIssue.objects.filter(
+            pk=issue.pk, status=issue.status, heartbeat_at=issue.heartbeat_at
+        ).update(status="sending", heartbeat_at=now)
+        if claimed:
+            issue.refresh_from_db()
+            return issue
+    return None
+
+
+def _checkpoint(issue, **fields):
+    """
+    Write fields to issue and renew its lease, provided this worker
+    still holds it; raise LeaseLost otherwise
+    """
+    now = timezone.now()
+    updated = NewsletterIssue.objects.filter(
+        pk=issue.pk, status="sending", heartbeat_at=issue.heartbeat_at
+    ).update(heartbeat_at=now, **fields)
+    if not updated:
+        raise LeaseLost(f"Newsletter issue {issue.pk} was taken over")
+    issue.heartbeat_at = now
+
+
+def _literal(text):
+    """Escape text so string.Template leaves it unchanged"""
+    return text.replace("$", "$$")
+
+
+def render_issue(issue):
+    """Render the subject and body template shared by every recipient"""
+    post = issue.post
+    body = render_to_string(
+        "newsletter/email/new_post.txt",
+        {
+            "title": _literal(post.title),
+            "summary": _literal(Truncator(post.content).words(60)),
+            "post_url": _literal(f"{settings.SITE_URL}{post.get_absolute_url()}"),
+        },
+    )
+    return f"New on Lois's Herbs: {post.title}", Template(body)
+
+
+def _recipient_batches(issue, batch_size):
+    recipients = (
+        Client.objects.filter(newsletter_opt_in=True, pk__gt=issue.last_client_id)
+        .order_by("pk")
+        .values_list("pk", "first_name", "email")
+    )
+    batch = []
+    for recipient in recipients.iterator(chunk_size=batch_size):
+        batch.append(recipient)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _send_one(connection, message):
+    """Send a message, reopening the connection once if the server dropped it"""
+    try:
+        return connection.send_messages([message])
+    except smtplib.SMTPServerDisconnected:
+        connection.close()
+        connection.open()
+        return connection.send_messages([message])
+
+
+def _send_batch(issue, connection, messages):
+    """
+    Send a batch message by message and return how many were accepted.
+    Rejected recipients are logged and skipped; a server that cannot be
+    reached again raises, leaving the checkpoint before this batch. A
+    slow batch renews the issue's lease so it is not taken over.
+    """
+    sent = 0
+    for message in messages:
+        if timezone.now() - issue.heartbeat_at > RENEW_AFTER:
+            _checkpoint(issue)
+        try:
+            sent += _send_one(connection, message) or 0
+        except smtplib.SMTPServerDisconnected:
+            raise
+        except smtplib.SMTPException:
+            logger.warning("Newsletter email to %s was rejected", message.to[0])
+    return sent
+
+
+def send_issue(issue, batch_size=BATCH_SIZE, pause=BATCH_PAUSE):
+    """
+    Send an issue claimed by claim_next_issue() to every opted-in client
+    after its checkpoint. Returns the number of emails sent during this
+    call; raises LeaseLost if another worker took the issue over.
+    """
+    subject, body = render_issue(issue)
+    sent_total = 0
+    connection = get_connection()
+    connection.open()
+    try:
+        for batch in _recipient_batches(issue, batch_size):
+            messages = [
+                EmailMessage(
+                    subject,
+                    body.safe_substitute(first_name=first_name),
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email],
+                    connection=connection,
+                )
+                for pk, first_name, email in batch
+            ]
+            sent = _send_batch(issue, connection, messages)
+            sent_total += sent
+            _checkpoint(
+                issue,
+                last_client_id=batch[-1][0],
+                sent_count=F("sent_count") + sent,
+                failed_count=F("failed_count") + len(messages) - sent,
+            )
+            issue.last_client_id = batch[-1][0]
+            if pause:
+                time.sleep(pause)
+    finally:
+        connection.close()
+
+    _checkpoint(issue, status="sent", finished_at=timezone.now())
+    logger.info("Newsletter issue %s sent to %s clients", issue.pk, sent_total)
+    return sent_total
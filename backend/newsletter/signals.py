@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from blog.models import BlogPost
+
+from .models import NewsletterIssue
+
+
+@receiver(post_save, sender=BlogPost)
+def queue_issue_for_published_post(sender, instance, **kwargs):
+    """
+    Queue a newsletter issue the first time a post is published.
+    Only a row is written here; the worker does the sending.
+    """
+    if instance.status != "published":
+        return
+    post_id = instance.pk
+    transaction.on_commit(
+        lambda: NewsletterIssue.objects.get_or_create(post_id=post_id)
+    )
@@ -0,0 +1,160 @@
+import io
+import smtplib
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Client
+from blog.models import BlogPost
+
+from . import sending
+from .models import NewsletterIssue
+from .sending import LeaseLost, claim_next_issue, send_issue
+
+
+class RejectingBackend(EmailBackend):
+    """The locmem backend, refusing addresses that start with "reject" """
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].startswith("reject"):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b"No")})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class NewsletterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("lois")
+        cls.recipients = []
+        for number, opted_in in enumerate([True, True, False, True, True, True]):
+            user = User.objects.create_user(f"client{number}")
+            client = Client.objects.create(
+                user=user,
+                first_name=f"Client{number}",
+                last_name="Lind",
+                email=f"client{number}@example.com",
+                phone="555",
+                date_of_birth=date(1990, 5, 1),
+                newsletter_opt_in=opted_in,
+            )
+            if opted_in:
+                cls.recipients.append(client)
+
+    def publish(self, title="Elderberry syrup"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title=title,
+                slug="elderberry",
+                author=self.author,
+                content="Elderberry syrup for winter. " * 20,
+                categories="recipes",
+                status="published",
+                published_date=date(2026, 3, 1),
+            )
+
+    def expire_lease(self):
+        NewsletterIssue.objects.update(
+            heartbeat_at=timezone.now() - sending.LEASE - timedelta(seconds=1)
+        )
+
+    def sent_to(self):
+        return [message.to[0] for message in mail.outbox]
+
+    def test_publishing_queues_one_issue(self):
+        post = self.publish()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = "Elderberry syrup, revised"
+            post.save()
+        self.assertEqual(NewsletterIssue.objects.get().status, "queued")
+
+    def test_claim_is_exclusive_until_the_lease_ends(self):
+        self.publish()
+        issue = claim_next_issue()
+        self.assertEqual(issue.status, "sending")
+        self.assertIsNone(claim_next_issue())
+
+        self.expire_lease()
+        self.assertEqual(claim_next_issue().pk, issue.pk)
+        self.assertIsNone(claim_next_issue())
+
+    def test_sends_to_opted_in_clients_in_batches(self):
+        self.publish("Save $5 on ${first_name}'s syrup")
+        issue = claim_next_issue()
+        self.assertEqual(send_issue(issue, batch_size=2, pause=0), 5)
+        self.assertEqual(self.sent_to(), [client.email for client in self.recipients])
+        self.assertEqual(
+            mail.outbox[0].subject,
+            "New on Lois's Herbs: Save $5 on ${first_name}'s syrup",
+        )
+        self.assertIn("Hello Client0,", mail.outbox[0].body)
+        self.assertIn("Save $5 on ${first_name}'s syrup", mail.outbox[0].body)
+
+        issue.refresh_from_db()
+        self.assertEqual(issue.status, "sent")
+        self.assertEqual((issue.sent_count, issue.failed_count), (5, 0))
+        self.assertEqual(issue.last_client_id, self.recipients[-1].pk)
+
+    def test_resumes_after_the_checkpoint(self):
+        self.publish()
+        NewsletterIssue.objects.update(last_client_id=self.recipients[2].pk)
+        issue = claim_next_issue()
+        self.assertEqual(send_issue(issue, batch_size=2, pause=0), 2)
+        self.assertEqual(
+            self.sent_to(), [client.email for client in self.recipients[3:]]
+        )
+
+    @override_settings(EMAIL_BACKEND="newsletter.tests.RejectingBackend")
+    def test_rejected_recipients_are_counted(self):
+        Client.objects.filter(pk=self.recipients[1].pk).update(
+            email="rejected@example.com"
+        )
+        self.publish()
+        with self.assertLogs("newsletter.sending", "WARNING") as logs:
+            call_command(
+                "run_newsletter_worker", "--once", "--pause", "0", stdout=io.StringIO()
+            )
+        self.assertIn("rejected@example.com", logs.output[0])
+        issue = NewsletterIssue.objects.get()
+        self.assertEqual(issue.status, "sent")
+        self.assertEqual((issue.sent_count, issue.failed_count), (4, 1))
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_taken_over_worker_stops_at_its_checkpoint(self):
+        self.publish()
+        stalled = claim_next_issue()
+        self.expire_lease()
+        successor = claim_next_issue()
+
+        with self.assertRaises(LeaseLost):
+            send_issue(stalled, batch_size=2, pause=0)
+        # The batch in flight went out, but was not checkpointed
+        self.assertEqual(len(mail.outbox), 2)
+        successor.refresh_from_db()
+        self.assertEqual((successor.last_client_id, successor.sent_count), (0, 0))
+
+        self.assertEqual(send_issue(successor, batch_size=2, pause=0), 5)
+        self.assertEqual(NewsletterIssue.objects.get().status, "sent")
+
+    def test_slow_batch_renews_its_lease(self):
+        self.publish()
+        stalled = claim_next_issue()
+        self.expire_lease()
+        claim_next_issue()
+        # Renewing before every message finds the takeover before sending
+        with mock.patch.object(sending, "RENEW_AFTER", timedelta(0)):
+            with self.assertRaises(LeaseLost):
+                send_issue(stalled, batch_size=2, pause=0)
+        self.assertEqual(mail.outbox, [])
+
+        NewsletterIssue.objects.update(status="queued", heartbeat_at=None)
+        issue = claim_next_issue()
+        with mock.patch.object(sending, "RENEW_AFTER", timedelta(0)):
+            self.assertEqual(send_issue(issue, batch_size=2, pause=0), 5)